@@ -0,0 +1,194 @@
+from collections import Counter
+from operator import attrgetter
+from typing import Dict, List
+
+import numpy as np
+
+from records import StudentStore, changed_positions
+from versioned import VersionedCache
+
+UNKNOWN = "Noma'lum"
+
+# Kesim o'lchovlari: nom -> Student maydoni
+DIMS = {"dir": "yunalish", "group": "guruh", "status": "status"}
+_CELL = attrgetter(*DIMS.values())
+
+
+class StatCube:
+    """Yo'nalish × guruh × status kesimidagi yozuvlar soni — barcha statistikaning manbai.
+
+    ``cells`` — ``Counter((yunalish, guruh, status) -> soni)``: yozuvlar bir
+    marta, C darajasida (``Counter(map(attrgetter))``) sanaladi va o'zgargan
+    yozuvlar bo'yicha inkremental yangilanadi. Ko'rinishlar uchun kataklar
+    ustunli shaklga o'tkaziladi: har bir o'lchov — kategoriyalar lug'ati va
+    ``int32`` kodlar, soni — ``n``, faollik — status kodi bo'yicha niqob.
+    Guruhlash, faollik ulushi va kesishma jadvallari (yo'nalish × guruh,
+    yo'nalish × status) shu massivlar ustida bitta ``np.bincount`` bilan olinadi.
+    """
+
+    __slots__ = ("cells", "required_status", "_cols")
+
+    def __init__(self, cells: Counter, required_status: str):
+        self.cells = cells
+        self.required_status = required_status
+        self._cols = None
+
+    @classmethod
+    def from_records(cls, records, required_status: str) -> "StatCube":
+        return cls(Counter(map(_CELL, records)), required_status)
+
+    @classmethod
+    def merged(cls, cubes, required_status: str) -> "StatCube":
+        cells = Counter()
+        for cube in cubes:
+            cells.update(cube.cells)
+        return cls(cells, required_status)
+
+    def updated(self, removed, added) -> "StatCube":
+        """Eski yozuvlar ayirilgan va yangilari qo'shilgan nusxa (o'zi o'zgarmaydi)."""
+        cells = self.cells.copy()
+        cells.subtract(Counter(map(_CELL, removed)))
+        cells.update(Counter(map(_CELL, added)))
+        return StatCube(+cells, self.required_status)  # 0 va manfiy kataklar tashlanadi
+
+    def _columns(self):
+        cols = self._cols
+        if cols is None:
+            keys = list(self.cells)
+            vocab, codes = {}, {}
+            for k, dim in enumerate(DIMS):
+                names = sorted({key[k] for key in keys})
+                index = {name: i for i, name in enumerate(names)}
+                vocab[dim] = names
+                codes[dim] = np.fromiter((index[key[k]] for key in keys), dtype=np.int32, count=len(keys))
+            n = np.fromiter(self.cells.values(), dtype=np.int64, count=len(keys))
+            req = self.required_status.lower()
+            mask = np.array([req in st.lower() for st in vocab["status"]], dtype=bool)
+            # faol yozuvlar soni har bir katak uchun
+            active = np.where(mask[codes["status"]], n, 0) if len(keys) else n
+            cols = self._cols = (vocab, codes, n, active)
+        return cols
+
+    @property
+    def total(self) -> int:
+        return int(self._columns()[2].sum())
+
+    @property
+    def active(self) -> int:
+        return int(self._columns()[3].sum())
+
+    def table(self, dim: str) -> Dict[str, List[int]]:
+        """Bitta o'lchov bo'yicha: nom -> [jami, faol] (bo'sh bo'lmaganlari)."""
+        vocab, codes, n, active = self._columns()
+        size = len(vocab[dim])
+        tot = np.bincount(codes[dim], weights=n, minlength=size)
+        act = np.bincount(codes[dim], weights=active, minlength=size)
+        return {vocab[dim][i]: [int(tot[i]), int(act[i])] for i in np.flatnonzero(tot)}
+
+    def crosstab(self, rows: str, cols: str) -> Dict[str, Dict[str, List[int]]]:
+        """Kesishma jadvali: qator -> ustun -> [jami, faol] (faqat bo'sh bo'lmagan kataklar)."""
+        vocab, codes, n, active = self._columns()
+        width = len(vocab[cols])
+        joint = codes[rows].astype(np.int64) * width + codes[cols]
+        size = len(vocab[rows]) * width
+        tot = np.bincount(joint, weights=n, minlength=size)
+        act = np.bincount(joint, weights=active, minlength=size)
+        out: Dict[str, Dict[str, List[int]]] = {}
+        row_names, col_names = vocab[rows], vocab[cols]
+        for i in np.flatnonzero(tot):
+            r, c = divmod(int(i), width)
+            out.setdefault(row_names[r], {})[col_names[c]] = [int(tot[i]), int(act[i])]
+        return out
+
+
+class Aggregates:
+    """Snapshot bo'yicha oldindan hisoblangan statistika (``StatCube`` ko'rinishi).
+
+    ``per_dir`` va ``per_group``: kalit -> [jami, faol]. Bo'sh yo'nalish/guruh
+    ``""`` kaliti ostida saqlanadi, ``rows`` esa uni ``UNKNOWN`` sifatida
+    ko'rsatadi. Bir marta quriladi, keyin har bir so'rov O(guruhlar soni).
+    ``cube`` — kesishma jadvallari (/stat drill-down) uchun manba.
+    Bir nechta varaq bo'lsa ``parts`` — ``[(varaq nomi, Aggregates)]``.
+    """
+
+    __slots__ = ("version", "total", "active", "per_dir", "per_group", "parts", "cube")
+
+    def __init__(self, version: int = 0):
+        self.version = version
+        self.total = 0
+        self.active = 0
+        self.per_dir: Dict[str, List[int]] = {}
+        self.per_group: Dict[str, List[int]] = {}
+        self.parts = []
+        self.cube = None
+
+    @classmethod
+    def from_cube(cls, cube: StatCube, version: int = 0) -> "Aggregates":
+        agg = cls(version)
+        agg.cube = cube
+        agg.total, agg.active = cube.total, cube.active
+        agg.per_dir = cube.table("dir")
+        agg.per_group = cube.table("group")
+        return agg
+
+    @classmethod
+    def from_store(cls, store: StudentStore, version: int = 0) -> "Aggregates":
+        return cls.from_cube(StatCube.from_records(store, store.required_status), version)
+
+    @classmethod
+    def merged(cls, parts, version: int = 0) -> "Aggregates":
+        """Varaqlar agregatlarini qo'shib umumiysini quradi (yozuvlar qayta sanalmaydi)."""
+        parts = list(parts)
+        cubes = [part.cube for _, part in parts]
+        agg = cls.from_cube(StatCube.merged(cubes, cubes[0].required_status if cubes else ""), version)
+        agg.parts = parts
+        return agg
+
+    @staticmethod
+    def pct(active: int, total: int) -> float:
+        return round((active / total * 100), 2) if total else 0.0
+
+    def rows(self, table: Dict[str, List[int]]):
+        """(kalit, jami, faol, foiz) — kalit bo'yicha alifbo tartibida, bo'sh kalit UNKNOWN."""
+        merged = {}
+        for key, (tot, act) in table.items():
+            m = merged.setdefault(key or UNKNOWN, [0, 0])
+            m[0] += tot
+            m[1] += act
+        return [
+            (key, tot, act, self.pct(act, tot))
+            for key, (tot, act) in sorted(merged.items(), key=lambda kv: kv[0].lower())
+        ]
+
+    def most_common(self, table: Dict[str, List[int]]):
+        """Bo'sh bo'lmagan kalitlar, soni bo'yicha kamayish tartibida (Counter.most_common kabi)."""
+        return sorted(((k, tot) for k, (tot, _) in table.items() if k), key=lambda kv: kv[1], reverse=True)
+
+
+def update_aggregates(agg: Aggregates, old: StudentStore, new: StudentStore, version: int,
+                      changed=None) -> Aggregates:
+    """Eski agregatlarni faqat o'zgargan yozuvlar bo'yicha yangilaydi.
+
+    O'zgarishlar ko'p bo'lsa (yarmidan ortig'i) noldan hisoblash arzonroq.
+    """
+    if changed is None:
+        changed = changed_positions(old, new)
+    if len(changed) * 2 > max(len(new), 1) or agg.cube is None:
+        return Aggregates.from_store(new, version)
+    cube = agg.cube.updated(
+        (old.records[i] for i in changed if i < len(old)),
+        (new.records[i] for i in changed if i < len(new)),
+    )
+    return Aggregates.from_cube(cube, version)
+
+
+_CACHE = VersionedCache(
+    Aggregates.from_store,
+    update=lambda agg, old, new, changed, version: update_aggregates(agg, old, new, version, changed),
+    combine=lambda store, parts, version: Aggregates.merged(parts, version),
+)
+
+
+def aggregates_for(snapshot, key: str = "") -> Aggregates:
+    """Snapshot versiyasiga mos agregatlar (``key`` — varaq nomi)."""
+    return _CACHE.get(snapshot, key)
@@ -0,0 +1 @@
+"""Oflayn benchmarklar: ``python -m benchmarks <buyruq>`` (ro'yxat — benchmarks/__main__.py)."""
@@ -0,0 +1,155 @@
+"""Oflayn benchmarklar.
+
+Ishga tushirish: python -m benchmarks search --rows 10000 100000
+                 python -m benchmarks memory --rows 100000
+                 python -m benchmarks sessions --chats 1000
+                 python -m benchmarks stat --rows 10000 100000
+                 python -m benchmarks crosstab --rows 100000 1000000
+                 python -m benchmarks sync --rows 100000
+                 python -m benchmarks fuzzy --rows 100000 --changed 1000
+                 python -m benchmarks bulk --rows 100000 --keys 50000
+                 python -m benchmarks outbox --chats 200 --messages 5
+                 python -m benchmarks handlers --rows 100000 --save base.json
+                 python -m benchmarks startup --rows 100000 --delay 2
+                 python -m benchmarks history --days 365 --sheets 5
+                 python -m benchmarks follow --rows 100000 --subs 10000
+                 python -m benchmarks report --rows 100000 --requests 20
+                 python -m benchmarks prewarm --rows 100000 --changed 1000
+                 python -m benchmarks handlers --rows 100000 --baseline base.json --threshold 0.25
+                 python -m benchmarks webhook --url http://127.0.0.1:10000/webhook
+"""
+import argparse
+
+from benchmarks.bot import bench_handlers, bench_prewarm, bench_report
+from benchmarks.changes import bench_follow, bench_sync
+from benchmarks.common import parse_statuses
+from benchmarks.delivery import bench_outbox, bench_webhook
+from benchmarks.search import bench_bulk, bench_fuzzy, bench_search
+from benchmarks.startup import bench_memory, bench_sessions, bench_sheets, bench_startup
+from benchmarks.stats import bench_crosstab, bench_history, bench_stat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BandlikTelegramBot benchmarklari")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("search", help="chiziqli qidiruv va indeks solishtiruvi")
+    p.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    p.add_argument("--repeat", type=int, default=20)
+
+    p = sub.add_parser("memory", help="xom qatorlar va StudentStore xotira hajmi")
+    p.add_argument("--rows", type=int, default=100_000)
+
+    p = sub.add_parser("stat", help="/stat agregatlari: har chaqiruv narxi")
+    p.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    p.add_argument("--changed", type=int, default=100)
+
+    p = sub.add_parser("crosstab", help="ustunli statistika: kesishma jadvallari, 100k va 1M qator")
+    p.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    p.add_argument("--changed", type=int, default=100)
+
+    p = sub.add_parser("sync", help="to'liq va ustunli sinxronlash: baytlar va vaqt")
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--changed", type=int, default=1000)
+
+    p = sub.add_parser("fuzzy", help="fuzzy/transliteratsiya qidiruvi: qurish, inkremental yangilash, kechikish")
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--changed", type=int, default=1000)
+
+    p = sub.add_parser("bulk", help="fayl orqali ommaviy qidiruv: vaqt va xotira")
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--keys", type=int, default=50_000)
+
+    p = sub.add_parser("outbox", help="chiquvchi navbat: 429 va o'tkazuvchanlik (soxta Bot bilan)")
+    p.add_argument("--chats", type=int, default=200)
+    p.add_argument("--messages", type=int, default=5)
+
+    p = sub.add_parser("handlers", help="handler'lar (soxta Bot bilan): kechikish, xotira, regressiya")
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--iterations", type=int, default=200)
+    p.add_argument("--statuses", type=parse_statuses, default=None,
+                   help="status ulushlari, masalan: \"Faol=0.45,Ishsiz=0.5,Akademik ta'til=0.05\"")
+    p.add_argument("--baseline", help="solishtirish uchun oldingi --save natijasi (JSON)")
+    p.add_argument("--threshold", type=float, default=0.25)
+    p.add_argument("--save", help="natijani JSON faylga yozish")
+
+    p = sub.add_parser("startup", help="sovuq start: import, disk snapshot va jadval olish vaqti")
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--delay", type=float, default=2.0, help="soxta Google javob kechikishi (soniya)")
+
+    p = sub.add_parser("sheets", help="bir nechta varaq: parallel yuklash, umumiy qidiruv, xotira")
+    p.add_argument("--sheets", type=int, default=10)
+    p.add_argument("--rows", type=int, default=10_000)
+    p.add_argument("--delay", type=float, default=0.5, help="soxta Google javob kechikishi (soniya)")
+    p.add_argument("--slow", type=float, default=8.0, help="bitta sekin varaqning kechikishi")
+    p.add_argument("--timeout", type=float, default=5.0)
+
+    p = sub.add_parser("history", help="agregatlar tarixi: yozish, /trend so'rovi, fayl hajmi")
+    p.add_argument("--days", type=int, default=365)
+    p.add_argument("--sheets", type=int, default=5)
+    p.add_argument("--groups", type=int, default=200)
+
+    p = sub.add_parser("follow", help="/follow: o'zgarishlarni aniqlash vaqti")
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--subs", type=int, default=10_000)
+    p.add_argument("--chats", type=int, default=1000)
+
+    p = sub.add_parser("report", help="/report: PDF/XLSX qurish, birlashtirish va kesh")
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--requests", type=int, default=20)
+
+    p = sub.add_parser("prewarm", help="yangi versiyadan keyingi birinchi so'rovlar: isitishsiz va isitish bilan")
+    p.add_argument("--rows", type=int, default=100_000)
+    p.add_argument("--changed", type=int, default=1000)
+
+    p = sub.add_parser("sessions", help="sessiya backend'lari: callback kechikishi")
+    p.add_argument("--chats", type=int, default=1000)
+    p.add_argument("--callbacks", type=int, default=5000)
+    p.add_argument("--results", type=int, default=500)
+
+    p = sub.add_parser("webhook", help="webhook endpoint'iga yuklama testi")
+    p.add_argument("--url", default="http://127.0.0.1:10000/webhook")
+    p.add_argument("--requests", type=int, default=500)
+    p.add_argument("--concurrency", type=int, default=20)
+    p.add_argument("--chats", type=int, default=50)
+    p.add_argument("--text", nargs="+", default=["karimov", "aziz", "3000000001"])
+
+    args = parser.parse_args()
+    if args.cmd == "search":
+        bench_search(args.rows, args.repeat)
+    elif args.cmd == "memory":
+        bench_memory(args.rows)
+    elif args.cmd == "stat":
+        bench_stat(args.rows, changed=args.changed)
+    elif args.cmd == "crosstab":
+        bench_crosstab(args.rows, args.changed)
+    elif args.cmd == "sync":
+        bench_sync(args.rows, args.changed)
+    elif args.cmd == "fuzzy":
+        bench_fuzzy(args.rows, args.changed)
+    elif args.cmd == "bulk":
+        bench_bulk(args.rows, args.keys)
+    elif args.cmd == "outbox":
+        bench_outbox(args.chats, args.messages)
+    elif args.cmd == "handlers":
+        bench_handlers(args.rows, args.iterations, args.statuses, args.baseline, args.threshold, args.save)
+    elif args.cmd == "startup":
+        bench_startup(args.rows, args.delay)
+    elif args.cmd == "sheets":
+        bench_sheets(args.sheets, args.rows, args.delay, args.slow, args.timeout)
+    elif args.cmd == "history":
+        bench_history(args.days, args.sheets, args.groups)
+    elif args.cmd == "follow":
+        bench_follow(args.rows, args.subs, args.chats)
+    elif args.cmd == "report":
+        bench_report(args.rows, args.requests)
+    elif args.cmd == "prewarm":
+        bench_prewarm(args.rows, args.changed)
+    elif args.cmd == "sessions":
+        bench_sessions(args.chats, args.callbacks, args.results)
+    elif args.cmd == "webhook":
+        bench_webhook(args.url, args.requests, args.concurrency, args.chats, args.text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Handler'lar soxta Bot bilan: kechikish/xotira regressiyasi, /report va isitish (prewarm)."""
+import gc
+import json
+import random
+import time
+import tracemalloc
+
+from columns import IDX_STAT
+from benchmarks.common import (
+    ACTIVE_STATUS, FakeBot, FakeContext, FakeUpdate, FakeWorksheet,
+    bench_queries, make_rows, make_store, offline_handlers, percentile,
+)
+
+
+async def _measure(call, iterations: int):
+    """(kechikishlar, eng yuqori xotira, har chaqiruvda saqlanib qolgan bayt, bloklar)."""
+    import sys
+
+    times = []
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        await call(i)
+        times.append(time.perf_counter() - t0)
+
+    k = max(1, min(iterations, 50))
+    gc.collect()
+    blocks0 = sys.getallocatedblocks()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    for i in range(k):
+        await call(iterations + i)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    blocks = (sys.getallocatedblocks() - blocks0) / k
+    return times, peak - base, (current - base) / k, blocks
+
+
+def bench_handlers(n: int, iterations: int, statuses=None, baseline: str = None, threshold: float = 0.25,
+                   save: str = None):
+    """search / pagination / stat / grafik handler'larini soxta Bot bilan o'lchaydi.
+
+    Natijalar (p50/p95/p99, eng yuqori xotira) ``save`` fayliga yoziladi;
+    ``baseline`` berilsa p95 yoki xotira ``threshold`` ulushdan ko'proq
+    yomonlashganda SystemExit bilan tugaydi.
+    """
+    import asyncio
+
+    store = make_store(n, statuses=statuses)
+    h = offline_handlers(store)
+    bot = FakeBot(latency=0.0, chat_interval=0.0, global_rate=float("inf"))
+    ctx = FakeContext(bot)
+    queries = bench_queries(store, 200)
+    page_chat = 1
+    shared_chat = 4
+
+    async def search(i):
+        await h.search(FakeUpdate.text(100_000 + i, queries[i % len(queries)]), ctx)
+
+    async def pagination(i):
+        sess = h.CHAT_CACHE.get(page_chat)
+        pages = max(1, (sess.total + h.PER_PAGE - 1) // h.PER_PAGE)
+        await h.inline_pagination_handler(FakeUpdate.callback(page_chat, sess.page_msg_id, f"pg|{i % pages + 1}"), ctx)
+
+    async def shared_page(i):
+        # boshqa chat xuddi shu so'rovni varaqlaydi — sahifalar tayyor keshdan
+        sess = h.CHAT_CACHE.get(shared_chat)
+        pages = min(10, max(1, (sess.total + h.PER_PAGE - 1) // h.PER_PAGE))
+        await h.inline_pagination_handler(FakeUpdate.callback(shared_chat, sess.page_msg_id, f"pg|{i % pages + 1}"), ctx)
+
+    async def stat(i):
+        await h.stat(FakeUpdate.text(2, "/stat"), ctx)
+
+    async def grafik(i):
+        await h.grafik(FakeUpdate.text(3, "/grafik"), ctx)
+
+    async def main():
+        # sahifalash uchun ko'p natijali sessiya
+        await h.search(FakeUpdate.text(page_chat, queries[0][:2]), ctx)
+        await h.search(FakeUpdate.text(shared_chat, queries[0][:2].upper()), ctx)
+        results = {}
+        for name, call in (("search", search), ("pagination", pagination), ("shared", shared_page),
+                           ("stat", stat), ("grafik", grafik)):
+            t0 = time.perf_counter()
+            await call(0)
+            cold = time.perf_counter() - t0
+            times, peak, retained, blocks = await _measure(call, iterations)
+            results[name] = {
+                "cold_ms": cold * 1000,
+                "p50_ms": percentile(times, 50) * 1000,
+                "p95_ms": percentile(times, 95) * 1000,
+                "p99_ms": percentile(times, 99) * 1000,
+                "peak_kib": peak / 1024,
+                "retained_b": retained,
+                "blocks": blocks,
+            }
+            r = results[name]
+            print(f"{name:>10}: sovuq {r['cold_ms']:8.2f} ms | p50 {r['p50_ms']:7.3f} | p95 {r['p95_ms']:7.3f}"
+                  f" | p99 {r['p99_ms']:7.3f} ms | eng yuqori {r['peak_kib']:8.1f} KiB"
+                  f" | saqlangan {retained:7.0f} B/chaqiruv | bloklar {blocks:+.1f}")
+        return results
+
+    print(f"{n} qator, {iterations} iteratsiya | Bot chaqiruvlari yoziladi (soxta)")
+    results = asyncio.run(main())
+    print(f"Bot chaqiruvlari: {len(bot.calls)}")
+
+    if save:
+        with open(save, "w", encoding="utf-8") as f:
+            json.dump({"rows": n, "iterations": iterations, "results": results}, f, indent=2)
+    if baseline:
+        with open(baseline, encoding="utf-8") as f:
+            base = json.load(f)["results"]
+        failed = []
+        for name, r in results.items():
+            b = base.get(name)
+            if not b:
+                continue
+            for key in ("p95_ms", "peak_kib"):
+                # juda kichik qiymatlarda shovqin ko'p — 0.05 ms / 16 KiB dan past farqlar e'tiborsiz
+                floor = 0.05 if key == "p95_ms" else 16
+                if r[key] > b[key] * (1 + threshold) and r[key] - b[key] > floor:
+                    failed.append(f"{name}.{key}: {b[key]:.3f} -> {r[key]:.3f}")
+        if failed:
+            raise SystemExit("Regressiya (> {:.0%}): ".format(threshold) + "; ".join(failed))
+        print(f"Regressiya yo'q (chegara {threshold:.0%})")
+
+
+def bench_report(n: int, requests: int):
+    """/report: hisobot qurish vaqti, bir xil parallel so'rovlarni birlashtirish, kesh va navbat chegarasi."""
+    import asyncio
+    import report
+
+    store = make_store(n, statuses={ACTIVE_STATUS: 0.45, "Ishsiz": 0.45, "Akademik ta'til": 0.1})
+    h = offline_handlers(store)
+    bot = FakeBot(latency=0.0, chat_interval=0.0, global_rate=float("inf"))
+
+    def ctx(args):
+        c = FakeContext(bot)
+        c.args = args
+        return c
+
+    async def run():
+        for fmt in report.FORMATS:
+            before = dict(h.REPORTS.stats())
+            t0 = time.perf_counter()
+            await asyncio.gather(*(h.report(FakeUpdate.text(10 + i, "/report"), ctx([fmt])) for i in range(requests)))
+            cold = time.perf_counter() - t0
+            after = h.REPORTS.stats()
+            sent = sum(1 for _, method, _ in bot.calls if method == "send_document")
+            t0 = time.perf_counter()
+            await h.report(FakeUpdate.text(1, "/report"), ctx([fmt]))
+            warm = time.perf_counter() - t0
+            size = len(h.REPORTS.cached((1, "", fmt)) or b"")
+            print(f"{fmt:>4}: {requests} ta parallel so'rov {cold * 1000:7.0f} ms"
+                  f" ({after['built'] - before['built']} marta qurildi, {after['deduplicated'] - before['deduplicated']}"
+                  f" birlashtirildi, {sent} fayl yuborildi, {size // 1024} KiB) | takroriy (file_id) {warm * 1000:.1f} ms")
+            bot.calls.clear()
+
+        # navbat chegarasi: sekin ishlar bilan to'ldiriladi
+        queue = report.ReportQueue(workers=1, max_pending=4)
+        accepted, rejected = [], 0
+        for i in range(10):
+            try:
+                accepted.append(queue.submit((1, str(i), "pdf"), time.sleep, 0.05))
+            except report.ReportBusy:
+                rejected += 1
+        await asyncio.gather(*(queue.result(job) for job in accepted))
+        print(f"navbat (1 oqim, 4 ish): {len(accepted)} qabul qilindi, {rejected} rad etildi | {queue.stats()}")
+
+    print(f"{n} qator, {len({rec.yunalish for rec in store})} yo'nalish, {len({rec.guruh for rec in store})} guruh")
+    asyncio.run(run())
+
+
+def bench_prewarm(n: int, changed: int):
+    """Yangi versiyadan keyingi birinchi so'rovlar: oldindan isitishsiz va isitish bilan."""
+    import asyncio
+    from collections import namedtuple
+    from aggregates import aggregates_for
+    from fuzzy import fuzzy_for
+    from index import index_for
+    from sync import ColumnSync
+
+    rnd = random.Random(5)
+    rows = make_rows(n)
+    ws = FakeWorksheet(rows)
+    sync = ColumnSync(ws, ACTIVE_STATUS)
+    Snapshot = namedtuple("Snapshot", ["version", "rows", "fetched_at"])
+    current = [Snapshot(1, sync.parse(sync.fetch()), time.monotonic())]
+    h = offline_handlers(current[0].rows)
+    bot = FakeBot(latency=0.0, chat_interval=0.0, global_rate=float("inf"))
+    ctx = FakeContext(bot)
+    query = bench_queries(current[0].rows, 1)[0]
+
+    async def aload_snapshot():
+        return current[0]
+
+    h.aload_snapshot = aload_snapshot
+
+    def next_version():
+        edited = [list(r) for r in ws.rows]
+        for i in rnd.sample(range(1, n + 1), changed):
+            edited[i][IDX_STAT] = "Ishsiz" if edited[i][IDX_STAT] == ACTIVE_STATUS else ACTIVE_STATUS
+        ws.rows = edited
+        old = current[0]
+        return Snapshot(old.version + 1, sync.parse(sync.fetch()), time.monotonic())
+
+    async def first_requests():
+        out = {}
+        for name, call in (("search", lambda: h.search(FakeUpdate.text(10, query), ctx)),
+                           ("fuzzy", lambda: h.search(FakeUpdate.text(13, "toshmatov jasr"), ctx)),
+                           ("stat", lambda: h.stat(FakeUpdate.text(11, "/stat"), ctx)),
+                           ("grafik", lambda: h.grafik(FakeUpdate.text(12, "/grafik"), ctx))):
+            t0 = time.perf_counter()
+            await call()
+            out[name] = (time.perf_counter() - t0) * 1000
+        return out
+
+    async def run():
+        await h.prewarm(current[0])
+        # isitishsiz: yangi versiya darhol e'lon qilinadi, birinchi so'rovlar hammasini quradi
+        current[0] = next_version()
+        cold = await first_requests()
+        # isitish bilan: sheets._prepare (digest, indekslar, agregatlar) e'lon qilishdan oldin, keyin prewarm
+        snap = next_version()
+        t0 = time.perf_counter()
+        snap.rows.digest
+        index_for(snap)
+        fuzzy_for(snap)
+        aggregates_for(snap)
+        prepare_t = time.perf_counter() - t0
+        current[0] = snap
+        t0 = time.perf_counter()
+        await h.prewarm(snap)
+        prewarm_t = time.perf_counter() - t0
+        warm = await first_requests()
+        print(f"{n} qator, {changed} ta o'zgargan | tayyorlash (fonda) {prepare_t * 1000:.0f} ms,"
+              f" prewarm {prewarm_t * 1000:.0f} ms")
+        for name in cold:
+            print(f"{name:>8}: isitishsiz {cold[name]:8.1f} ms | isitish bilan {warm[name]:7.2f} ms")
+
+    asyncio.run(run())
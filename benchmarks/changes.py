@@ -0,0 +1,91 @@
+"""O'zgarishlarni olish: ustunli sinxronlash va /follow obunalari."""
+import os
+import random
+import time
+from statistics import median
+
+from columns import IDX_FIO, IDX_STAT
+from benchmarks.common import ACTIVE_STATUS, FakeWorksheet, make_rows, timeit
+
+
+def bench_sync(n: int, changed: int, repeat: int = 3):
+    """To'liq get_all_values va ustunli inkremental sinxronlash: baytlar va yangilash vaqti."""
+    from records import StudentStore
+    from sync import ColumnSync
+
+    rows = make_rows(n)
+    edited = [list(r) for r in rows]
+    fresh = make_rows(n, seed=2)
+    for i in range(1, n + 1, max(1, n // changed)):
+        edited[i][IDX_STAT] = fresh[i][IDX_STAT]
+        edited[i][IDX_FIO] = fresh[i][IDX_FIO]
+
+    ws = FakeWorksheet(rows)
+    full_t = median(timeit(lambda: StudentStore.from_rows(ws.get_all_values(), ACTIVE_STATUS), repeat))
+    full_bytes = ws.bytes_sent // ws.calls
+
+    ws = FakeWorksheet(rows)
+    sync = ColumnSync(ws, ACTIVE_STATUS)
+    cold_t = median(timeit(lambda: sync.parse(sync.fetch()), 1))
+    col_bytes = ws.bytes_sent // ws.calls
+    same_t = median(timeit(lambda: sync.parse(sync.fetch()), repeat))
+    ws.rows = edited
+    t0 = time.perf_counter()
+    sync.parse(sync.fetch())
+    edit_t = time.perf_counter() - t0
+
+    print(f"{n} qator, {sync.last_changed} ta o'zgargan qator")
+    print(f"to'liq (get_all_values): {full_bytes / 2**20:7.2f} MiB | {full_t * 1000:8.1f} ms")
+    print(f"ustunlar, birinchi     : {col_bytes / 2**20:7.2f} MiB | {cold_t * 1000:8.1f} ms")
+    print(f"ustunlar, o'zgarishsiz : {col_bytes / 2**20:7.2f} MiB | {same_t * 1000:8.1f} ms")
+    print(f"ustunlar, o'zgarish bor: {col_bytes / 2**20:7.2f} MiB | {edit_t * 1000:8.1f} ms")
+
+
+def bench_follow(n: int, subs: int, chats: int = 1000):
+    """/follow: o'zgarishlarni aniqlash vaqti o'zgargan qatorlar soniga qarab (to'liq solishtirish bilan)."""
+    for key, value in (("BOT_TOKEN", "bench"), ("SHEET_ID", "bench")):
+        os.environ.setdefault(key, value)
+    from follow import GROUP, ID, FollowStore, row_key, watched
+    from sync import ColumnSync
+
+    rnd = random.Random(3)
+    rows = make_rows(n)
+    ws = FakeWorksheet(rows)
+    sync = ColumnSync(ws, ACTIVE_STATUS)
+    store = sync.parse(sync.fetch())
+
+    fs = FollowStore("")
+    for _ in range(subs):
+        rec = store[rnd.randrange(n)]
+        fs.follow(rnd.randrange(chats), ID, rec.hemis, rec.fio)
+    groups = sorted({rec.guruh for rec in store})
+    for chat_id in range(chats // 10):
+        group = rnd.choice(groups)
+        fs.follow(chat_id, GROUP, group, group)
+    fs.observe("bench", store)
+
+    def full_diff(old, new):
+        # taqqoslash uchun: barcha qatorlarni kalit bo'yicha solishtirish
+        before = {row_key(r): watched(r) for r in old}
+        return sum(1 for r in new if before.get(row_key(r)) != watched(r))
+
+    statuses = [ACTIVE_STATUS, "Ishsiz", "Akademik ta'til"]
+    print(f"{n} qator | {fs.stats()['subscriptions']} obuna, {chats} chat")
+    for changed in (10, 100, 1000, 10000):
+        edited = [list(r) for r in rows]
+        for i in rnd.sample(range(1, n + 1), changed):
+            edited[i][IDX_STAT] = rnd.choice([s for s in statuses if s != edited[i][IDX_STAT]])
+        ws.rows = edited
+        old = store
+        store = sync.parse(sync.fetch())
+        t0 = time.perf_counter()
+        queued = fs.observe("bench", store, (sync.last_base, sync.last_positions))
+        observe_t = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        differ = full_diff(old, store)
+        full_t = time.perf_counter() - t0
+        batches = fs.drain()
+        rows = edited
+        print(f"{changed:6} o'zgargan qator ({differ} kuzatiladigan): observe {observe_t * 1000:7.2f} ms"
+              f" | to'liq solishtirish {full_t * 1000:7.1f} ms | {queued} xabar -> {len(batches)} chat")
+    fs.close()
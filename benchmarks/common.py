@@ -0,0 +1,330 @@
+"""Benchmark va testlar uchun umumiy qismlar: sintetik jadval, soxta Worksheet/Bot/Update va o'lchov yordamchilari."""
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+
+from columns import (
+    HEMIS_UID, IDX_HEMIS, IDX_FIO, IDX_STAT, IDX_JSH, IDX_W,
+    IDX_LAVOZIM, IDX_TASHKILOT, IDX_SANASI, IDX_Guruhi,
+)
+
+N_COLS = 36
+ACTIVE_STATUS = "Faol"
+
+_FIRST = ["Aziz", "Bekzod", "Dilnoza", "Shahzoda", "Jasur", "Madina", "Otabek", "Nilufar",
+          "Sardor", "Gulnora", "Javohir", "Malika", "Sherzod", "Zarina", "Rustam", "Kamola"]
+_LAST = ["Karimov", "Rahimova", "Toshmatov", "Yusupova", "Abdullayev", "Qodirova", "Ergashev",
+         "Saidova", "Nazarov", "Xolmatova", "Murodov", "Ismoilova", "Hasanov", "Jo'rayeva"]
+_FATHER = ["Akmal o'g'li", "Baxtiyor qizi", "Dilshod o'g'li", "Farhod qizi", "G'ayrat o'g'li"]
+DIRECTIONS = ["Iqtisodiyot", "Buxgalteriya hisobi", "Moliya", "Menejment", "Marketing",
+              "Axborot tizimlari", "Bank ishi", "Soliqlar", "Turizm", "Logistika"]
+
+
+def parse_statuses(spec: str):
+    """"Faol=0.45,Ishsiz=0.5,Akademik ta'til=0.05" -> {status: ulush}."""
+    out = {}
+    for part in spec.split(","):
+        name, _, weight = part.rpartition("=")
+        out[name.strip()] = float(weight)
+    return out
+
+
+def make_rows(n: int, seed: int = 1, active_ratio: float = 0.45, statuses=None):
+    """IDX_* ustunlariga mos sintetik jadval (sarlavha + n qator).
+
+    ``statuses`` — {status: ulush}; berilmasa ``active_ratio`` ulushi
+    ACTIVE_STATUS, qolgani "Ishsiz". Faol deb REQUIRED_STATUS'ni o'z ichiga
+    olgan status hisoblanadi (ish joyi ustunlari faqat ular uchun to'ldiriladi).
+    """
+    rnd = random.Random(seed)
+    if statuses is None:
+        statuses = {ACTIVE_STATUS: active_ratio, "Ishsiz": 1 - active_ratio}
+    names, weights = list(statuses), list(statuses.values())
+    header = [f"col{i}" for i in range(N_COLS)]
+    rows = [header]
+    for i in range(n):
+        r = [f"x{rnd.randrange(1000)}" for _ in range(N_COLS)]
+        direction = rnd.choice(DIRECTIONS)
+        r[HEMIS_UID] = f"{rnd.getrandbits(40):010x}"
+        r[IDX_HEMIS] = str(3000000000 + i)
+        r[IDX_FIO] = f"{rnd.choice(_LAST)} {rnd.choice(_FIRST)} {rnd.choice(_FATHER)}".upper()
+        status = rnd.choices(names, weights)[0]
+        active = ACTIVE_STATUS.lower() in status.lower()
+        r[IDX_STAT] = status
+        r[IDX_JSH] = str(rnd.randrange(10 ** 13, 10 ** 14))
+        r[IDX_Guruhi] = f"{direction[:3].upper()}-{rnd.randrange(1, 40):02d}"
+        r[IDX_W] = direction
+        if active:
+            r[IDX_LAVOZIM] = "Mutaxassis"
+            r[IDX_TASHKILOT] = f"MCHJ {rnd.randrange(1, 500)}"
+            r[IDX_SANASI] = f"2025-0{rnd.randrange(1, 10)}-1{rnd.randrange(0, 10)}"
+        else:
+            r[IDX_LAVOZIM] = r[IDX_TASHKILOT] = r[IDX_SANASI] = ""
+        rows.append(r)
+    return rows
+
+
+def make_store(n: int, seed: int = 1, active_ratio: float = 0.45, statuses=None):
+    from records import StudentStore
+
+    return StudentStore.from_rows(make_rows(n, seed, active_ratio, statuses), ACTIVE_STATUS)
+
+
+class FakeWorksheet:
+    """gspread Worksheet o'rnini bosuvchi lokal jadval.
+
+    ``get_all_values`` va ``batch_get`` (butun ustun diapazonlari) qo'llanadi;
+    ``calls`` — so'rovlar soni, ``bytes_sent`` — JSON javoblar hajmi.
+    """
+
+    def __init__(self, rows, delay: float = 0.0, errors=None):
+        self.rows = rows
+        self.delay = delay
+        self.errors = list(errors or [])
+        self.calls = 0
+        self.bytes_sent = 0
+
+    def _respond(self, payload):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.errors:
+            err = self.errors.pop(0)
+            if err is not None:
+                raise err
+        # gspread kabi: har bir katak yangi satr obyekti
+        body = json.dumps(payload, ensure_ascii=False)
+        self.bytes_sent += len(body.encode())
+        return json.loads(body)
+
+    def get_all_values(self):
+        return self._respond(self.rows)
+
+    def batch_get(self, ranges, major_dimension="ROWS"):
+        from sync import range_columns
+
+        assert major_dimension == "COLUMNS"
+        out = []
+        for a1 in ranges:
+            cols = []
+            for c in range_columns(a1):
+                col = [r[c] if c < len(r) else "" for r in self.rows]
+                while col and col[-1] == "":
+                    col.pop()
+                cols.append(col)
+            out.append(cols)
+        return self._respond(out)
+
+
+def timeit(fn, repeat: int):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def percentile(values, pct: float):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = min(len(values) - 1, max(0, round(pct / 100 * (len(values) - 1))))
+    return values[k]
+
+
+class FloodError(Exception):
+    """telegram.error.RetryAfter o'rnini bosuvchi (``retry_after`` atributi bilan)."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Flood control exceeded. Retry in {retry_after} seconds")
+        self.retry_after = retry_after
+
+
+class FakeBot:
+    """Telegram Bot o'rnini bosuvchi: chaqiruvlarni yozadi va limitdan oshsa 429 beradi.
+
+    Telegram kabi: bitta chatga ``chat_interval`` dan tez yoki umumiy
+    ``global_rate`` dan ko'p xabar yuborilsa ``FloodError`` ko'tariladi.
+    """
+
+    def __init__(self, latency: float = 0.02, chat_interval: float = 1.0, global_rate: float = 30.0,
+                 retry_after: float = 0.5):
+        self.latency = latency
+        self.chat_interval = chat_interval
+        self.global_rate = global_rate
+        self.retry_after = retry_after
+        self.calls = []
+        self.floods = 0
+        self._last = {}
+        self._window = []
+        self._next_id = 1
+
+    async def _call(self, method: str, chat_id: int, counted: bool = True, **kwargs):
+        import asyncio
+        await asyncio.sleep(self.latency)
+        now = time.monotonic()
+        if counted:
+            self._window = [t for t in self._window if now - t < 1.0]
+            if now - self._last.get(chat_id, -1e9) < self.chat_interval * 0.9 or len(self._window) >= self.global_rate:
+                self.floods += 1
+                raise FloodError(self.retry_after)
+            self._last[chat_id] = now
+            self._window.append(now)
+        self.calls.append((now, method, chat_id))
+        self._next_id += 1
+        return _FakeMessage(self._next_id, photo=method == "send_photo", document=method == "send_document")
+
+    async def send_message(self, chat_id, text, **kwargs):
+        return await self._call("send_message", chat_id)
+
+    async def send_photo(self, chat_id, photo, **kwargs):
+        return await self._call("send_photo", chat_id)
+
+    async def send_document(self, chat_id, document, **kwargs):
+        return await self._call("send_document", chat_id)
+
+    async def edit_message_text(self, chat_id, message_id, text, **kwargs):
+        return await self._call("edit_message_text", chat_id)
+
+    async def delete_message(self, chat_id, message_id):
+        return await self._call("delete_message", chat_id, counted=False)
+
+    async def send_chat_action(self, chat_id, action):
+        return await self._call("send_chat_action", chat_id, counted=False)
+
+
+class _FakePhoto:
+    __slots__ = ("file_id",)
+
+    def __init__(self, file_id: str):
+        self.file_id = file_id
+
+
+class _FakeMessage:
+    __slots__ = ("message_id", "photo", "document")
+
+    def __init__(self, message_id: int, photo: bool = False, document: bool = False):
+        self.message_id = message_id
+        self.photo = [_FakePhoto(f"photo-{message_id}")] if photo else []
+        self.document = _FakePhoto(f"document-{message_id}") if document else None
+
+
+class _FakeChat:
+    __slots__ = ("id",)
+
+    def __init__(self, chat_id: int):
+        self.id = chat_id
+
+
+class _FakeIncoming:
+    """Foydalanuvchi xabari (update.message / callback_query.message)."""
+
+    def __init__(self, chat_id: int, message_id: int, text: str = None):
+        self.chat = _FakeChat(chat_id)
+        self.message_id = message_id
+        self.text = text
+        self.document = None
+
+
+class _FakeCallbackQuery:
+    def __init__(self, chat_id: int, message_id: int, data: str):
+        self.data = data
+        self.message = _FakeIncoming(chat_id, message_id)
+        self.answers = []
+
+    async def answer(self, text: str = None, show_alert: bool = False):
+        self.answers.append(text)
+
+
+class FakeUpdate:
+    """Handler'lar o'qiydigan Update maydonlari."""
+
+    def __init__(self, chat_id: int, message=None, callback_query=None):
+        self.effective_chat = _FakeChat(chat_id)
+        self.message = message
+        self.callback_query = callback_query
+        self.inline_query = None
+
+    @classmethod
+    def text(cls, chat_id: int, text: str, message_id: int = 1):
+        return cls(chat_id, message=_FakeIncoming(chat_id, message_id, text))
+
+    @classmethod
+    def callback(cls, chat_id: int, message_id: int, data: str):
+        return cls(chat_id, callback_query=_FakeCallbackQuery(chat_id, message_id, data))
+
+
+class FakeContext:
+    def __init__(self, bot):
+        self.bot = bot
+
+
+def offline_handlers(store):
+    """handlers modulini tarmoqsiz yuklaydi: sheets o'rniga tayyor snapshot beriladi.
+
+    Haqiqiy sheets Google'ga birinchi so'rovda (``worksheet()``) ulanadi va
+    snapshot'ni TTL bo'yicha almashtiradi; o'lchov barqaror bo'lishi uchun
+    uning o'rniga o'zgarmas snapshot beruvchi modul qo'yiladi. Outbox tezlik
+    limitlarisiz ishlaydi — faqat handler ishi o'lchanadi.
+    """
+    import sys
+    import types
+
+    for key, value in (("BOT_TOKEN", "bench"), ("SHEET_ID", "bench"), ("WORKSHEET_TITLE", "bench"),
+                       ("REQUIRED_STATUS", ACTIVE_STATUS)):
+        os.environ.setdefault(key, value)
+
+    from collections import namedtuple
+    from outbox import Outbox
+
+    snap = namedtuple("Snapshot", ["version", "rows", "fetched_at"])(1, store, time.monotonic())
+
+    async def aload_snapshot():
+        return snap
+
+    async def arefresh_snapshot():
+        return snap, {}
+
+    sheets = types.ModuleType("sheets")
+    sheets.aload_snapshot = aload_snapshot
+    sheets.arefresh_snapshot = arefresh_snapshot
+    sheets.load_snapshot = lambda: snap
+    sheets.load_rows = lambda: store
+    sys.modules["sheets"] = sheets
+
+    import handlers
+    handlers.OUTBOX = Outbox(global_rate=1e9, chat_interval=0.0, group_interval=0.0)
+    return handlers
+
+
+def bench_queries(store, k: int, seed: int = 3):
+    """Handler benchmarki uchun aralash so'rovlar: familiya, ism qismi, HEMIS ID, JSHSHIR."""
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(k):
+        rec = store[rnd.randrange(len(store))]
+        kind = rnd.randrange(4)
+        if kind == 0:
+            out.append(rec.fio.split()[0].title())
+        elif kind == 1:
+            out.append(rec.fio.split()[1][:4].lower())
+        elif kind == 2:
+            out.append(rec.hemis)
+        else:
+            out.append(rec.jshshir)
+    return out
+
+
+def traced(build):
+    """build() natijasi egallagan xotira (tracemalloc, bayt) va natijaning o'zi."""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, obj
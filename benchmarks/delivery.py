@@ -0,0 +1,106 @@
+"""Yetkazish: chiquvchi Outbox navbati va webhook endpoint'iga yuklama."""
+import json
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import FakeBot, FloodError, percentile
+
+
+def bench_outbox(chats: int, messages: int):
+    """To'g'ridan-to'g'ri yuborish va Outbox navbati: 429 soni, yuborilganlar va vaqt."""
+    import asyncio
+    import logging
+    from outbox import Outbox
+
+    logging.getLogger("outbox").setLevel(logging.ERROR)
+
+    async def burst(send, bot, rapid=False):
+        async def one_chat(chat_id):
+            msg_id = None
+            for k in range(messages):
+                try:
+                    # send_page kabi: eski sahifani o'chirib yangisini yuborish
+                    msg = await send(bot, chat_id, msg_id, f"sahifa {k}")
+                    msg_id = msg.message_id
+                except FloodError:
+                    pass
+
+        async def one_chat_rapid(chat_id):
+            # foydalanuvchi tugmani javobni kutmasdan ketma-ket bosadi
+            await asyncio.gather(*(send(bot, chat_id, 1, f"sahifa {k}") for k in range(messages)),
+                                 return_exceptions=True)
+
+        fn = one_chat_rapid if rapid else one_chat
+        await asyncio.gather(*(fn(1000 + c) for c in range(chats)))
+
+    async def direct(bot, chat_id, old_id, text):
+        if old_id:
+            await bot.delete_message(chat_id=chat_id, message_id=old_id)
+        return await bot.send_message(chat_id=chat_id, text=text)
+
+    async def run(name, make_send, rapid=False):
+        bot = FakeBot()
+        t0 = time.perf_counter()
+        send, stats = make_send()
+        await burst(send, bot, rapid)
+        elapsed = time.perf_counter() - t0
+        sent = sum(1 for _, m, _ in bot.calls if m == "send_message")
+        print(f"{name:>8}: {elapsed:6.2f} s | yuborildi {sent:5d} | 429: {bot.floods:5d} | {stats()}")
+
+    async def main():
+        await run("direct", lambda: (direct, dict))
+        outbox = Outbox(global_rate=25.0, chat_interval=1.0)
+        await run("outbox", lambda: (outbox.replace_message, outbox.stats))
+        print("tez bosish (javobni kutmasdan):")
+        await run("direct", lambda: (direct, dict), rapid=True)
+        outbox = Outbox(global_rate=25.0, chat_interval=1.0)
+        await run("outbox", lambda: (outbox.replace_message, outbox.stats), rapid=True)
+
+    print(f"{chats} chat x {messages} sahifa (o'chirish+yuborish)")
+    asyncio.run(main())
+
+
+def make_update(update_id: int, chat_id: int, text: str) -> dict:
+    """Sintetik Telegram ``Update`` JSON (oddiy matnli xabar)."""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private", "first_name": "Bench"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Bench"},
+            "text": text,
+        },
+    }
+
+
+def bench_webhook(url: str, total: int, concurrency: int, chats: int, texts):
+    """Webhook endpoint'iga parallel POST yuborib throughput va kechikishni o'lchaydi."""
+    def post(i: int):
+        body = json.dumps(make_update(10_000_000 + i, 1_000_000 + i % chats, texts[i % len(texts)])).encode()
+        req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                code = resp.status
+        except urllib.error.HTTPError as e:
+            code = e.code
+        except Exception:
+            code = 0
+        return code, time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(post, range(total)))
+    elapsed = time.perf_counter() - t0
+
+    latencies = [lat for _, lat in results]
+    codes = {}
+    for code, _ in results:
+        codes[code] = codes.get(code, 0) + 1
+    print(f"{total} so'rov, {concurrency} parallel, {elapsed:.2f} s")
+    print(f"throughput: {total / elapsed:.1f} req/s")
+    print(f"p50: {percentile(latencies, 50) * 1000:.1f} ms | p99: {percentile(latencies, 99) * 1000:.1f} ms")
+    print(f"status kodlar: {codes}")
@@ -0,0 +1,102 @@
+"""Qidiruv: indeks va chiziqli skan, fuzzy/transliteratsiya, fayl orqali ommaviy qidiruv."""
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from statistics import median
+
+from benchmarks.common import make_store, percentile, timeit
+
+
+def bench_search(sizes, repeat: int = 20):
+    from index import SearchIndex, scan_rows
+
+    for n in sizes:
+        store = make_store(n)
+        t0 = time.perf_counter()
+        idx = SearchIndex(store, version=1)
+        build = time.perf_counter() - t0
+        queries = [
+            store[n // 2].jshshir,                     # to'liq JSHSHIR
+            store[n // 3].hemis[-5:],                  # ID qismi
+            store[n // 4].fio.split()[0].lower(),      # familiya
+            "karimov aziz",                            # ism qismi
+            "zz",                                      # qisqa so'rov
+            "yo'q odam",                               # topilmaydi
+        ]
+        print(f"\n== {n} qator | indeks qurish: {build * 1000:.1f} ms ==")
+        for q in queries:
+            expected = scan_rows(store, q)
+            got = idx.search(q)
+            assert got == expected, f"natija farq qildi: {q!r}"
+            scan_t = median(timeit(lambda: scan_rows(store, q), max(1, repeat // 5)))
+            idx_t = median(timeit(lambda: idx.search(q), repeat))
+            print(f"{q!r:>28}: {len(got):6d} ta | scan {scan_t * 1000:8.2f} ms | "
+                  f"index {idx_t * 1000:7.3f} ms | x{scan_t / idx_t if idx_t else 0:.0f}")
+
+
+# Kirill, apostrof turlari va xatoli so'rovlar (natijalar to'g'riligi — tests/test_fuzzy.py)
+FUZZY_QUERIES = ["КАРИМОВ АЗИЗ", "Жўраева Малика", "joʻrayeva malika", "jorayeva", "g'ayrat o‘g‘li",
+                 "toshmatov jasr", "rahimova dilnoza", "Qodirva Kamola"]
+
+
+def bench_fuzzy(n: int, changed: int = 1000, repeat: int = 5):
+    """Transliteratsiya/fuzzy qidiruv: indeks qurish, inkremental yangilash va kechikish."""
+    from fuzzy import FuzzyIndex
+    from config import FUZZY_BUDGET
+    from records import StudentStore, changed_positions
+
+    store = make_store(n)
+    t0 = time.perf_counter()
+    idx = FuzzyIndex(store, version=1)
+    build = time.perf_counter() - t0
+
+    fresh = make_store(n, seed=2)
+    records = list(store.records)
+    for i in range(0, n, max(1, n // changed)):
+        records[i] = fresh.records[i]
+    new = StudentStore(records, store.required_status)
+    positions = changed_positions(store, new)
+    incr = median(timeit(lambda: idx.updated(store, new, positions, 2), 3))
+    print(f"{n} qator | fuzzy indeks qurish: {build * 1000:.1f} ms | inkremental ({len(positions)} ta)"
+          f" {incr * 1000:.1f} ms | byudjet {FUZZY_BUDGET * 1000:.0f} ms")
+    for q in FUZZY_QUERIES:
+        rows = idx.find(q)
+        lat = timeit(lambda: idx.find(q), repeat)
+        print(f"{q!r:>24}: {len(rows):6d} ta | p50 {percentile(lat, 50) * 1000:6.2f} ms"
+              f" | max {max(lat) * 1000:6.2f} ms | {store[rows[0]].fio if rows else '-'}")
+
+
+def bench_bulk(n: int, keys: int, missing: float = 0.1):
+    """Ommaviy qidiruv: ``keys`` ta JSHSHIR/HEMIS ID fayli, vaqt va eng yuqori xotira."""
+    from collections import namedtuple
+    from bulk import run_bulk
+    from index import SearchIndex
+
+    store = make_store(n)
+    idx = SearchIndex(store, version=1)
+    rnd = random.Random(7)
+    snap = namedtuple("Snap", "version rows")(1, store)
+    with tempfile.TemporaryDirectory() as d:
+        src = os.path.join(d, "keys.csv")
+        with open(src, "w", encoding="utf-8") as f:
+            f.write("jshshir\n")
+            for _ in range(keys):
+                if rnd.random() < missing:
+                    f.write(f"{rnd.getrandbits(44)}\n")
+                else:
+                    rec = store[rnd.randrange(n)]
+                    f.write(f"{rec.jshshir if rnd.random() < 0.5 else rec.hemis}\n")
+        dst = os.path.join(d, "out.csv")
+        gc.collect()
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        counts = run_bulk(snap, idx, src, "csv", dst, "csv")
+        elapsed = time.perf_counter() - t0
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        size = os.path.getsize(dst)
+    print(f"{n} qator, {keys} kalit: {elapsed * 1000:.0f} ms | eng yuqori xotira {peak / 1024:.0f} KiB"
+          f" | natija {size / 1024:.0f} KiB | {counts}")
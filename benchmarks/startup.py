@@ -0,0 +1,190 @@
+"""Ishga tushish: sovuq start, bir nechta varaq, xotira hajmi va sessiya backend'lari."""
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from columns import IDX_HEMIS
+from benchmarks.common import (
+    ACTIVE_STATUS, FakeWorksheet, bench_queries, make_rows, percentile, timeit, traced,
+)
+
+
+def bench_startup(n: int, delay: float):
+    """Sovuq start: handlers importi, disk snapshot'ini yozish/o'qish va birinchi javobgacha vaqt."""
+    import subprocess
+    import sys
+    from snapfile import load_store, save_store
+    from records import StudentStore
+
+    env = dict(os.environ)
+    for key, value in (("BOT_TOKEN", "bench"), ("SHEET_ID", "bench"), ("WORKSHEET_TITLE", "bench"),
+                       ("REQUIRED_STATUS", ACTIVE_STATUS)):
+        env.setdefault(key, value)
+    code = "import time; t = time.perf_counter(); import handlers; print(time.perf_counter() - t)"
+    try:
+        out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True,
+                             timeout=120, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        if out.returncode == 0:
+            print(f"import handlers: {float(out.stdout.strip().splitlines()[-1]) * 1000:.0f} ms (tarmoqsiz)")
+        else:
+            print(f"import handlers: xato — {out.stderr.strip().splitlines()[-1] if out.stderr else out.returncode}")
+    except subprocess.TimeoutExpired:
+        print("import handlers: 120 s dan oshdi")
+
+    rows = make_rows(n)
+    ws = FakeWorksheet(rows, delay=delay)
+    t0 = time.perf_counter()
+    store = StudentStore.from_rows(ws.get_all_values(), ACTIVE_STATUS)
+    live = time.perf_counter() - t0
+    print(f"{n} qator | jadvaldan (soxta, {delay:.1f} s kechikish) olish+parse: {live * 1000:.0f} ms")
+
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "snapshot.bin")
+        t0 = time.perf_counter()
+        save_store(store, path)
+        saved = time.perf_counter() - t0
+        size = os.path.getsize(path)
+        times = timeit(lambda: load_store(path, ACTIVE_STATUS), 5)
+        loaded = load_store(path, ACTIVE_STATUS)
+    ok = loaded == store
+    print(f"disk snapshot: yozish {saved * 1000:.0f} ms | o'qish p50 {percentile(times, 50) * 1000:.0f} ms"
+          f" | fayl {size / 1024:.0f} KiB | {'mos' if ok else 'MOS EMAS'}")
+    if not ok:
+        raise SystemExit("Disk snapshot'i asl nusxaga mos emas")
+
+
+def bench_sheets(sheets: int, n: int, delay: float, slow: float, timeout: float, repeat: int = 20):
+    """Bir nechta varaq: parallel yuklash, sekin varaq, umumiy qidiruv va interning."""
+    import asyncio
+
+    for key, value in (("BOT_TOKEN", "bench"), ("SHEET_ID", "bench"), ("WORKSHEET_TITLE", "bench"),
+                       ("REQUIRED_STATUS", ACTIVE_STATUS)):
+        os.environ.setdefault(key, value)
+    from aggregates import Aggregates, aggregates_for
+    from index import SearchIndex, index_for
+    from records import StudentStore
+    from sheets import SheetGroup, SheetSnapshot
+
+    tables = []
+    for k in range(sheets):
+        rows = make_rows(n, seed=k + 1)
+        for i, r in enumerate(rows[1:]):
+            r[IDX_HEMIS] = str(3000000000 + k * n + i)  # varaqlar orasida takrorlanmasin
+        tables.append(rows)
+    names = [f"Fakultet {k + 1}" for k in range(sheets)]
+    parse = partial(StudentStore.from_rows, required_status=ACTIVE_STATUS)
+
+    t0 = time.perf_counter()
+    for rows in tables:
+        parse(FakeWorksheet(rows, delay=delay).get_all_values())
+    sequential = time.perf_counter() - t0
+    print(f"{sheets} varaq x {n} qator | ketma-ket olish+parse: {sequential * 1000:.0f} ms")
+
+    def make_group(delays, executor):
+        return SheetGroup({
+            name: SheetSnapshot(FakeWorksheet(rows, delay=d).get_all_values, parse=parse, executor=executor,
+                                timeout=timeout)
+            for name, rows, d in zip(names, tables, delays)
+        }, timeout=timeout, required_status=ACTIVE_STATUS)
+
+    with ThreadPoolExecutor(max_workers=sheets) as pool:
+        t0 = time.perf_counter()
+        asyncio.run(make_group([delay] * sheets, pool).aget())
+        print(f"parallel olish+parse: {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    # oxirgi varaq sekin — u boshqalarni ``timeout`` dan ortiq kutdirmasligi kerak
+    executor = ThreadPoolExecutor(max_workers=sheets)
+    group = make_group([delay] * (sheets - 1) + [slow], executor)
+    t0 = time.perf_counter()
+    first = asyncio.run(group.aget())
+    first_t = time.perf_counter() - t0
+    print(f"bittasi sekin ({slow:.1f} s, timeout {timeout:.1f} s): birinchi javob {first_t * 1000:.0f} ms,"
+          f" {len(first.rows.parts)}/{sheets} varaq")
+    executor.shutdown(wait=True)
+    snap = group.get()
+    print(f"sekin varaq fonda yuklandi: {len(snap.rows.parts)}/{sheets} varaq, versiya {first.version} -> {snap.version}")
+
+    t0 = time.perf_counter()
+    combined = index_for(snap)
+    build = time.perf_counter() - t0
+    flat = parse([tables[0][0]] + [r for rows in tables for r in rows[1:]])  # etalon: bitta katta varaq
+    t0 = time.perf_counter()
+    single = SearchIndex(flat, version=1)
+    single_build = time.perf_counter() - t0
+    print(f"indekslar: {sheets} ta alohida {build * 1000:.0f} ms | bitta umumiy {single_build * 1000:.0f} ms")
+
+    queries = bench_queries(flat, 30)
+    comb_t, single_t = [], []
+    for q in queries:
+        got = combined.search(q)
+        ids = [(snap.rows[i].hemis, snap.rows[i].jshshir) for i in got]
+        assert ids == [(flat[i].hemis, flat[i].jshshir) for i in single.search(q)], f"natija farq qildi: {q!r}"
+        comb_t.extend(timeit(lambda: combined.search(q), repeat))
+        single_t.extend(timeit(lambda: single.search(q), repeat))
+    print(f"umumiy qidiruv p50 {percentile(comb_t, 50) * 1000:.3f} ms (bitta indeks:"
+          f" {percentile(single_t, 50) * 1000:.3f} ms) | {len(queries)} so'rov, natijalar mos")
+
+    t0 = time.perf_counter()
+    agg = aggregates_for(snap)
+    agg_t = time.perf_counter() - t0
+    ok = (agg.total, agg.active) == (len(flat), sum(1 for r in flat if r.active))
+    ok = ok and agg.per_dir == Aggregates.from_store(flat).per_dir
+    print(f"/stat agregatlari (varaqlar bo'yicha + umumiy): {agg_t * 1000:.0f} ms | {'mos' if ok else 'MOS EMAS'}")
+
+    fields = ("status", "guruh", "yunalish", "lavozim")
+    refs = len(flat) * len(fields)
+    objects = len({id(getattr(rec, f)) for rec in snap.rows for f in fields})
+    print(f"takrorlanuvchi maydonlar ({', '.join(fields)}): {refs} havola -> {objects} ta satr obyekti (intern)")
+    if not ok:
+        raise SystemExit("Agregatlar mos emas")
+
+
+def bench_memory(n: int):
+    """list-of-lists va StudentStore xotira hajmini solishtiradi."""
+    from records import StudentStore
+
+    # gspread kabi har bir katak alohida satr obyekti bo'lishi uchun JSON orqali o'tkazamiz
+    payload = json.dumps(make_rows(n))
+    raw_size, rows = traced(lambda: json.loads(payload))
+
+    def build_store():
+        return StudentStore.from_rows(json.loads(payload), ACTIVE_STATUS)
+
+    store_size, store = traced(build_store)
+    print(f"{n} qator")
+    print(f"list-of-lists: {raw_size / 2**20:8.1f} MiB")
+    print(f"StudentStore : {store_size / 2**20:8.1f} MiB  (x{raw_size / store_size:.1f} kam)")
+    del rows, store
+
+
+def bench_sessions(chats: int, callbacks: int, results: int):
+    """Har bir sessiya backend'i uchun bitta pg|N callback (get + save) kechikishi."""
+    from sessions import Session, SessionStore, SQLiteSessionStore
+
+    tmpdir = tempfile.mkdtemp()
+    backends = {
+        "memory": SessionStore(max_entries=chats * 2, max_bytes=2**40),
+        "sqlite": SQLiteSessionStore(os.path.join(tmpdir, "sessions.sqlite3"), max_entries=chats * 2, max_bytes=2**40),
+    }
+    rnd = random.Random(1)
+    for name, store in backends.items():
+        put_t = []
+        for c in range(chats):
+            sess = Session("karimov", "bench", range(results), results // 2)
+            t0 = time.perf_counter()
+            store.put(c, sess)
+            put_t.append(time.perf_counter() - t0)
+        cb_t = []
+        for _ in range(callbacks):
+            c = rnd.randrange(chats)
+            t0 = time.perf_counter()
+            sess = store.get(c)
+            sess.page += 1
+            store.save(c, sess)
+            cb_t.append(time.perf_counter() - t0)
+        print(f"{name:>7}: put p50 {percentile(put_t, 50) * 1e6:8.1f} us | "
+              f"callback p50 {percentile(cb_t, 50) * 1e6:8.1f} us, p99 {percentile(cb_t, 99) * 1e6:8.1f} us")
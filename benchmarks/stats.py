@@ -0,0 +1,146 @@
+"""/stat agregatlari, ustunli kesishma jadvallari va agregatlar tarixi."""
+import os
+import random
+import tempfile
+import time
+from statistics import median
+
+from benchmarks.common import ACTIVE_STATUS, DIRECTIONS, make_store, percentile, timeit
+
+
+def bench_stat(sizes, repeat: int = 50, changed: int = 100):
+    """/stat: noldan hisoblash, keshlangan chaqiruv va inkremental yangilash narxi."""
+    from aggregates import Aggregates, update_aggregates
+    from formatters import format_stat
+    from records import StudentStore
+
+    for n in sizes:
+        store = make_store(n)
+        full = median(timeit(lambda: format_stat(Aggregates.from_store(store)), 3))
+        agg = Aggregates.from_store(store, 1)
+        memo = {1: format_stat(agg)}
+        cached = median(timeit(lambda: memo.get(1) or format_stat(agg), repeat))
+        render = median(timeit(lambda: format_stat(agg), repeat))
+
+        # ``changed`` ta yozuv almashtirilgan yangi snapshot (qolganlari o'sha obyektlar)
+        fresh = make_store(n, seed=2)
+        records = list(store.records)
+        for i in range(0, n, max(1, n // changed)):
+            records[i] = fresh.records[i]
+        new = StudentStore(records, store.required_status)
+        incr = median(timeit(lambda: update_aggregates(agg, store, new, 2), 3))
+        print(f"{n:>8} qator | noldan {full * 1000:8.2f} ms | inkremental ({changed} ta) {incr * 1000:7.2f} ms"
+              f" | render {render * 1000:6.3f} ms | memo {cached * 1e6:6.2f} us")
+
+
+def _python_crosstabs(store):
+    """Taqqoslash uchun: har bir ko'rinish yozuvlar ustida alohida Python sikli bilan."""
+    views = {}
+    for name, key in (("dir", lambda r: r.yunalish), ("group", lambda r: r.guruh),
+                      ("dir×group", lambda r: (r.yunalish, r.guruh)), ("dir×status", lambda r: (r.yunalish, r.status))):
+        table = {}
+        for rec in store:
+            t = table.get(key(rec))
+            if t is None:
+                t = table[key(rec)] = [0, 0]
+            t[0] += 1
+            t[1] += rec.active
+        views[name] = table
+    return views
+
+
+def bench_crosstab(sizes, changed: int = 100):
+    """Ustunli statistika (StatCube): bir o'tishda barcha ko'rinishlar va Python sikllari bilan solishtirish."""
+    from aggregates import Aggregates, StatCube, update_aggregates
+    from records import StudentStore
+
+    statuses = {ACTIVE_STATUS: 0.45, "Ishsiz": 0.45, "Akademik ta'til": 0.05, "Chetlashtirilgan": 0.05}
+    for n in sizes:
+        store = make_store(n, statuses=statuses)
+        py_t = median(timeit(lambda: _python_crosstabs(store), 1))
+        expected = _python_crosstabs(store)
+
+        def cube_views():
+            cube = StatCube.from_records(store, ACTIVE_STATUS)
+            return cube, {"dir": cube.table("dir"), "group": cube.table("group"),
+                          "dir×group": cube.crosstab("dir", "group"), "dir×status": cube.crosstab("dir", "status")}
+
+        build_t = median(timeit(lambda: StatCube.from_records(store, ACTIVE_STATUS), 3))
+        cube_t = median(timeit(cube_views, 3))
+        cube, views = cube_views()
+        flat = {k: {(r, c): v for r, cols in views[k].items() for c, v in cols.items()} for k in ("dir×group", "dir×status")}
+        ok = views["dir"] == expected["dir"] and views["group"] == expected["group"] and all(
+            flat[k] == expected[k] for k in flat)
+        views_t = median(timeit(lambda: (cube.crosstab("dir", "group"), cube.crosstab("dir", "status")), 20))
+
+        fresh = make_store(n, seed=2, statuses=statuses)
+        records = list(store.records)
+        for i in range(0, n, max(1, n // changed)):
+            records[i] = fresh.records[i]
+        new = StudentStore(records, store.required_status)
+        agg = Aggregates.from_store(store, 1)
+        incr_t = median(timeit(lambda: update_aggregates(agg, store, new, 2), 3))
+        print(f"{n:>8} qator, {len(cube.cells)} katak | Python sikllari {py_t * 1000:8.1f} ms"
+              f" | StatCube: sanash {build_t * 1000:7.1f} ms, barcha ko'rinishlar {cube_t * 1000:7.1f} ms"
+              f" (keshdan kesishmalar {views_t * 1000:.2f} ms) | inkremental ({changed} ta) {incr_t * 1000:.2f} ms"
+              f" | {'mos' if ok else 'MOS EMAS'}")
+        if not ok:
+            raise SystemExit("StatCube natijasi Python hisobiga mos emas")
+
+
+def bench_history(days: int, sheets: int, groups: int, change: float = 0.1, repeat: int = 20):
+    """Agregatlar tarixi: kunlik yozish, /trend so'rovi va fayl hajmi."""
+    for key, value in (("BOT_TOKEN", "bench"), ("SHEET_ID", "bench"), ("HISTORY_DB_PATH", "")):
+        os.environ.setdefault(key, value)
+    from aggregates import Aggregates
+    from history import DIRECTION, GROUP, TOTAL, HistoryStore
+
+    rnd = random.Random(7)
+    names = [f"Fakultet {i + 1}" for i in range(sheets)]
+    state = {
+        name: {(kind, key): [rnd.randint(50, 500), 0]
+               for kind, keys in ((DIRECTION, DIRECTIONS), (GROUP, [f"G-{g}" for g in range(groups)]))
+               for key in keys}
+        for name in names
+    }
+
+    def aggregates(values) -> Aggregates:
+        agg = Aggregates()
+        for (kind, key), (tot, act) in values.items():
+            (agg.per_dir if kind == DIRECTION else agg.per_group)[key] = [tot, act]
+        agg.total = sum(tot for (kind, _), (tot, _) in values.items() if kind == DIRECTION)
+        agg.active = sum(act for (kind, _), (_, act) in values.items() if kind == DIRECTION)
+        return agg
+
+    start = 740_000
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "history.sqlite3")
+        store = HistoryStore(path)
+        times = []
+        for day in range(start, start + days):
+            for name in names:
+                values = state[name]
+                # har kuni kalitlarning ``change`` ulushi o'zgaradi (bir kunda bir necha sinxronlash)
+                for key in rnd.sample(list(values), max(1, int(len(values) * change))):
+                    tot = values[key][0]
+                    values[key][1] = min(tot, max(0, values[key][1] + rnd.randint(-3, 8)))
+                agg = aggregates(values)
+                for _ in range(3):
+                    t0 = time.perf_counter()
+                    store.record(agg, name, day)
+                    times.append(time.perf_counter() - t0)
+        last = start + days - 1
+        weekly = [last - 7 * k for k in range(51, -1, -1)]
+        daily = list(range(max(start, last - 364), last + 1))
+        print(f"{days} kun x {sheets} varaq x {len(DIRECTIONS) + groups} kalit | {store.stats()}")
+        print(f"record: p50 {percentile(times, 50) * 1000:.2f} ms | p99 {percentile(times, 99) * 1000:.2f} ms")
+        for label, sample in (("52 hafta", weekly), ("365 kun", daily)):
+            for sheet in (None, names[0]):
+                for kind in (TOTAL, DIRECTION):
+                    t = timeit(lambda: store.series(kind, sample, sheet), repeat)
+                    print(f"series {label:8} {kind:5} {'umumiy' if sheet is None else 'varaq':6}:"
+                          f" p50 {percentile(t, 50) * 1000:.2f} ms")
+        store.close()
+        size = sum(os.path.getsize(os.path.join(d, f)) for f in os.listdir(d))
+        full = days * sheets * (len(DIRECTIONS) + groups + 1)
+        print(f"fayl: {size / 1024:.0f} KiB (har kuni to'liq yozilganda {full} nuqta bo'lardi)")
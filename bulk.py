@@ -0,0 +1,158 @@
+import os
+import csv
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+from config import BULK_MAX_KEYS, BULK_NAME_LIMIT, BULK_WORKERS
+from index import SearchIndex
+from records import Student
+
+logger = logging.getLogger(__name__)
+
+# Ommaviy qidiruv ishlari event loop'dan tashqarida, cheklangan pool'da bajariladi
+BULK_EXECUTOR = ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix="bulk")
+
+EXTENSIONS = ("csv", "txt", "xlsx")
+
+NOT_FOUND = "Topilmadi"
+FOUND = "Topildi"
+TOO_MANY = "Ko'p moslik"
+
+HEADER = [
+    "Kalit", "Natija", "FIO", "HEMIS UID", "HEMIS ID", "JSHSHIR", "Guruh",
+    "Yo'nalish", "Status", "Faol", "Lavozim", "Tashkilot", "Sanasi",
+]
+
+# Birinchi qatorda shu so'zlar bo'lsa u sarlavha deb tashlab yuboriladi
+_HEADER_WORDS = {"jshshir", "jshir", "pinfl", "hemis", "hemis id", "hemis uid", "id", "fio", "ism", "kalit"}
+
+
+def _openpyxl():
+    """openpyxl faqat XLSX fayllar uchun kerak — shu paytda import qilinadi."""
+    import openpyxl
+    return openpyxl
+
+
+def _first_cells(rows) -> Iterator[str]:
+    for i, row in enumerate(rows):
+        if not row:
+            continue
+        v = row[0]
+        if isinstance(v, float) and v.is_integer():
+            v = int(v)  # XLSX'dagi raqamli JSHSHIR/HEMIS ID
+        key = "" if v is None else str(v).strip()
+        if not key:
+            continue
+        if i == 0 and key.lower() in _HEADER_WORDS:
+            continue
+        yield key
+
+
+def read_keys(path: str, kind: str) -> Iterator[str]:
+    """Fayldan kalitlarni (birinchi ustun / har bir qator) oqim bilan o'qiydi."""
+    if kind == "xlsx":
+        wb = _openpyxl().load_workbook(path, read_only=True, data_only=True)
+        try:
+            yield from _first_cells(wb.worksheets[0].iter_rows(values_only=True))
+        finally:
+            wb.close()
+        return
+    with open(path, "r", encoding="utf-8-sig", errors="replace", newline="") as f:
+        if kind == "csv":
+            sample = f.read(4096)
+            f.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            yield from _first_cells(csv.reader(f, dialect))
+        else:
+            yield from _first_cells([line] for line in f)
+
+
+class BulkWriter:
+    """Natija faylini qatorma-qator yozadi (CSV yoki write-only XLSX)."""
+
+    def __init__(self, path: str, kind: str):
+        self.path = path
+        self.kind = kind
+        if kind == "xlsx":
+            self._wb = _openpyxl().Workbook(write_only=True)
+            self._f = None
+            self._write = self._wb.create_sheet("Natijalar").append
+        else:
+            self._wb = None
+            self._f = open(path, "w", encoding="utf-8-sig", newline="")
+            self._write = csv.writer(self._f).writerow
+        self._write(HEADER)
+
+    def write(self, row: list):
+        self._write(row)
+
+    def close(self):
+        if self._wb is not None:
+            self._wb.save(self.path)
+        else:
+            self._f.close()
+
+
+def _student_row(key: str, result: str, rec: Student) -> list:
+    return [
+        key, result, rec.fio, rec.hemisuid, rec.hemis, rec.jshshir, rec.guruh,
+        rec.yunalish, rec.status, "ha" if rec.active else "yo'q", rec.lavozim, rec.tashkilot, rec.sanasi,
+    ]
+
+
+def resolve_key(index: SearchIndex, key: str):
+    """Kalit uchun (natija, row'lar): avval aniq ID, keyin FIO bo'yicha qidiruv."""
+    rows = index.lookup(key)
+    if rows:
+        return FOUND, rows
+    if key.isdigit():
+        return NOT_FOUND, []
+    rows = index.search(key)
+    if len(rows) > BULK_NAME_LIMIT:
+        return TOO_MANY, rows[:BULK_NAME_LIMIT]
+    return (FOUND if rows else NOT_FOUND), rows
+
+
+def run_bulk(snap, index: SearchIndex, src: str, src_kind: str, dst: str, dst_kind: str,
+             progress=None, progress_every: float = 2.0) -> dict:
+    """Kalitlarni bitta snapshot bo'yicha hal qilib natija fayliga yozadi.
+
+    Kirish fayli ham, natija ham oqim bilan qayta ishlanadi — xotira kalitlar
+    soniga bog'liq emas. ``progress(n)`` har ``progress_every`` soniyada chaqiriladi.
+    """
+    store = snap.rows
+    counts = {"keys": 0, "found": 0, "not_found": 0, "rows": 0, "truncated": False}
+    writer = BulkWriter(dst, dst_kind)
+    last = time.monotonic()
+    try:
+        for key in read_keys(src, src_kind):
+            if counts["keys"] >= BULK_MAX_KEYS:
+                counts["truncated"] = True
+                break
+            counts["keys"] += 1
+            result, rows = resolve_key(index, key)
+            if not rows:
+                counts["not_found"] += 1
+                writer.write([key, NOT_FOUND] + [""] * (len(HEADER) - 2))
+            else:
+                counts["found"] += 1
+                for i in rows:
+                    writer.write(_student_row(key, result, store[i]))
+                    counts["rows"] += 1
+            if progress is not None and time.monotonic() - last >= progress_every:
+                last = time.monotonic()
+                progress(counts["keys"])
+    finally:
+        writer.close()
+    logger.info(f"Bulk lookup: {counts}")
+    return counts
+
+
+def file_kind(filename: str) -> str:
+    ext = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    return ext if ext in EXTENSIONS else ""
@@ -0,0 +1,151 @@
+import io
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from config import CHART_WORKERS
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+_MPL = None
+
+
+def _matplotlib():
+    """matplotlib'ni bir marta (birinchi grafikda) import qiladi."""
+    global _MPL
+    if _MPL is None:
+        import matplotlib
+        matplotlib.use('Agg')  # Headless mode
+        # Oddiy font sozlamalari
+        matplotlib.rcParams['font.family'] = 'DejaVu Sans'
+        matplotlib.rcParams['axes.unicode_minus'] = False
+        from matplotlib.figure import Figure
+        from matplotlib import cm
+        _MPL = (Figure, cm)
+    return _MPL
+
+
+def render_direction_chart(labels: List[str], data: List[int]) -> bytes:
+    """Yo'nalishlar bo'yicha gorizontal bar grafik, PNG baytlari.
+
+    pyplot global holatisiz (Figure obyekti orqali) chiziladi, shuning uchun
+    bir nechta oqimda parallel ishlatish mumkin.
+    """
+    Figure, cm = _matplotlib()
+
+    # Grafik o'lchamlari
+    fig_width = max(10, min(16, len(labels) * 0.8))
+    fig_height = max(6, len(labels) * 0.4)
+
+    fig = Figure(figsize=(fig_width, fig_height), dpi=100)
+    ax = fig.subplots()
+
+    # Horizontal bar chart
+    colors = cm.Set3(range(len(labels)))
+    bars = ax.barh(range(len(labels)), data, color=colors, alpha=0.8, edgecolor='black', linewidth=0.5)
+
+    # Labels va formatting
+    ax.set_yticks(range(len(labels)))
+    ax.set_yticklabels(labels, fontsize=10)
+    ax.set_xlabel("Talabalar soni", fontsize=11, fontweight='bold')
+    ax.set_title("📊 Yo'nalishlar bo'yicha taqsimot", fontsize=13, fontweight='bold', pad=15)
+    ax.grid(axis="x", linestyle="--", alpha=0.5)
+
+    # Values on bars
+    max_val = max(data) if data else 1
+    for bar, val in zip(bars, data):
+        ax.text(bar.get_width() + max_val * 0.01,
+                bar.get_y() + bar.get_height()/2,
+                str(val), ha="left", va="center", fontsize=9, fontweight="bold")
+
+    fig.tight_layout()
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", facecolor='white', dpi=100)
+    return buf.getvalue()
+
+
+def render_trend_chart(labels: List[str], series: Dict[str, List[Optional[float]]], total: List[Optional[float]]) -> bytes:
+    """Faollik foizi dinamikasi: har bir yo'nalish — chiziq, umumiy — qalin chiziq. PNG baytlari."""
+    Figure, cm = _matplotlib()
+
+    fig = Figure(figsize=(max(10, min(16, len(labels) * 0.9)), 7), dpi=100)
+    ax = fig.subplots()
+    x = list(range(len(labels)))
+    colors = cm.tab20(range(len(series)))
+    for (name, values), color in zip(sorted(series.items()), colors):
+        pts = [(i, v) for i, v in zip(x, values) if v is not None]
+        if pts:
+            ax.plot([p[0] for p in pts], [p[1] for p in pts], marker="o", markersize=3,
+                    linewidth=1.2, color=color, label=name)
+    pts = [(i, v) for i, v in zip(x, total) if v is not None]
+    if pts:
+        ax.plot([p[0] for p in pts], [p[1] for p in pts], marker="o", linewidth=3, color="black", label="Umumiy")
+
+    ax.set_xticks(x)
+    ax.set_xticklabels(labels, fontsize=9, rotation=45, ha="right")
+    ax.set_ylabel("Faollar ulushi, %", fontsize=11, fontweight='bold')
+    ax.set_title("📈 Yo'nalishlar bo'yicha faollik dinamikasi", fontsize=13, fontweight='bold', pad=15)
+    ax.grid(linestyle="--", alpha=0.5)
+    ax.legend(fontsize=8, loc="center left", bbox_to_anchor=(1.01, 0.5))
+
+    fig.tight_layout()
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight", facecolor='white', dpi=100)
+    return buf.getvalue()
+
+
+class ChartCache:
+    """Grafiklar keshi: kalit — (snapshot versiyasi, grafik turi).
+
+    - chizish event loop'dan tashqarida, ``workers`` ta oqimli pool'da bajariladi;
+    - bir xil kalit uchun parallel so'rovlar bitta chizishni kutadi;
+    - birinchi yuklashdan keyin Telegram ``file_id`` saqlanadi va qayta
+      chizish/yuklash o'rniga shu id yuboriladi;
+    - yangi versiya paydo bo'lsa eski versiyalar tozalanadi.
+    """
+
+    def __init__(self, workers: int = CHART_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chart")
+        self._png = {}
+        self._file_ids = {}
+        self._pending = {}
+
+    def _prune(self, version: int):
+        for table in (self._png, self._file_ids):
+            for key in [k for k in table if k[0] < version]:
+                del table[key]
+
+    def file_id(self, key):
+        return self._file_ids.get(key)
+
+    def set_file_id(self, key, file_id: str):
+        if file_id:
+            self._file_ids[key] = file_id
+
+    def forget_file_id(self, key):
+        self._file_ids.pop(key, None)
+
+    async def png(self, key, render, *args) -> bytes:
+        """Kalit uchun PNG; yo'q bo'lsa ``render(*args)`` pool'da chiziladi."""
+        data = self._png.get(key)
+        if data is not None:
+            METRICS.inc("cache", cache="chart_png", result="hit")
+            return data
+        fut = self._pending.get(key)
+        if fut is None:
+            METRICS.inc("cache", cache="chart_png", result="miss")
+            loop = asyncio.get_running_loop()
+            fut = loop.run_in_executor(self._executor, METRICS.timed("chart_render")(render), *args)
+            self._pending[key] = fut
+            try:
+                data = await fut
+                self._prune(key[0])
+                self._png[key] = data
+                return data
+            finally:
+                self._pending.pop(key, None)
+        return await asyncio.shield(fut)
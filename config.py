@@ -4,5 +4,81 @@ env.read_env()
 
 TOKEN = env("BOT_TOKEN")
 SHEET_ID=env("SHEET_ID")
-WORKSHEET_TITLE=env("WORKSHEET_TITLE")
-REQUIRED_STATUS = env("REQUIRED_STATUS")
\ No newline at end of file
+WORKSHEET_TITLE=env("WORKSHEET_TITLE", "")
+# Bir nechta varaq: "Varaq 1,Varaq 2" yoki "<spreadsheet id>:Varaq" — berilmasa faqat WORKSHEET_TITLE
+WORKSHEETS = env.list("WORKSHEETS", [])
+REQUIRED_STATUS = env("REQUIRED_STATUS")
+
+# Jadval snapshot'i necha soniya "yangi" hisoblanadi
+SHEET_CACHE_TTL = env.float("SHEET_CACHE_TTL", 60.0)
+
+# Sahifalash sessiyalari: maksimal chatlar soni, TTL (soniya) va umumiy hajm (bayt)
+SESSION_MAX_ENTRIES = env.int("SESSION_MAX_ENTRIES", 5000)
+SESSION_TTL = env.float("SESSION_TTL", 1800.0)
+SESSION_MAX_BYTES = env.int("SESSION_MAX_BYTES", 32 * 1024 * 1024)
+# "memory" — bitta jarayon; "sqlite" — bir nechta worker bitta faylni bo'lishadi
+SESSION_BACKEND = env("SESSION_BACKEND", "memory")
+SESSION_DB_PATH = env("SESSION_DB_PATH", "sessions.sqlite3")
+
+# Grafiklarni parallel chizadigan oqimlar soni
+CHART_WORKERS = env.int("CHART_WORKERS", 2)
+
+# Google Sheets: so'rov timeout'i, qayta urinishlar, oqimlar va circuit breaker
+SHEET_TIMEOUT = env.float("SHEET_TIMEOUT", 20.0)
+SHEET_RETRIES = env.int("SHEET_RETRIES", 3)
+SHEET_BACKOFF = env.float("SHEET_BACKOFF", 0.5)
+SHEET_WORKERS = env.int("SHEET_WORKERS", 2)
+BREAKER_THRESHOLD = env.int("BREAKER_THRESHOLD", 5)
+BREAKER_RESET = env.float("BREAKER_RESET", 60.0)
+# "columns" — faqat kerakli ustunlar (batch_get) va inkremental parse; "full" — get_all_values()
+SHEET_SYNC = env("SHEET_SYNC", "columns")
+
+# Fuzzy qidiruv: minimal o'xshashlik, natijalar soni va vaqt byudjeti (soniya)
+FUZZY_THRESHOLD = env.float("FUZZY_THRESHOLD", 0.6)
+FUZZY_LIMIT = env.int("FUZZY_LIMIT", 100)
+FUZZY_BUDGET = env.float("FUZZY_BUDGET", 0.05)
+
+# Inline rejim: bitta javobdagi natijalar (<= 50), Telegram server keshi (soniya), kartalar keshi
+INLINE_PAGE_SIZE = env.int("INLINE_PAGE_SIZE", 20)
+INLINE_CACHE_TIME = env.int("INLINE_CACHE_TIME", 300)
+INLINE_CARD_CACHE = env.int("INLINE_CARD_CACHE", 20000)
+
+# Qidiruv natijalari keshi (so'rovlar soni)
+QUERY_CACHE_SIZE = env.int("QUERY_CACHE_SIZE", 5000)
+
+# Tayyor natija kartalari va sahifalari keshi (yozuvlar soni)
+RENDER_CARD_CACHE = env.int("RENDER_CARD_CACHE", 20000)
+RENDER_PAGE_CACHE = env.int("RENDER_PAGE_CACHE", 2000)
+
+# Ommaviy qidiruv (fayl yuborilganda): kalitlar chegarasi, ism bo'yicha moslik chegarasi, oqimlar
+BULK_MAX_KEYS = env.int("BULK_MAX_KEYS", 50000)
+BULK_NAME_LIMIT = env.int("BULK_NAME_LIMIT", 10)
+BULK_WORKERS = env.int("BULK_WORKERS", 1)
+
+# Chiquvchi xabarlar navbati: umumiy tezlik (xabar/soniya), chat/guruh uchun oraliq (soniya), 429 qayta urinishlar
+OUTBOX_GLOBAL_RATE = env.float("OUTBOX_GLOBAL_RATE", 25.0)
+OUTBOX_CHAT_INTERVAL = env.float("OUTBOX_CHAT_INTERVAL", 1.0)
+OUTBOX_GROUP_INTERVAL = env.float("OUTBOX_GROUP_INTERVAL", 3.0)
+OUTBOX_WORKERS = env.int("OUTBOX_WORKERS", 8)
+OUTBOX_RETRIES = env.int("OUTBOX_RETRIES", 3)
+
+# Oxirgi jadval nusxasi shu faylga yoziladi va ishga tushganda darhol yuklanadi ("" — o'chiq)
+SNAPSHOT_PATH = env("SNAPSHOT_PATH", "snapshot.bin")
+
+# Agregatlar tarixi (/trend): SQLite fayli ("" — o'chiq) va ko'rsatiladigan haftalar soni
+HISTORY_DB_PATH = env("HISTORY_DB_PATH", "history.sqlite3")
+TREND_WEEKS = env.int("TREND_WEEKS", 8)
+
+# /follow obunalari: SQLite fayli ("" — faqat xotirada), chat boshiga limit va yuborish oralig'i (soniya)
+FOLLOW_DB_PATH = env("FOLLOW_DB_PATH", "follows.sqlite3")
+FOLLOW_MAX_PER_CHAT = env.int("FOLLOW_MAX_PER_CHAT", 50)
+FOLLOW_PUSH_INTERVAL = env.float("FOLLOW_PUSH_INTERVAL", 30.0)
+
+# /report: hisobot quradigan oqimlar soni va navbatdagi ishlar chegarasi
+REPORT_WORKERS = env.int("REPORT_WORKERS", 1)
+REPORT_QUEUE_SIZE = env.int("REPORT_QUEUE_SIZE", 8)
+
+# Rejali yangilash: jadval har REFRESH_INTERVAL soniyada olinib, kesh'lar oldindan isitiladi (0 — o'chiq)
+REFRESH_INTERVAL = env.float("REFRESH_INTERVAL", 300.0)
+# /reload buyrug'ini ishlata oladigan Telegram foydalanuvchi ID'lari (vergul bilan)
+ADMIN_IDS = env.list("ADMIN_IDS", [], subcast=int)
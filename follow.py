@@ -0,0 +1,270 @@
+import os
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Set
+
+from config import FOLLOW_DB_PATH, FOLLOW_MAX_PER_CHAT, FOLLOW_PUSH_INTERVAL
+from records import Student, StudentStore, changed_positions
+
+logger = logging.getLogger(__name__)
+
+# Obuna turlari: bitta talaba (HEMIS UID / HEMIS ID / JSHSHIR) yoki guruh
+ID, GROUP = "id", "group"
+
+# Kuzatiladigan maydonlar (IDX_STAT, IDX_LAVOZIM, IDX_TASHKILOT, IDX_SANASI)
+WATCHED = ("status", "lavozim", "tashkilot", "sanasi")
+
+
+def watched(rec: Student) -> tuple:
+    return (rec.status, rec.lavozim, rec.tashkilot, rec.sanasi)
+
+
+def row_key(rec: Student) -> str:
+    """Yozuvning varaq ichidagi doimiy kaliti (qator o'rni siljishi mumkin)."""
+    return (rec.hemis or rec.jshshir or rec.hemisuid).lower()
+
+
+class Change:
+    """Kuzatilgan yozuvning bir o'zgarishi: ``old``/``new`` — ``WATCHED`` qiymatlari (yo'q bo'lsa None)."""
+
+    __slots__ = ("sheet", "key", "fio", "hemis", "guruh", "old", "new")
+
+    def __init__(self, sheet: str, key: str, rec: Student, old, new):
+        self.sheet = sheet
+        self.key = key
+        self.fio = rec.fio
+        self.hemis = rec.hemis
+        self.guruh = rec.guruh
+        self.old = old
+        self.new = new
+
+
+class FollowStore:
+    """/follow obunalari va snapshot'lar orasidagi o'zgarishlar.
+
+    Obunalar SQLite faylida saqlanadi (qayta ishga tushirishdan keyin ham
+    qoladi), xotirada esa kalit -> chatlar jadvallari ko'rinishida turadi.
+
+    ``observe`` har bir varaqning yangi store'ini oldingisi bilan faqat
+    qayta yaratilgan o'rinlar bo'yicha solishtiradi: ``ColumnSync`` ularni
+    qator xeshlari orqali topadi (``delta``), shuning uchun ish hajmi
+    o'zgargan qatorlar soniga teng.
+    Kuzatiladigan maydonlari (``WATCHED``) o'zgargan va obuna bo'lingan
+    yozuvlar chat bo'yicha navbatga qo'yiladi; ``drain`` ularni to'plab beradi
+    (bir yozuvning ketma-ket o'zgarishlari bittaga birlashtiriladi).
+
+    Bir nechta worker bitta faylni ishlatsa: boshqa worker yozgan obunalar
+    ``PRAGMA data_version`` o'zgarganda qayta o'qiladi, o'zgarishlarni esa
+    faqat ``leases`` jadvalidagi ijarani ushlab turgan bitta worker navbatga
+    qo'yadi va yuboradi (qolganlari faqat boshlang'ich nuqtani yangilaydi).
+    """
+
+    def __init__(self, path: str = FOLLOW_DB_PATH, max_per_chat: int = FOLLOW_MAX_PER_CHAT,
+                 lease_ttl: float = 3 * FOLLOW_PUSH_INTERVAL):
+        self.path = path or ":memory:"
+        self.max_per_chat = max_per_chat
+        self.lease_ttl = lease_ttl
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS follows ("
+            " chat_id INTEGER NOT NULL, kind TEXT NOT NULL, key TEXT NOT NULL, label TEXT NOT NULL,"
+            " created REAL NOT NULL, PRIMARY KEY (chat_id, kind, key)) WITHOUT ROWID"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._data_version = None
+        self._load()
+        self._last: Dict[str, StudentStore] = {}  # varaq -> oxirgi ko'rilgan store
+        self._pending: Dict[int, Dict[tuple, Change]] = {}  # chat_id -> (varaq, kalit) -> o'zgarish
+        self.observed = 0
+        self.compared = 0
+        self.changes = 0
+        self.pushed = 0
+        self.reloads = 0
+
+    def _load(self):
+        """Obunalarni SQLite'dan (qayta) o'qiydi; ``_lock`` ostida yoki konstruktorda."""
+        subs: Dict[str, Dict[str, Set[int]]] = {ID: {}, GROUP: {}}  # tur -> kalit -> chatlar
+        labels: Dict[tuple, str] = {}  # (chat_id, tur, kalit) -> nom
+        for chat_id, kind, key, label in self._conn.execute("SELECT chat_id, kind, key, label FROM follows"):
+            subs[kind].setdefault(key, set()).add(chat_id)
+            labels[(chat_id, kind, key)] = label
+        self._subs, self._labels = subs, labels
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _sync(self):
+        """Boshqa ulanish (worker) faylga yozgan bo'lsa obunalarni qayta o'qiydi (``_lock`` ostida)."""
+        if self._conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+            self._load()
+            self.reloads += 1
+
+    def _leading(self) -> bool:
+        """Yuboruvchi ijarasini oladi yoki uzaytiradi (``_lock`` ostida); boshqa worker ushlab tursa False."""
+        now = time.time()
+        cur = self._conn.execute(
+            "INSERT INTO leases (name, owner, expires) VALUES ('push', ?, ?)"
+            " ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires"
+            " WHERE leases.owner = excluded.owner OR leases.expires < ?",
+            (self.owner, now + self.lease_ttl, now),
+        )
+        return cur.rowcount == 1
+
+    # ---------------- obunalar ----------------
+    def follow(self, chat_id: int, kind: str, key: str, label: str) -> bool:
+        """Obuna qo'shadi; chat limiti to'lgan bo'lsa False."""
+        key = key.strip().lower()
+        with self._lock:
+            self._sync()
+            if (chat_id, kind, key) in self._labels:
+                return True
+            if sum(1 for c, _, _ in self._labels if c == chat_id) >= self.max_per_chat:
+                return False
+            self._conn.execute(
+                "INSERT OR REPLACE INTO follows (chat_id, kind, key, label, created) VALUES (?, ?, ?, ?, ?)",
+                (chat_id, kind, key, label, time.time()),
+            )
+            self._subs[kind].setdefault(key, set()).add(chat_id)
+            self._labels[(chat_id, kind, key)] = label
+        return True
+
+    def unfollow(self, chat_id: int, key: str = None) -> int:
+        """Obunani (``key`` berilmasa — chatning barcha obunalarini) o'chiradi; o'chirilganlar soni."""
+        key = key.strip().lower() if key is not None else None
+        with self._lock:
+            self._sync()
+            gone = [k for k in self._labels if k[0] == chat_id and (key is None or k[2] == key)]
+            for _, kind, k in gone:
+                chats = self._subs[kind].get(k)
+                if chats is not None:
+                    chats.discard(chat_id)
+                    if not chats:
+                        del self._subs[kind][k]
+                del self._labels[(chat_id, kind, k)]
+            if gone:
+                self._conn.executemany(
+                    "DELETE FROM follows WHERE chat_id = ? AND kind = ? AND key = ?", gone,
+                )
+        return len(gone)
+
+    def following(self, chat_id: int) -> List[tuple]:
+        """Chat obunalari: [(tur, kalit, nom)]."""
+        with self._lock:
+            self._sync()
+            return sorted((kind, key, label) for (c, kind, key), label in self._labels.items() if c == chat_id)
+
+    def _chats_for(self, rec: Student) -> Set[int]:
+        ids, groups = self._subs[ID], self._subs[GROUP]
+        chats = set()
+        for key in (rec.hemis, rec.jshshir, rec.hemisuid):
+            if key:
+                chats.update(ids.get(key.lower(), ()))
+        if rec.guruh:
+            chats.update(groups.get(rec.guruh.lower(), ()))
+        return chats
+
+    # ---------------- o'zgarishlar ----------------
+    def observe(self, sheet: str, store: StudentStore, delta=None) -> int:
+        """Varaqning yangi store'ini oldingisi bilan solishtiradi; navbatga qo'yilgan o'zgarishlar soni.
+
+        ``delta`` — ``(base, positions)``: ``ColumnSync`` qator xeshlari bo'yicha
+        topgan o'rinlar; ``base`` oxirgi ko'rilgan store bo'lsa qatorlar qayta
+        ko'rib chiqilmaydi. Birinchi chaqiruv faqat boshlang'ich nuqtani eslab qoladi.
+        """
+        with self._lock:
+            old = self._last.get(sheet)
+            self._last[sheet] = store
+            self.observed += 1
+            if old is None or old is store:
+                return 0
+            self._sync()
+            if not self._labels or not self._leading():
+                return 0
+            if delta is not None and delta[0] is old:
+                positions = delta[1]
+            else:
+                positions = changed_positions(old, store)
+            self.compared += len(positions)
+            old_recs, new_recs = old.records, store.records
+            before = {row_key(old_recs[i]): old_recs[i] for i in positions if i < len(old_recs)}
+            after = {row_key(new_recs[i]): new_recs[i] for i in positions if i < len(new_recs)}
+            queued = 0
+            for key in before.keys() | after.keys():
+                if not key:
+                    continue  # identifikatorsiz qator — kuzatib bo'lmaydi
+                a, b = before.get(key), after.get(key)
+                old_w = watched(a) if a is not None else None
+                new_w = watched(b) if b is not None else None
+                # qator faqat siljigan yoki boshqa ustunlari o'zgargan — xabar yo'q
+                if old_w == new_w:
+                    continue
+                rec = b if b is not None else a
+                chats = self._chats_for(rec)
+                if a is not None and b is not None and a.guruh != b.guruh:
+                    chats |= self._chats_for(a)
+                for chat_id in chats:
+                    pending = self._pending.setdefault(chat_id, {})
+                    prev = pending.get((sheet, key))
+                    # hali yuborilmagan o'zgarish bilan birlashtiriladi: eng eski holat -> eng yangi
+                    first = prev.old if prev is not None else old_w
+                    if first == new_w:
+                        pending.pop((sheet, key), None)
+                        continue
+                    pending[(sheet, key)] = Change(sheet, key, rec, first, new_w)
+                    queued += 1
+            self.changes += queued
+        if queued:
+            logger.info(f"Follow: {queued} changes queued for {sheet} ({len(positions)} rows compared)")
+        return queued
+
+    def drain(self) -> Dict[int, List[Change]]:
+        """Navbatdagi o'zgarishlarni chat bo'yicha olib, navbatni tozalaydi.
+
+        Yuboruvchi ijarasi boshqa workerda bo'lsa bo'sh (navbat tashlanadi).
+        """
+        with self._lock:
+            self._sync()
+            pending, self._pending = self._pending, {}
+            if not self._leading():
+                return {}
+            out = {chat_id: list(changes.values()) for chat_id, changes in pending.items() if changes}
+            self.pushed += sum(len(v) for v in out.values())
+        return out
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "subscriptions": len(self._labels),
+                "chats": len({c for c, _, _ in self._labels}),
+                "pending_chats": len(self._pending),
+                "observed": self.observed,
+                "compared_rows": self.compared,
+                "changes": self.changes,
+                "pushed": self.pushed,
+                "reloads": self.reloads,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_FOLLOWS = None
+_FOLLOWS_LOCK = threading.Lock()
+
+
+def follows() -> FollowStore:
+    """Umumiy obunalar ombori — birinchi murojaatda ochiladi (FOLLOW_DB_PATH bo'sh bo'lsa xotirada)."""
+    global _FOLLOWS
+    with _FOLLOWS_LOCK:
+        if _FOLLOWS is None:
+            _FOLLOWS = FollowStore()
+            logger.info(f"Follow store {FOLLOW_DB_PATH or ':memory:'} opened: {len(_FOLLOWS._labels)} subscriptions")
+        return _FOLLOWS
@@ -1,21 +1,23 @@
-from typing import Dict, List, Any
-from config import REQUIRED_STATUS
+from datetime import date
+from typing import Dict, List, Tuple
+from aggregates import Aggregates, UNKNOWN
+from records import Student
 from utils import escape_md
 
-def _status_icon(status_text: str) -> str:
-    return "🟢" if REQUIRED_STATUS.lower() in (status_text or "").lower() else "🔴"
+def _status_icon(active: bool) -> str:
+    return "🟢" if active else "🔴"
 
-def format_card(item: Dict[str, Any]) -> str:
-    """Bitta foydalanuvchi kartasi (Markdown)."""
-    icon = _status_icon(item.get("status", ""))
+def format_card(item: Student, sheet: str = "") -> str:
+    """Bitta foydalanuvchi kartasi (Markdown). ``sheet`` — bir nechta varaq bo'lsa varaq nomi."""
+    icon = _status_icon(item.active)
 
-    fio      = escape_md(item.get("fio", "Nomaʼlum"))
-    guruh    = escape_md(item.get("guruh", "Nomaʼlum"))
-    yunalish = escape_md(item.get("yunalish", "Nomaʼlum"))
-    hemisuid = escape_md(item.get("hemisuid", ""))
-    hemis    = escape_md(item.get("hemis", ""))
-    jsh      = escape_md(item.get("jshshir", ""))
-    status   = escape_md(item.get("status", ""))
+    fio      = escape_md(item.fio)
+    guruh    = escape_md(item.guruh)
+    yunalish = escape_md(item.yunalish)
+    hemisuid = escape_md(item.hemisuid)
+    hemis    = escape_md(item.hemis)
+    jsh      = escape_md(item.jshshir)
+    status   = escape_md(item.status)
 
     lines = [
         f"👥 Guruh: *{guruh}*",
@@ -26,11 +28,13 @@ def format_card(item: Dict[str, Any]) -> str:
         f"🔑 JSHSHIR: `{jsh}`",
         f"{icon} {status}",
     ]
+    if sheet:
+        lines.insert(0, f"🏛 Varaq: *{escape_md(sheet)}*")
 
-    if REQUIRED_STATUS.lower() in (item.get("status","") or "").lower():
-        lavozim   = escape_md(item.get("lavozim", "-"))
-        tashkilot = escape_md(item.get("tashkilot", "-"))
-        sanasi    = escape_md(item.get("sanasi", "-"))
+    if item.active:
+        lavozim   = escape_md(item.lavozim)
+        tashkilot = escape_md(item.tashkilot)
+        sanasi    = escape_md(item.sanasi)
         lines.append("")
         lines.append("🏢 *Ish joyi haqida:*")
         lines.append(f"   • Lavozimi: _{lavozim}_")
@@ -39,9 +43,117 @@ def format_card(item: Dict[str, Any]) -> str:
 
     return "\n".join(lines)
 
-def format_results_block(items: List[Dict[str, Any]]) -> str:
-    """Bir sahifadagi natijalarni bloklar bilan birlashtiradi."""
+def join_cards(cards: List[str]) -> str:
+    """Tayyor kartalarni (masalan, keshdan) sahifa bloklariga birlashtiradi."""
     blocks = []
-    for i, it in enumerate(items, start=1):
-        blocks.append(f"──────── {i} ────────\n{format_card(it)}")
+    for i, card in enumerate(cards, start=1):
+        blocks.append(f"──────── {i} ────────\n{card}")
     return "\n\n".join(blocks)
+
+def format_results_block(items: List[Student]) -> str:
+    """Bir sahifadagi natijalarni bloklar bilan birlashtiradi."""
+    return join_cards([format_card(it) for it in items])
+
+def format_stat(agg: Aggregates, sheet: str = "") -> str:
+    """/stat matni (W ustuni — yo'nalishlar bo'yicha); bir nechta varaq bo'lsa varaqlar kesimi ham."""
+    overall_pct = agg.pct(agg.active, agg.total)
+    title = f"Statistika — {escape_md(sheet)}" if sheet else "Statistika"
+    lines = [
+        f"📊 *{title} (W ustuni bo'yicha):*\n",
+        f"👥 *Jami talabalar soni:* {agg.total} ta",
+        f"🟢 *Faol shartnoma ega talabalarning (umumiy) soni:* {agg.active} ta ({overall_pct}%)\n",
+    ]
+    for w_key, tot, act, pct_group in agg.rows(agg.per_dir):
+        lines.append(f"▫️ *{escape_md(w_key)}:* jami {tot} | faol: {act} ({pct_group}%)")
+    if len(agg.parts) > 1:
+        lines.append("\n🏛 *Varaqlar bo'yicha:*")
+        for name, part in agg.parts:
+            lines.append(f"▫️ *{escape_md(name)}:* jami {part.total} | faol: {part.active} ({agg.pct(part.active, part.total)}%)")
+        lines.append("\nVaraq bo'yicha batafsil: /stat <varaq nomi>, grafik: /grafik <varaq nomi>")
+    lines.append("\nGuruhlar kesimi: /stat <yo'nalish>, statuslar: /stat status")
+    return "\n".join(lines)
+
+def format_dir_groups(direction: str, total: List[int], groups: Dict[str, List[int]]) -> str:
+    """/stat <yo'nalish>: yo'nalish ichida guruhlar kesimi."""
+    tot, act = total
+    lines = [
+        f"📊 *{escape_md(direction or UNKNOWN)} — guruhlar kesimi:*\n",
+        f"👥 *Jami:* {tot} ta | 🟢 *faol:* {act} ta ({Aggregates.pct(act, tot)}%)\n",
+    ]
+    for name, (g_tot, g_act) in sorted(groups.items(), key=lambda kv: (kv[0] or UNKNOWN).lower()):
+        lines.append(f"▫️ *{escape_md(name or UNKNOWN)}:* jami {g_tot} | faol: {g_act} ({Aggregates.pct(g_act, g_tot)}%)")
+    return "\n".join(lines)
+
+def format_status_crosstab(table: Dict[str, Dict[str, List[int]]], sheet: str = "") -> str:
+    """/stat status: yo'nalish × status — har bir status soni va yo'nalishdagi ulushi."""
+    title = f"Yo'nalishlar × status — {escape_md(sheet)}" if sheet else "Yo'nalishlar × status"
+    lines = [f"📊 *{title}:*\n"]
+    for direction, cells in sorted(table.items(), key=lambda kv: (kv[0] or UNKNOWN).lower()):
+        dir_total = sum(tot for tot, _ in cells.values())
+        parts = [
+            f"{escape_md(status or UNKNOWN)} {tot} ({Aggregates.pct(tot, dir_total)}%)"
+            for status, (tot, _) in sorted(cells.items(), key=lambda kv: -kv[1][0])
+        ]
+        lines.append(f"▫️ *{escape_md(direction or UNKNOWN)}* ({dir_total}): " + " · ".join(parts))
+    return "\n".join(lines)
+
+def trend_pcts(values: List[Tuple[int, int]]) -> List[float]:
+    """(jami, faol) ketma-ketligidan faollik foizlari; jami 0 bo'lgan nuqta — None."""
+    return [Aggregates.pct(act, tot) if tot else None for tot, act in values]
+
+def _trend_line(label: str, values: List[Tuple[int, int]], weeks: int) -> str:
+    pcts = [p for p in trend_pcts(values) if p is not None]
+    if not pcts:
+        return ""
+    cur = pcts[-1]
+    week = f"{cur - pcts[-2]:+.2f}" if len(pcts) > 1 else "—"
+    span = f"{cur - pcts[0]:+.2f}" if len(pcts) > 1 else "—"
+    return f"{label} {cur}% (hafta: {week}, {weeks} hafta: {span})"
+
+def format_trend(days: List[int], total: List[Tuple[int, int]], per_dir: Dict[str, List[Tuple[int, int]]],
+                 sheet: str = "") -> str:
+    """/trend matni: faollik foizi haftalik o'zgarishi (umumiy va yo'nalishlar bo'yicha)."""
+    title = f"Faollik dinamikasi — {escape_md(sheet)}" if sheet else "Faollik dinamikasi"
+    first, last = (date.fromordinal(d).strftime("%d.%m.%Y") for d in (days[0], days[-1]))
+    lines = [
+        f"📈 *{title} (haftalik, W ustuni bo'yicha):*",
+        f"🗓 {first} — {last}\n",
+        _trend_line("🟢 *Umumiy:*", total, len(days)),
+        "",
+    ]
+    for name in sorted(per_dir, key=lambda k: (k or UNKNOWN).lower()):
+        line = _trend_line(f"▫️ *{escape_md(name or UNKNOWN)}:*", per_dir[name], len(days))
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+# /follow xabarlaridagi maydonlar (follow.WATCHED tartibida)
+_WATCHED_LABELS = ("Status", "Lavozimi", "Tashkilot", "Sanasi")
+
+def _change_lines(change, with_sheet: bool) -> List[str]:
+    who = f"👤 *{escape_md(change.fio)}* (`{escape_md(change.hemis)}`) — {escape_md(change.guruh)}"
+    if with_sheet:
+        who += f", {escape_md(change.sheet)}"
+    if change.old is None:
+        return [who, "   ➕ jadvalga qo'shildi"]
+    if change.new is None:
+        return [who, "   ➖ jadvaldan o'chirildi"]
+    lines = [who]
+    for label, old, new in zip(_WATCHED_LABELS, change.old, change.new):
+        if old != new:
+            lines.append(f"   • {label}: _{escape_md(old) or '—'}_ → *{escape_md(new) or '—'}*")
+    return lines
+
+def format_changes(changes, with_sheet: bool = False, limit: int = 30) -> str:
+    """Kuzatuvdagi yozuvlar o'zgarishlari (bitta xabar); ``limit`` dan ortig'i faqat soni bilan.
+
+    ``with_sheet`` — bir nechta varaq bo'lsa varaq nomi ham ko'rsatiladi.
+    """
+    lines = [f"🔔 *Kuzatuvdagi o'zgarishlar:* {len(changes)} ta\n"]
+    for change in sorted(changes, key=lambda c: (c.sheet, c.guruh, c.fio))[:limit]:
+        lines.extend(_change_lines(change, with_sheet))
+        lines.append("")
+    if len(changes) > limit:
+        lines.append(f"… va yana {len(changes) - limit} ta o'zgarish")
+    return "\n".join(lines).rstrip()
+
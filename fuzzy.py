@@ -0,0 +1,218 @@
+import copy
+import heapq
+import math
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import List, Tuple
+
+from config import FUZZY_THRESHOLD, FUZZY_LIMIT, FUZZY_BUDGET
+from index import REBUILD_RATIO, grams, _blob, _discard, _scan_blob
+from records import StudentStore
+from translit import normalize
+from versioned import VersionedCache
+
+
+# Posting'lar shu bo'laklarda sanaladi (vaqt byudjeti bo'laklar orasida tekshiriladi)
+_CHUNK = 4096
+# Bitta nomzodni saralash narxi (soniya) — sanashni to'xtatish vaqtini baholash uchun
+_RANK_COST = 3e-7
+
+
+class FuzzyIndex:
+    """FIO bo'yicha transliteratsiya va xatolarga chidamli qidiruv.
+
+    Har bir FIO uchun ``translit.normalize`` kaliti (lotin, kichik harf,
+    apostroflarsiz) va uning trigram indeksi quriladi. ``find`` avval
+    normallashgan substring'ni qidiradi, topilmasa trigram o'xshashligi
+    bo'yicha saralangan natijalarni qaytaradi.
+    """
+
+    def __init__(self, store: StudentStore, version: int = 0):
+        self.version = version
+        self.row_ids: List[int] = []
+        self._keys: List[str] = []
+        self._sizes = array("H")  # har bir kalitdagi trigramlar soni
+        gram_map = {}
+        for rec in store:
+            if not rec.fio:
+                continue
+            key = normalize(rec.fio)
+            pos = len(self.row_ids)
+            self.row_ids.append(rec.row)
+            self._keys.append(key)
+            kgrams = grams(f" {key} ")
+            self._sizes.append(min(len(kgrams), 0xFFFF))
+            for g in kgrams:
+                gram_map.setdefault(g, []).append(pos)
+        self._grams = {g: array("I", p) for g, p in gram_map.items()}
+        self._blob, self._starts = _blob(self._keys)
+
+    def updated(self, old: StudentStore, new: StudentStore, changed: List[int], version: int):
+        """Faqat ``changed`` o'rinlaridagi FIO'larni qayta indekslab yangi indeks qaytaradi.
+
+        ``SearchIndex.updated`` kabi: eski indeks o'zgarmaydi, tegilgan
+        posting'lar nusxalanadi, oxiriga qo'shilgan/kesilgan qatorlar ham
+        yangilanadi. O'rtadagi FIO bo'sh/bo'sh emas holatini almashtirgan
+        bo'lsa None — indeksni noldan qurish kerak.
+        """
+        common = min(len(old), len(new))
+        idx = copy.copy(self)
+        idx.version = version
+        if len(old) != len(new):
+            idx.row_ids = list(self.row_ids)
+        idx._keys = list(self._keys)
+        idx._sizes = array("H", self._sizes)
+        idx._grams = dict(self._grams)
+        touched = set()
+
+        def postings(g):
+            if g not in touched:
+                touched.add(g)
+                idx._grams[g] = array("I", idx._grams.get(g, ()))
+            return idx._grams[g]
+
+        for row in changed:
+            o_fio = old[row].fio if row < len(old) else ""
+            n_fio = new[row].fio if row < len(new) else ""
+            if bool(o_fio) != bool(n_fio) and row < common:
+                return None
+            if not (o_fio or n_fio):
+                continue
+            if o_fio:
+                pos = bisect_left(self.row_ids, row)
+            else:
+                # qo'shilgan qator: o'rni oxirida, bo'sh kalitdan yangilanadi
+                pos = len(idx.row_ids)
+                idx.row_ids.append(row)
+                idx._keys.append("")
+                idx._sizes.append(0)
+            o_key, n_key = idx._keys[pos], normalize(n_fio) if n_fio else ""
+            if o_key == n_key:
+                continue
+            o_grams, n_grams = grams(f" {o_key} "), grams(f" {n_key} ")
+            for g in o_grams - n_grams:
+                p = postings(g)
+                _discard(p, pos)
+                if not p:
+                    del idx._grams[g]
+                    touched.discard(g)
+            for g in n_grams - o_grams:
+                p = postings(g)
+                p.insert(bisect_left(p, pos), pos)
+            idx._keys[pos] = n_key
+            idx._sizes[pos] = min(len(n_grams), 0xFFFF)
+
+        if len(new) < len(old):
+            # kesilgan qatorlar o'rinlari oxirida — trigramlari yuqorida olib tashlandi
+            keep = bisect_left(idx.row_ids, len(new))
+            idx.row_ids, idx._keys, idx._sizes = idx.row_ids[:keep], idx._keys[:keep], idx._sizes[:keep]
+        idx._blob, idx._starts = _blob(idx._keys)
+        return idx
+
+    def contains(self, query: str, limit: int = FUZZY_LIMIT) -> List[int]:
+        """Normallashgan kalitlar ichida substring qidiruv (kirill/lotin, apostroflar farqsiz), ``limit`` tagacha."""
+        q = normalize(query)
+        if not q:
+            return []
+        row_ids = self.row_ids
+        return [row_ids[p] for p in _scan_blob(self._blob, self._starts, q, limit)]
+
+    def similar(self, query: str, threshold: float = FUZZY_THRESHOLD, limit: int = FUZZY_LIMIT,
+                budget: float = FUZZY_BUDGET) -> List[Tuple[int, float]]:
+        """Trigram o'xshashligi bo'yicha (row, ball) ro'yxati, ball kamayish tartibida.
+
+        Ball — so'rov trigramlarining nomzod kalitida uchragan ulushi (teng
+        bo'lsa Jaccard bo'yicha — qisqaroq FIO oldinda). Umumiy trigramlar
+        posting'lari ``Counter`` bilan (C tezligida) bo'laklab sanaladi, kam
+        uchraydiganlari birinchi. Sanash va saralash birgalikda ``budget``
+        soniyaga sig'adi: vaqt tugasa qolgan posting'lar tashlab yuboriladi,
+        chegara esa tashlangan trigramlar soniga yumshatiladi.
+        """
+        q = normalize(query)
+        qgrams = grams(f" {q}")
+        if not qgrams:
+            return []
+        deadline = time.perf_counter() + budget
+        need = max(1, math.ceil(threshold * len(qgrams)))
+        postings = sorted((p for p in map(self._grams.get, qgrams) if p is not None), key=len)
+        if len(postings) < need:
+            return []
+
+        counts = Counter()
+        skipped = len(postings)  # to'liq sanalmagan posting'lar
+        for p in postings:
+            for i in range(0, len(p), _CHUNK):
+                counts.update(p[i:i + _CHUNK])
+                # saralash ham nomzodlar soniga proporsional — uning vaqti ham byudjetdan
+                if time.perf_counter() + len(counts) * _RANK_COST > deadline:
+                    break
+            else:
+                skipped -= 1
+                continue
+            break
+        # tashlangan trigramlar bilan chegaraga yetishi mumkin bo'lganlar ham nomzod
+        need = max(1, need - skipped)
+
+        nq = len(qgrams)
+        sizes = self._sizes
+        best = heapq.nlargest(
+            limit,
+            ((shared, shared / (nq + sizes[pos] - shared), -pos) for pos, shared in counts.items() if shared >= need),
+        )
+        row_ids = self.row_ids
+        return [(row_ids[-neg_pos], shared / nq) for shared, _, neg_pos in best]
+
+    def find(self, query: str) -> List[int]:
+        """Avval normallashgan substring, topilmasa o'xshashlik bo'yicha saralangan row'lar."""
+        rows = self.contains(query)
+        if rows:
+            return rows
+        return [row for row, _ in self.similar(query)]
+
+
+class CombinedFuzzy:
+    """Bir nechta varaqning fuzzy indekslari ustidan (``MultiStore`` row id'lari bilan)."""
+
+    def __init__(self, parts, version: int = 0):
+        self.version = version
+        self.parts = parts  # [(offset, FuzzyIndex)]
+
+    def contains(self, query: str, limit: int = FUZZY_LIMIT) -> List[int]:
+        res = []
+        for offset, idx in self.parts:
+            if len(res) >= limit:
+                break
+            res.extend(offset + i for i in idx.contains(query, limit - len(res)))
+        return res
+
+    def similar(self, query: str, threshold: float = FUZZY_THRESHOLD, limit: int = FUZZY_LIMIT,
+                budget: float = FUZZY_BUDGET) -> List[Tuple[int, float]]:
+        """Har bir varaqdan eng yaxshilari, umumiy ball bo'yicha; vaqt byudjeti varaqlarga bo'linadi."""
+        share = budget / max(len(self.parts), 1)
+        scored = []
+        for offset, idx in self.parts:
+            scored.extend((offset + row, score) for row, score in idx.similar(query, threshold, limit, share))
+        scored.sort(key=lambda rs: rs[1], reverse=True)
+        return scored[:limit]
+
+    def find(self, query: str) -> List[int]:
+        rows = self.contains(query)
+        if rows:
+            return rows
+        return [row for row, _ in self.similar(query)]
+
+
+_CACHE = VersionedCache(
+    FuzzyIndex,
+    update=lambda idx, old, new, changed, version: idx.updated(old, new, changed, version),
+    combine=lambda store, parts, version: CombinedFuzzy(
+        [(off, idx) for off, (_, idx) in zip(store.offsets, parts)], version),
+    rebuild_ratio=REBUILD_RATIO,
+)
+
+
+def fuzzy_for(snapshot, key: str = ""):
+    """Snapshot versiyasiga mos fuzzy indeks (``key`` — varaq nomi)."""
+    return _CACHE.get(snapshot, key)
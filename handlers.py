@@ -1,93 +1,225 @@
-import asyncio
 import os
-import uuid
-from collections import Counter
+import time
+import asyncio
 import logging
+import shutil
+import tempfile
+from datetime import date
+from functools import partial
 
 from telegram import Update
 from telegram.constants import ChatAction
 from telegram.ext import ContextTypes
 
-from config import REQUIRED_STATUS
-from sheets import load_rows
-from utils import safe_cell, escape_md, split_and_send_text
-from formatters import format_card, format_results_block
+from config import INLINE_CACHE_TIME, TREND_WEEKS, FOLLOW_PUSH_INTERVAL, ADMIN_IDS
+
+from sheets import aload_snapshot, arefresh_snapshot
+from index import index_for, normalize_query
+from fuzzy import fuzzy_for
+from aggregates import UNKNOWN, aggregates_for
+from charts import ChartCache, render_direction_chart, render_trend_chart
+from records import MultiStore, StudentStore
+from sessions import Session, make_session_store
+from utils import escape_md, split_and_send_text
+from outbox import Outbox
+from metrics import METRICS
+from formatters import (
+    join_cards, format_changes, format_dir_groups, format_stat, format_status_crosstab, format_trend, trend_pcts,
+)
+from follow import GROUP, ID, follows
+from history import DIRECTION, TOTAL, history, today
+from inline import InlineResults
+from render import RenderCache
+from querycache import QueryCache
+from bulk import BULK_EXECUTOR, file_kind, run_bulk
+from report import ReportBusy, ReportQueue, build_report, report_filename, report_format
 from keyboards import reply_main_menu, pagination_keyboard
 
 # Logging setup
 logger = logging.getLogger(__name__)
 
-# Ustun indekslari (0-based)
-HEMIS_UID    = 0   # A
-IDX_HEMIS    = 2   # C
-IDX_FIO      = 3   # D
-IDX_STAT     = 4   # E
-IDX_JSH      = 5   # F
-IDX_W        = 22  # W
-IDX_LAVOZIM  = 29  # AD
-IDX_TASHKILOT= 30  # AE
-IDX_SANASI   = 34  # AI
-IDX_Guruhi   = 14  # O
-IDX_Yunalish = 22  # W
-
 PER_PAGE = 7
 
-# chat_id -> {"query": str, "results": [dict,...], "page_msg_id": int, "page": int}
-CHAT_CACHE = {}
+# chat_id -> Session (natijalar snapshot'dagi yozuvlarga row id orqali ishora qiladi).
+# Backend SESSION_BACKEND orqali tanlanadi: xotira yoki worker'lar uchun umumiy SQLite.
+CHAT_CACHE = make_session_store()
 
-# ---------------- Helper: natijalarni qurish ----------------
-def build_results_from_rows(rows, query: str):
-    """rows = get_all_values() — list of lists. Returns list of dicts."""
-    res = []
-    q = (query or "").strip().lower()
-    if not q:
-        return res
-    
-    try:
-        for r in rows[1:]:
-            hemisuid = safe_cell(r, HEMIS_UID)
-            fio = safe_cell(r, IDX_FIO)
-            guruh = safe_cell(r, IDX_Guruhi)
-            yunalish = safe_cell(r, IDX_Yunalish)
-            hemis = safe_cell(r, IDX_HEMIS)
-            jsh = safe_cell(r, IDX_JSH)
-            status = safe_cell(r, IDX_STAT)
-            
-            if not (fio or hemis or jsh or hemisuid):
-                continue
-                
-            if q in fio.lower() or q in hemis.lower() or q in jsh.lower() or q in hemisuid.lower():
-                item = {
-                    "hemisuid": hemisuid,
-                    "guruh": guruh,
-                    "yunalish": yunalish,
-                    "fio": fio,
-                    "hemis": hemis,
-                    "status": status,
-                    "jshshir": jsh,
-                }
-                if REQUIRED_STATUS.lower() in (status or "").lower():
-                    item["lavozim"]   = safe_cell(r, IDX_LAVOZIM)
-                    item["tashkilot"] = safe_cell(r, IDX_TASHKILOT)
-                    item["sanasi"]    = safe_cell(r, IDX_SANASI)
-                res.append(item)
-    except Exception as e:
-        logger.error(f"build_results_from_rows error: {e}")
-    
-    return res
+# Barcha chiquvchi xabarlar shu navbat orqali (tezlik limitlari, 429, birlashtirish)
+OUTBOX = Outbox()
+
+# (snapshot versiyasi, grafik turi) -> PNG / Telegram file_id
+CHARTS = ChartCache()
+
+# Qidiruv natijalari (normallashgan so'rov -> row id'lar) — barcha chatlar uchun umumiy
+QUERY_CACHE = QueryCache()
+
+# Tayyor kartalar va sahifalar (so'rov, sahifa, store versiyasi bo'yicha) — barcha chatlar uchun umumiy
+RENDERED = RenderCache()
+
+# (snapshot versiyasi, varaq, format) -> /report ishlari va tayyor fayllar
+REPORTS = ReportQueue()
 
-def _results_summary(results):
-    total = len(results)
-    active = sum(1 for it in results if REQUIRED_STATUS.lower() in (it.get("status","") or "").lower())
+# Inline rejim uchun tayyor kartalar (snapshot versiyasi bo'yicha)
+INLINE_RESULTS = InlineResults()
+INLINE_MIN_QUERY = 2
+
+EXPIRED_TEXT = "⌛ Qidiruv natijalari eskirgan. Iltimos, qaytadan qidiring."
+
+# ---------------- Helper: natijalarni qurish ----------------
+def _results_summary(sess: Session):
+    total = sess.total
+    active = sess.active
     pct = round((active/total*100),2) if total else 0.0
     return total, active, pct
 
+def _search_rows(snap, query: str):
+    """Indeks bo'yicha qidiruv; topilmasa fuzzy (transliteratsiya/xatolar) qidiruv."""
+    with METRICS.span("search", kind="index"):
+        row_ids = index_for(snap).search(query)
+    if not row_ids:
+        # kirill/lotin, apostrof farqlari va xatolar uchun — o'xshashlik bo'yicha saralangan
+        with METRICS.span("search", kind="fuzzy"):
+            row_ids = fuzzy_for(snap).find(query)
+    return row_ids
+
+def _cached_rows(snap, query: str):
+    """(row_ids, faollar soni) — bir xil so'rov (normallashgan) boshqa chatlar uchun qayta qidirilmaydi."""
+    return QUERY_CACHE.get(snap.rows, query, partial(_search_rows, snap))
+
+def _new_session(snap, query: str, page_msg_id: int = None, page: int = 1) -> Session:
+    row_ids, active = _cached_rows(snap, query)
+    return Session(query, snap.rows.digest, row_ids, active, page=page, page_msg_id=page_msg_id)
+
+async def _session_results(chat_id: int, sess: Session):
+    """Sessiyani joriy snapshot bilan moslaydi va (sessiya, store) qaytaradi.
+
+    Jadval yangilangan bo'lsa (yoki sessiya boshqa tarkibli worker'da yaratilgan
+    bo'lsa) so'rov joriy indeks bo'yicha qayta bajariladi, chunki eski row id'lar
+    yangi store'ga mos kelmaydi.
+    """
+    snap = await aload_snapshot()
+    if sess.snapshot != snap.rows.digest:
+        sess = _new_session(snap, sess.query, sess.page_msg_id, sess.page)
+        CHAT_CACHE.put(chat_id, sess)
+    return sess, snap.rows
+
+def _render_page(sess: Session, store: StudentStore, page: int):
+    """Sahifa matni, tugmalari va haqiqiy sahifa raqami.
+
+    Bir xil so'rov (boshqa chatdan ham) va store versiyasi uchun tayyor sahifa
+    keshdan olinadi — formatlash ham, xulosa hisoblash ham takrorlanmaydi.
+    """
+    total_pages = max(1, (sess.total + PER_PAGE - 1)//PER_PAGE)
+    page = max(1, min(page, total_pages))
+    version = store.digest
+    build = partial(_build_page, sess, store, page, total_pages, version)
+    text, markup = RENDERED.page(normalize_query(sess.query), page, version, build)
+    return text, markup, page
+
+def _build_page(sess: Session, store: StudentStore, page: int, total_pages: int, version):
+    total, active, pct = _results_summary(sess)
+    start = (page-1)*PER_PAGE
+    end = start + PER_PAGE
+    page_ids = sess.row_ids[start:end]
+
+    header = (
+        f"📋 *Jami topilgan talabalar soni:* {total} ta\n"
+        f"🟢 *my.mehnat.uz da faol bo'lganlar soni:* {active} ta ({pct}%)\n"
+        f"📄 *Sahifalar:* {page}/{total_pages}\n\n"
+    )
+    with METRICS.span("format_page"):
+        cards = [RENDERED.card(i, store[i], version, _sheet_name(store, i)) for i in page_ids]
+        text = header + join_cards(cards)
+    return text, pagination_keyboard(page, total_pages)
+
+def _sheet_name(store, row: int) -> str:
+    """Bir nechta varaq bo'lsa yozuv qaysi varaqdan ekanligi, aks holda ""."""
+    return store.sheet_of(row) if isinstance(store, MultiStore) else ""
+
+def _match_name(names, query: str):
+    """Nomlardan (kichik-katta harf farqsiz) aniq mosi, bo'lmasa shu bilan boshlanadigani; yo'q bo'lsa None."""
+    q = (query or "").strip().lower()
+    if not q:
+        return None
+    for exact in (True, False):
+        for n in names:
+            if n and ((n.lower() == q) if exact else n.lower().startswith(q)):
+                return n
+    return None
+
+def _sheet_part(snap, name: str):
+    """Bir nechta varaqli snapshot'dan nom (yoki uning boshi) bo'yicha (nom, varaq snapshot'i) yoki None."""
+    store = snap.rows
+    if not isinstance(store, MultiStore):
+        return None
+    n = _match_name(store.names, name)
+    return None if n is None else (n, dict(store.parts)[n])
+
+def _sheet_list(snap) -> str:
+    return ", ".join(snap.rows.names) if isinstance(snap.rows, MultiStore) else ""
+
+# /stat ko'rinishlari: "" — umumiy, "status" — yo'nalish × status, "dir:<nom>" — yo'nalish ichida guruhlar
+STATUS_VIEW = "status"
+
+def _build_stat(agg, sheet: str, view: str) -> str:
+    if view == STATUS_VIEW:
+        return format_status_crosstab(agg.cube.crosstab("dir", "status"), sheet)
+    if view.startswith("dir:"):
+        direction = view[4:]
+        groups = agg.cube.crosstab("dir", "group").get(direction, {})
+        return format_dir_groups(direction, agg.per_dir.get(direction, [0, 0]), groups)
+    return format_stat(agg, sheet)
+
+# (varaq, ko'rinish) -> (version, text): /stat matni snapshot versiyasi bo'yicha memo qilinadi
+_STAT_TEXT = {}
+
+def _stat_text(snap, sheet: str = "", view: str = "") -> str:
+    version, text = _STAT_TEXT.get((sheet, view), (None, ""))
+    if version != snap.version:
+        METRICS.inc("cache", cache="stat_text", result="miss")
+        with METRICS.span("format_stat"):
+            text = _build_stat(aggregates_for(snap, sheet), sheet, view)
+        _STAT_TEXT[(sheet, view)] = (snap.version, text)
+    else:
+        METRICS.inc("cache", cache="stat_text", result="hit")
+    return text
+
+def _trend_days() -> list:
+    """/trend nuqtalari: oxirgi TREND_WEEKS hafta, har biri bugungi kundan 7 kun oldin."""
+    now = today()
+    return [now - 7 * k for k in range(TREND_WEEKS - 1, -1, -1)]
+
+def _trend_series(sheet: str = None):
+    """(kunlar, umumiy, yo'nalishlar) yoki tarix yo'q/o'chiq bo'lsa None."""
+    store = history()
+    if store is None:
+        return None
+    days = _trend_days()
+    total = store.series(TOTAL, days, sheet).get("")
+    if not total or not any(tot for tot, _ in total):
+        return None
+    return days, total, store.series(DIRECTION, days, sheet)
+
+async def _resolve_sheet(context, chat_id: int, snap, args):
+    """Argumentdan varaq nomi: (True, nom) yoki (True, None) — umumiy; topilmasa (False, None)."""
+    if not args or not _sheet_list(snap):
+        return True, None
+    part = _sheet_part(snap, " ".join(args))
+    if part is None:
+        await OUTBOX.send_message(context.bot, chat_id, f"❌ Varaq topilmadi. Mavjud varaqlar: {_sheet_list(snap)}")
+        return False, None
+    return True, part[0]
+
+NO_HISTORY = "ℹ️ *Dinamika uchun tarix hali yig'ilmagan.*"
+
 # ---------------- /start ----------------
+@METRICS.timed("handler", handler="start")
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         # Clear any previous cache for this chat
-        CHAT_CACHE.pop(update.effective_chat.id, None)
-        await update.message.reply_text(
+        CHAT_CACHE.pop(update.effective_chat.id)
+        await OUTBOX.send_message(
+            context.bot, update.effective_chat.id,
             "👋 *Assalomu alaykum!*\n\n"
             "Ism/familiya (qismi bo'lsa ham), HEMIS ID yoki JSHSHIR yuboring — men jadvaldan topib beraman.\n\n"
             "📌 Pastdagi tugmalardan foydalanishingiz mumkin:",
@@ -96,67 +228,208 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
     except Exception as e:
         logger.error(f"Start handler error: {e}")
+        METRICS.inc("handler_errors", handler="start")
 
 # ---------------- Statistika (/stat yoki tugma) ----------------
+@METRICS.timed("handler", handler="stat")
 async def stat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     
     try:
         await context.bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
 
-        rows = load_rows()
-        if len(rows) <= 1:
-            await context.bot.send_message(chat_id=chat_id, text="❌ *Jadval bo'sh.*", parse_mode="Markdown")
+        snap = await aload_snapshot()
+        if not len(snap.rows):
+            await OUTBOX.send_message(context.bot, chat_id, "❌ *Jadval bo'sh.*", parse_mode="Markdown")
             return
 
-        total_students = len(rows) - 1
-        total_active = 0
-        total_per_w = Counter()
-        active_per_w = Counter()
-
-        for r in rows[1:]:
-            w_val = safe_cell(r, IDX_W) or "Noma'lum"
-            status = safe_cell(r, IDX_STAT)
-            total_per_w[w_val] += 1
-            if REQUIRED_STATUS.lower() in (status or "").lower():
-                active_per_w[w_val] += 1
-                total_active += 1
-
-        overall_pct = round((total_active / total_students * 100), 2) if total_students else 0.0
-
-        lines = [
-            "📊 *Statistika (W ustuni bo'yicha):*\n",
-            f"👥 *Jami talabalar soni:* {total_students} ta",
-            f"🟢 *Faol shartnoma ega talabalarning (umumiy) soni:* {total_active} ta ({overall_pct}%)\n",
-        ]
-
-        for w_key in sorted(total_per_w.keys(), key=lambda x: (x.lower() if isinstance(x, str) else str(x))):
-            tot = total_per_w[w_key]
-            act = active_per_w.get(w_key, 0)
-            pct_group = round((act / tot * 100), 2) if tot else 0.0
-            lines.append(f"▫️ *{escape_md(w_key)}:* jami {tot} | faol: {act} ({pct_group}%)")
-
-        text = "\n".join(lines)
+        # /stat <varaq> — bitta varaq (fakultet), /stat status — yo'nalish × status,
+        # /stat <yo'nalish> — yo'nalish ichida guruhlar bo'yicha
+        arg = " ".join(getattr(context, "args", None) or []).strip()
+        part = _sheet_part(snap, arg) if arg and _sheet_list(snap) else None
+        if not arg:
+            text = _stat_text(snap)
+        elif part is not None:
+            text = _stat_text(part[1], part[0])
+        elif arg.lower() in (STATUS_VIEW, "holat"):
+            text = _stat_text(snap, view=STATUS_VIEW)
+        else:
+            direction = _match_name(aggregates_for(snap).per_dir, arg)
+            if direction is None:
+                sheets = f" Varaqlar: {_sheet_list(snap)}." if _sheet_list(snap) else ""
+                await OUTBOX.send_message(
+                    context.bot, chat_id,
+                    f"❌ Bunday varaq yoki yo'nalish topilmadi.{sheets} Statuslar kesimi: /stat status",
+                )
+                return
+            text = _stat_text(snap, view=f"dir:{direction}")
 
         # Agar oldingi sahifa xabari bo'lsa yechib tashlaymiz
-        cache = CHAT_CACHE.get(chat_id)
-        if cache and cache.get("page_msg_id"):
+        sess = CHAT_CACHE.get(chat_id)
+        if sess and sess.page_msg_id:
             try:
-                await context.bot.delete_message(chat_id=chat_id, message_id=cache["page_msg_id"])
+                await OUTBOX.delete_message(context.bot, chat_id, sess.page_msg_id)
             except Exception:
                 pass
-            cache["page_msg_id"] = None
+            sess.page_msg_id = None
+            CHAT_CACHE.save(chat_id, sess)
 
-        await split_and_send_text(chat_id, text, context)
+        await split_and_send_text(chat_id, text, context, send=partial(OUTBOX.send_message, context.bot))
         
     except Exception as e:
         logger.error(f"Stat handler error: {e}")
+        METRICS.inc("handler_errors", handler="stat")
         try:
-            await context.bot.send_message(chat_id=chat_id, text="❌ *Statistika olishda xatolik yuz berdi.*", parse_mode="Markdown")
-        except:
-            pass
+            await OUTBOX.send_message(context.bot, chat_id, "❌ *Statistika olishda xatolik yuz berdi.*", parse_mode="Markdown")
+        except Exception as send_error:
+            logger.error(f"Error sending error message: {send_error}")
+
+# ---------------- Dinamika (/trend [varaq]) ----------------
+@METRICS.timed("handler", handler="trend")
+async def trend(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+
+    try:
+        await context.bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
+
+        snap = await aload_snapshot()
+        ok, sheet = await _resolve_sheet(context, chat_id, snap, getattr(context, "args", None))
+        if not ok:
+            return
+        data = _trend_series(sheet)
+        if data is None:
+            await OUTBOX.send_message(context.bot, chat_id, NO_HISTORY, parse_mode="Markdown")
+            return
+
+        text = format_trend(*data, sheet=sheet or "")
+        await split_and_send_text(chat_id, text, context, send=partial(OUTBOX.send_message, context.bot))
+
+    except Exception as e:
+        logger.error(f"Trend handler error: {e}")
+        METRICS.inc("handler_errors", handler="trend")
+        try:
+            await OUTBOX.send_message(context.bot, chat_id, "❌ *Dinamikani olishda xatolik yuz berdi.*", parse_mode="Markdown")
+        except Exception as send_error:
+            logger.error(f"Error sending error message: {send_error}")
+
+# ---------------- Kuzatuv (/follow, /unfollow) ----------------
+FOLLOW_HELP = (
+    "🔔 *Kuzatuv:* talaba yoki guruhdagi o'zgarishlar (status, lavozim, tashkilot, sana) "
+    "haqida xabar beriladi. Lavozim, tashkilot va sana faqat faol talabalar uchun kuzatiladi.\n\n"
+    "/follow <HEMIS ID, JSHSHIR yoki guruh> — kuzatishni boshlash\n"
+    "/unfollow <...> — to'xtatish, /unfollow — barchasini to'xtatish"
+)
+
+def _follow_target(snap, arg: str):
+    """(tur, kalit, nom) — avval aniq ID, keyin guruh nomi bo'yicha; topilmasa None."""
+    row_ids = index_for(snap).lookup(arg)
+    if row_ids:
+        return ID, arg, snap.rows[row_ids[0]].fio
+    q = arg.strip().lower()
+    for group in aggregates_for(snap).per_group:
+        if group and group.lower() == q:
+            return GROUP, group, group
+    return None
+
+@METRICS.timed("handler", handler="follow")
+async def follow(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+
+    try:
+        arg = " ".join(getattr(context, "args", None) or []).strip()
+        store = follows()
+        if not arg:
+            subs = store.following(chat_id)
+            lines = [FOLLOW_HELP]
+            if subs:
+                lines.append("\n📋 *Kuzatuvdagilar:*")
+                for kind, key, label in subs:
+                    icon = "👤" if kind == ID else "👥"
+                    lines.append(f"{icon} {escape_md(label)} (`{escape_md(key)}`)")
+            await split_and_send_text(chat_id, "\n".join(lines), context, send=partial(OUTBOX.send_message, context.bot))
+            return
+
+        snap = await aload_snapshot()
+        target = _follow_target(snap, arg)
+        if target is None:
+            await OUTBOX.send_message(context.bot, chat_id, "❌ *Bunday ID yoki guruh topilmadi.*", parse_mode="Markdown")
+            return
+        kind, key, label = target
+        if not store.follow(chat_id, kind, key, label):
+            await OUTBOX.send_message(
+                context.bot, chat_id,
+                f"❌ *Kuzatuvlar soni {store.max_per_chat} tadan oshmasligi kerak.* /unfollow bilan keraksizlarini o'chiring.",
+                parse_mode="Markdown",
+            )
+            return
+        what = "talaba" if kind == ID else "guruh"
+        await OUTBOX.send_message(
+            context.bot, chat_id,
+            f"🔔 Kuzatuvga olindi ({what}): *{escape_md(label)}*\nO'zgarish bo'lsa xabar beraman.",
+            parse_mode="Markdown",
+        )
+
+    except Exception as e:
+        logger.error(f"Follow handler error: {e}")
+        METRICS.inc("handler_errors", handler="follow")
+        try:
+            await OUTBOX.send_message(context.bot, chat_id, "❌ *Kuzatuvga olishda xatolik yuz berdi.*", parse_mode="Markdown")
+        except Exception as send_error:
+            logger.error(f"Error sending error message: {send_error}")
+
+@METRICS.timed("handler", handler="unfollow")
+async def unfollow(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+
+    try:
+        arg = " ".join(getattr(context, "args", None) or []).strip()
+        removed = follows().unfollow(chat_id, arg or None)
+        text = f"🔕 Kuzatuvdan olindi: {removed} ta" if removed else "ℹ️ Bunday kuzatuv yo'q. Ro'yxat: /follow"
+        await OUTBOX.send_message(context.bot, chat_id, text)
+
+    except Exception as e:
+        logger.error(f"Unfollow handler error: {e}")
+        METRICS.inc("handler_errors", handler="unfollow")
+
+async def push_follow_changes(bot) -> int:
+    """Navbatdagi o'zgarishlarni har bir chatga bitta (kerak bo'lsa bo'lingan) xabar qilib yuboradi."""
+    batches = follows().drain()
+    if not batches:
+        return 0
+    with_sheet = bool(_sheet_list(await aload_snapshot()))
+    send = partial(OUTBOX.send_message, bot)
+
+    async def push(chat_id, changes):
+        try:
+            await split_and_send_text(chat_id, format_changes(changes, with_sheet), None, send=send)
+        except Exception as e:
+            logger.warning(f"Follow push to {chat_id} failed: {e}")
+            METRICS.inc("handler_errors", handler="follow_push")
+
+    # chatlar parallel — tezlik chegarasini OUTBOX boshqaradi
+    await asyncio.gather(*(push(chat_id, changes) for chat_id, changes in batches.items()))
+    logger.info(f"Follow: pushed {sum(len(c) for c in batches.values())} changes to {len(batches)} chats")
+    return len(batches)
+
+async def _follow_notifier(bot, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await push_follow_changes(bot)
+        except Exception as e:
+            logger.error(f"Follow notifier error: {e}")
+
+_NOTIFIER = None
+
+def start_follow_notifier(bot, interval: float = FOLLOW_PUSH_INTERVAL):
+    """O'zgarishlarni har ``interval`` soniyada to'plab yuboruvchi fon vazifasi (event loop ichida, bir marta)."""
+    global _NOTIFIER
+    if _NOTIFIER is None or _NOTIFIER.done():
+        _NOTIFIER = asyncio.get_running_loop().create_task(_follow_notifier(bot, interval))
+    return _NOTIFIER
 
 # ---------------- Qidiruv (foydalanuvchi yuborgan matn) ----------------
+@METRICS.timed("handler", handler="search")
 async def search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     text = (update.message.text or "").strip()
@@ -164,7 +437,7 @@ async def search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         # Reply tugma bosilganda ularni qidiruv deb o'tkazmaymiz
         if text in ("🔎 Qidiruv", "Qidiruv"):
-            await update.message.reply_text("🔎 Qidiruvni boshlash uchun: *ism/familiya (qismi)* yoki *HEMIS ID / JSHSHIR* yuboring.", parse_mode="Markdown")
+            await OUTBOX.send_message(context.bot, chat_id, "🔎 Qidiruvni boshlash uchun: *ism/familiya (qismi)* yoki *HEMIS ID / JSHSHIR* yuboring.", parse_mode="Markdown")
             return
         if text in ("📊 Statistika", "Statistika"):
             await stat(update, context)
@@ -174,208 +447,476 @@ async def search(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
 
         if not text:
-            await update.message.reply_text("📝 Iltimos, qidirish uchun matn yuboring.")
+            await OUTBOX.send_message(context.bot, chat_id, "📝 Iltimos, qidirish uchun matn yuboring.")
             return
 
         await context.bot.send_chat_action(chat_id=chat_id, action=ChatAction.TYPING)
 
-        rows = load_rows()
-        results = build_results_from_rows(rows, text)
+        snap = await aload_snapshot()
+        new_sess = _new_session(snap, text)
+        old_sess = CHAT_CACHE.get(chat_id)
 
-        if not results:
+        if not new_sess.total:
             # eski sahifa bo'lsa o'chiramiz
-            cache = CHAT_CACHE.get(chat_id)
-            if cache and cache.get("page_msg_id"):
+            if old_sess and old_sess.page_msg_id:
                 try:
-                    await context.bot.delete_message(chat_id=chat_id, message_id=cache["page_msg_id"])
-                except:
+                    await OUTBOX.delete_message(context.bot, chat_id, old_sess.page_msg_id)
+                except Exception:
                     pass
-                cache["page_msg_id"] = None
-            await update.message.reply_text("❌ *Hech qanday ma'lumot topilmadi.*", parse_mode="Markdown")
+                old_sess.page_msg_id = None
+                CHAT_CACHE.save(chat_id, old_sess)
+            await OUTBOX.send_message(context.bot, chat_id, "❌ *Hech qanday ma'lumot topilmadi.*", parse_mode="Markdown")
             return
 
-        # cache ga saqlaymiz
-        CHAT_CACHE[chat_id] = {"query": text, "results": results, "page_msg_id": None, "page": 1}
+        # cache ga saqlaymiz (eski sahifa xabari send_page'da o'chiriladi)
+        if old_sess:
+            new_sess.page_msg_id = old_sess.page_msg_id
+        CHAT_CACHE.put(chat_id, new_sess)
         await send_page(chat_id, context, page=1)
         
     except Exception as e:
         logger.error(f"Search handler error: {e}")
+        METRICS.inc("handler_errors", handler="search")
         try:
-            await context.bot.send_message(chat_id=chat_id, text="❌ *Qidiruvda xatolik yuz berdi.*", parse_mode="Markdown")
-        except:
-            pass
+            await OUTBOX.send_message(context.bot, chat_id, "❌ *Qidiruvda xatolik yuz berdi.*", parse_mode="Markdown")
+        except Exception as send_error:
+            logger.error(f"Error sending error message: {send_error}")
 
 # ---------------- Sahifa yuborish (yangi xabar qilib) ----------------
 async def send_page(chat_id: int, context: ContextTypes.DEFAULT_TYPE, page: int):
     try:
-        cache = CHAT_CACHE.get(chat_id)
-        if not cache:
+        sess = CHAT_CACHE.get(chat_id)
+        if not sess:
+            await OUTBOX.send_message(context.bot, chat_id, EXPIRED_TEXT)
             return
-        results = cache["results"]
-        total, active, pct = _results_summary(results)
-        total_pages = max(1, (len(results) + PER_PAGE - 1)//PER_PAGE)
-        page = max(1, min(page, total_pages))
-        start = (page-1)*PER_PAGE
-        end = start + PER_PAGE
-        page_items = results[start:end]
-
-        header = (
-            f"📋 *Jami topilgan talabalar soni:* {total} ta\n"
-            f"🟢 *my.mehnat.uz da faol bo'lganlar soni:* {active} ta ({pct}%)\n"
-            f"📄 *Sahifalar:* {page}/{total_pages}\n\n"
-        )
-        text = header + format_results_block(page_items)
-
-        # avvalgi sahifa mavjud bo'lsa o'chiramiz
-        if cache.get("page_msg_id"):
-            try:
-                await context.bot.delete_message(chat_id=chat_id, message_id=cache["page_msg_id"])
-            except Exception:
-                pass
-            cache["page_msg_id"] = None
+        sess, store = await _session_results(chat_id, sess)
+        text, markup, page = _render_page(sess, store, page)
 
-        sent = await context.bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown", reply_markup=pagination_keyboard(page, total_pages))
-        cache["page_msg_id"] = sent.message_id
-        cache["page"] = page
-        CHAT_CACHE[chat_id] = cache
+        # avvalgi sahifa o'chirilib yangisi yuboriladi — navbatda bitta amal sifatida
+        # (hali yuborilmagan oldingi sahifa bilan birlashtiriladi)
+        sent = await OUTBOX.replace_message(
+            context.bot, chat_id, sess.page_msg_id, text, parse_mode="Markdown", reply_markup=markup,
+        )
+        sess.page_msg_id = sent.message_id
+        sess.page = page
+        CHAT_CACHE.save(chat_id, sess)
         
     except Exception as e:
         logger.error(f"Send page error: {e}")
+        METRICS.inc("handler_errors", handler="send_page")
 
 # ---------------- Inline pagination (callback) ----------------
+@METRICS.timed("handler", handler="pagination")
 async def inline_pagination_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         cq = update.callback_query
         if not cq:
             return
-        await cq.answer()
         data = cq.data  # format: "pg|<page>"
         try:
             _, raw_page = data.split("|", 1)
             page = int(raw_page)
         except Exception:
+            await cq.answer()
             return
 
         chat_id = cq.message.chat.id
-        cache = CHAT_CACHE.get(chat_id)
-        if not cache:
+        sess = CHAT_CACHE.get(chat_id)
+        if not sess:
+            # sessiya muddati o'tgan yoki chiqarib yuborilgan
+            await cq.answer(EXPIRED_TEXT, show_alert=True)
             return
+        await cq.answer()
 
         # Edit message to new page content
-        results = cache["results"]
-        total, active, pct = _results_summary(results)
-        total_pages = max(1, (len(results) + PER_PAGE - 1)//PER_PAGE)
-        page = max(1, min(page, total_pages))
-        start = (page-1)*PER_PAGE
-        end = start + PER_PAGE
-        page_items = results[start:end]
-
-        header = (
-            f"📋 *Jami topilgan talabalar soni:* {total} ta\n"
-            f"🟢 *my.mehnat.uz da faol bo'lganlar soni:* {active} ta ({pct}%)\n"
-            f"📄 *Sahifalar:* {page}/{total_pages}\n\n"
-        )
-        new_text = header + format_results_block(page_items)
+        sess, store = await _session_results(chat_id, sess)
+        new_text, markup, page = _render_page(sess, store, page)
 
         # Harakat: tahrir qilishga harakat qilamiz
         try:
-            await cq.edit_message_text(text=new_text, parse_mode="Markdown", reply_markup=pagination_keyboard(page, total_pages))
-            cache["page"] = page
-            CHAT_CACHE[chat_id] = cache
+            await OUTBOX.edit_message_text(
+                context.bot, chat_id, cq.message.message_id, new_text, parse_mode="Markdown", reply_markup=markup,
+            )
+            sess.page = page
+            CHAT_CACHE.save(chat_id, sess)
         except Exception:
             # agar edit mumkin bo'lmasa, tashqi yuboramiz (o'chirish va yangi yuborish)
             await send_page(chat_id, context, page)
             
     except Exception as e:
         logger.error(f"Inline pagination error: {e}")
+        METRICS.inc("handler_errors", handler="pagination")
+
+# ---------------- Inline qidiruv (@bot <ism>) ----------------
+@METRICS.timed("handler", handler="inline_query")
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    iq = update.inline_query
+    if not iq:
+        return
+    query = (iq.query or "").strip()
+
+    try:
+        if len(query) < INLINE_MIN_QUERY:
+            await iq.answer([], cache_time=INLINE_CACHE_TIME, is_personal=False)
+            return
+
+        snap = await aload_snapshot()
+        row_ids, _ = _cached_rows(snap, query)
+        results, next_offset = INLINE_RESULTS.page(snap.rows, snap.version, row_ids, iq.offset)
+
+        # Natijalar barcha foydalanuvchilar uchun bir xil — Telegram keshi takroriy so'rovlarni yutadi
+        await iq.answer(results, cache_time=INLINE_CACHE_TIME, is_personal=False, next_offset=next_offset)
+
+    except Exception as e:
+        logger.error(f"Inline query error: {e}")
+        METRICS.inc("handler_errors", handler="inline_query")
+        try:
+            await iq.answer([], cache_time=0)
+        except Exception:
+            pass
+
+# ---------------- Ommaviy qidiruv (CSV/TXT/XLSX fayl) ----------------
+def _log_progress_error(fut):
+    if not fut.cancelled() and fut.exception() is not None:
+        logger.warning(f"Bulk progress update failed: {fut.exception()}")
+
+@METRICS.timed("handler", handler="bulk_lookup")
+async def bulk_lookup(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    doc = update.message.document if update.message else None
+    if not doc:
+        return
+
+    kind = file_kind(doc.file_name)
+    if not kind:
+        await OUTBOX.send_message(context.bot, chat_id, "📎 Faqat *CSV*, *TXT* yoki *XLSX* fayl yuboring (birinchi ustunda HEMIS ID / JSHSHIR yoki FIO).", parse_mode="Markdown")
+        return
+
+    workdir = tempfile.mkdtemp(prefix="bulk-")
+    try:
+        status_msg = await OUTBOX.send_message(context.bot, chat_id, "⏳ Fayl qabul qilindi, qidirilmoqda...")
+        src = os.path.join(workdir, f"input.{kind}")
+        tg_file = await context.bot.get_file(doc.file_id)
+        await tg_file.download_to_drive(src)
+
+        # Natija kirish formatida: XLSX -> XLSX, qolganlari -> CSV
+        out_kind = "xlsx" if kind == "xlsx" else "csv"
+        dst = os.path.join(workdir, f"natijalar.{out_kind}")
+
+        snap = await aload_snapshot()
+        index = index_for(snap)
+        loop = asyncio.get_running_loop()
+        last_progress = None
+
+        def progress(n: int):
+            nonlocal last_progress
+            fut = asyncio.run_coroutine_threadsafe(
+                OUTBOX.edit_message_text(context.bot, chat_id, status_msg.message_id, f"⏳ Qayta ishlandi: {n} ta kalit..."),
+                loop,
+            )
+            fut.add_done_callback(_log_progress_error)
+            last_progress = fut
+
+        counts = await loop.run_in_executor(BULK_EXECUTOR, run_bulk, snap, index, src, kind, dst, out_kind, progress)
+        if last_progress is not None:
+            # oxirgi tahrir natija va status o'chirilishidan keyin kelmasligi uchun (xatosi callback'da)
+            await asyncio.wait([asyncio.wrap_future(last_progress)])
+
+        caption = (
+            f"✅ Kalitlar: {counts['keys']} ta\n"
+            f"🟢 Topildi: {counts['found']} ta\n"
+            f"🔴 Topilmadi: {counts['not_found']} ta"
+        )
+        if counts["truncated"]:
+            caption += f"\n⚠️ Faqat birinchi {counts['keys']} ta kalit qayta ishlandi."
+        with open(dst, "rb") as f:
+            await OUTBOX.send_document(context.bot, chat_id, f, filename=os.path.basename(dst), caption=caption)
+        try:
+            await OUTBOX.delete_message(context.bot, chat_id, status_msg.message_id)
+        except Exception:
+            pass
+
+    except ImportError as e:
+        logger.error(f"openpyxl import error: {e}")
+        METRICS.inc("handler_errors", handler="bulk_lookup")
+        await OUTBOX.send_message(context.bot, chat_id, "❌ *XLSX kutubxonasi mavjud emas, CSV yuboring.*", parse_mode="Markdown")
+    except Exception as e:
+        logger.error(f"Bulk lookup error: {e}")
+        METRICS.inc("handler_errors", handler="bulk_lookup")
+        try:
+            await OUTBOX.send_message(context.bot, chat_id, "❌ *Faylni qayta ishlashda xatolik yuz berdi.*", parse_mode="Markdown")
+        except Exception as send_error:
+            logger.error(f"Error sending error message: {send_error}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+async def _send_photo_cached(context, chat_id: int, key, caption: str, render, *args):
+    """Grafikni yuboradi: yuklangan bo'lsa file_id bilan, aks holda keshdagi/yangi chizilgan PNG."""
+    file_id = CHARTS.file_id(key)
+    METRICS.inc("cache", cache="chart_file_id", result="hit" if file_id else "miss")
+    if file_id:
+        try:
+            await OUTBOX.send_photo(context.bot, chat_id, file_id, caption=caption)
+            return
+        except Exception as e:
+            logger.warning(f"Cached chart file_id rejected: {e}")
+            CHARTS.forget_file_id(key)
+    png = await CHARTS.png(key, render, *args)
+    sent = await OUTBOX.send_photo(context.bot, chat_id, png, caption=caption)
+    if sent.photo:
+        CHARTS.set_file_id(key, sent.photo[-1].file_id)
+
+async def _send_trend_chart(context, chat_id: int, snap, args):
+    ok, sheet = await _resolve_sheet(context, chat_id, snap, args)
+    if not ok:
+        return
+    data = _trend_series(sheet)
+    if data is None:
+        await OUTBOX.send_message(context.bot, chat_id, NO_HISTORY, parse_mode="Markdown")
+        return
+    days, total, per_dir = data
+    labels = [date.fromordinal(d).strftime("%d.%m") for d in days]
+    series = {name or UNKNOWN: trend_pcts(values) for name, values in per_dir.items()}
+    caption = f"📈 Faollik dinamikasi — {sheet}" if sheet else "📈 Faollik dinamikasi"
+    # tarix kuniga bir marta o'zgaradi — kalitda bugungi kun ham bor
+    key = (snap.version, "trend", sheet or "", days[-1])
+    await _send_photo_cached(context, chat_id, key, caption, render_trend_chart, labels, series, trend_pcts(total))
 
 # ---------------- Grafik (Grafik tugmasi yoki /grafik) ----------------
+CHART_CAPTION = "📊 Yo'nalishlar kesimi bo'yicha taqsimot grafigi"
+
+def _direction_chart(snap, sheet: str = "", source=None):
+    """/grafik yo'nalishlar grafigi uchun (kalit, yorliqlar, qiymatlar) yoki ma'lumot bo'lmasa None."""
+    agg = aggregates_for(source or snap, sheet)
+    counts = agg.most_common(agg.per_dir)
+    if not counts:
+        return None
+    return (snap.version, "yunalish", sheet), [str(t[0]) for t in counts], [t[1] for t in counts]
+
+@METRICS.timed("handler", handler="grafik")
 async def grafik(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     
     try:
-        # Matplotlib import va setup
-        import matplotlib
-        matplotlib.use('Agg')  # Headless mode
-        import matplotlib.pyplot as plt
-        
         await context.bot.send_chat_action(chat_id=chat_id, action=ChatAction.UPLOAD_PHOTO)
 
-        rows = load_rows()
-        if len(rows) <= 1:
-            await context.bot.send_message(chat_id=chat_id, text="❌ *Grafik uchun ma'lumot topilmadi.*", parse_mode="Markdown")
+        snap = await aload_snapshot()
+        caption = CHART_CAPTION
+        source, sheet = snap, ""
+
+        args = getattr(context, "args", None)
+        if args and args[0].lower() == "trend":
+            # /grafik trend [varaq] — faollik dinamikasi (chiziqli grafik)
+            await _send_trend_chart(context, chat_id, snap, args[1:])
             return
-            
-        vals = [safe_cell(r, IDX_W) for r in rows[1:] if safe_cell(r, IDX_W)]
-        
-        if not vals:
-            await context.bot.send_message(chat_id=chat_id, text="❌ *Grafik uchun ma'lumot topilmadi.*", parse_mode="Markdown")
+        # /grafik <varaq> — bitta varaq (fakultet) bo'yicha
+        if args and _sheet_list(snap):
+            part = _sheet_part(snap, " ".join(args))
+            if part is None:
+                await OUTBOX.send_message(context.bot, chat_id, f"❌ Varaq topilmadi. Mavjud varaqlar: {_sheet_list(snap)}")
+                return
+            sheet, source = part
+            caption = f"{CHART_CAPTION} — {sheet}"
+        chart = _direction_chart(snap, sheet, source)
+        if chart is None:
+            await OUTBOX.send_message(context.bot, chat_id, "❌ *Grafik uchun ma'lumot topilmadi.*", parse_mode="Markdown")
             return
 
-        counts = Counter(vals).most_common()
-        labels = [str(t[0]) for t in counts]
-        data = [t[1] for t in counts]
+        key, labels, data = chart
+        # Shu versiya uchun grafik allaqachon yuklangan bo'lsa — file_id bilan yuboriladi
+        await _send_photo_cached(context, chat_id, key, caption, render_direction_chart, labels, data)
 
-        # Oddiy font sozlamalari
-        plt.rcParams['font.family'] = 'DejaVu Sans'
-        plt.rcParams['axes.unicode_minus'] = False
-        
-        # Grafik o'lchamlari
-        fig_width = max(10, min(16, len(labels) * 0.8))
-        fig_height = max(6, len(labels) * 0.4)
-        
-        plt.figure(figsize=(fig_width, fig_height), dpi=100)
-        
-        # Horizontal bar chart
-        colors = plt.cm.Set3(range(len(labels)))
-        bars = plt.barh(range(len(labels)), data, color=colors, alpha=0.8, edgecolor='black', linewidth=0.5)
-
-        # Labels va formatting
-        plt.yticks(range(len(labels)), labels, fontsize=10)
-        plt.xlabel("Talabalar soni", fontsize=11, fontweight='bold')
-        plt.title("📊 Yo'nalishlar bo'yicha taqsimot", fontsize=13, fontweight='bold', pad=15)
-        plt.grid(axis="x", linestyle="--", alpha=0.5)
-
-        # Values on bars
-        max_val = max(data) if data else 1
-        for bar, val in zip(bars, data):
-            plt.text(bar.get_width() + max_val * 0.01, 
-                    bar.get_y() + bar.get_height()/2,
-                    str(val), ha="left", va="center", fontsize=9, fontweight="bold")
-
-        plt.tight_layout()
-        
-        # File path - /tmp/ o'rniga current directory
-        file_name = f"grafik_{uuid.uuid4().hex}.png"
-        plt.savefig(file_name, bbox_inches="tight", facecolor='white', dpi=100)
-        plt.close()
-        
-        # Send photo
-        with open(file_name, "rb") as photo:
-            await context.bot.send_photo(
-                chat_id=chat_id, 
-                photo=photo, 
-                caption="📊 Yo'nalishlar kesimi bo'yicha taqsimot grafigi"
-            )
-        
-        # Cleanup
-        if os.path.exists(file_name):
-            os.remove(file_name)
-            
     except ImportError as e:
         logger.error(f"Matplotlib import error: {e}")
-        await context.bot.send_message(
-            chat_id=chat_id, 
-            text="❌ *Grafik kutubxonasi mavjud emas.*", 
+        METRICS.inc("handler_errors", handler="grafik")
+        await OUTBOX.send_message(
+            context.bot, chat_id,
+            "❌ *Grafik kutubxonasi mavjud emas.*", 
             parse_mode="Markdown"
         )
     except Exception as e:
-        logger.error(f"Grafik error: {e}", exc_info=True)
+        logger.error(f"Grafik error: {e}")
+        METRICS.inc("handler_errors", handler="grafik")
         try:
-            await context.bot.send_message(
-                chat_id=chat_id, 
-                text="❌ *Grafik yaratishda xatolik yuz berdi. Iltimos, qaytadan urinib ko'ring.*", 
+            await OUTBOX.send_message(
+                context.bot, chat_id,
+                "❌ *Grafik yaratishda xatolik yuz berdi. Iltimos, qaytadan urinib ko'ring.*", 
                 parse_mode="Markdown"
             )
         except Exception as send_error:
             logger.error(f"Error sending error message: {send_error}")
+
+# ---------------- Hisobot (/report [pdf|xlsx] [varaq]) ----------------
+def _report_status() -> str:
+    jobs = REPORTS.jobs()
+    if not jobs:
+        return "📋 Hisobotlar navbati bo'sh."
+    now = time.monotonic()
+    lines = [f"📋 Hisobotlar: {len(jobs)} ta ish"]
+    for job in jobs:
+        _, sheet, fmt = job.key
+        if job.state == "running":
+            state = f"tayyorlanmoqda, {now - job.started:.0f} s"
+        else:
+            state = f"navbatda, {REPORTS.position(job)}-o'rin"
+        lines.append(f"• {fmt.upper()}{' — ' + sheet if sheet else ''}: {state}")
+    return "\n".join(lines)
+
+@METRICS.timed("handler", handler="report")
+async def report(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+
+    try:
+        args = list(getattr(context, "args", None) or [])
+        if args and args[0].lower() in ("holat", "status"):
+            await OUTBOX.send_message(context.bot, chat_id, _report_status())
+            return
+        fmt = report_format(args[0]) if args else None
+        if fmt is not None:
+            args = args[1:]
+        fmt = fmt or "pdf"
+
+        snap = await aload_snapshot()
+        if not len(snap.rows):
+            await OUTBOX.send_message(context.bot, chat_id, "❌ *Jadval bo'sh.*", parse_mode="Markdown")
+            return
+        ok, sheet = await _resolve_sheet(context, chat_id, snap, args)
+        if not ok:
+            return
+        source = _sheet_part(snap, sheet)[1] if sheet else snap
+        key = (snap.version, sheet or "", fmt)
+        filename = report_filename(fmt, sheet or "")
+        caption = f"📄 Statistika hisoboti{' — ' + sheet if sheet else ''}"
+
+        # Shu versiya uchun hisobot allaqachon yuklangan bo'lsa — file_id bilan yuboriladi
+        file_id = REPORTS.file_id(key)
+        METRICS.inc("cache", cache="report_file_id", result="hit" if file_id else "miss")
+        if file_id:
+            try:
+                await OUTBOX.send_document(context.bot, chat_id, file_id, caption=caption)
+                return
+            except Exception as e:
+                logger.warning(f"Cached report file_id rejected: {e}")
+                REPORTS.forget_file_id(key)
+
+        data = REPORTS.cached(key)
+        METRICS.inc("cache", cache="report_file", result="hit" if data is not None else "miss")
+        if data is None:
+            title = f"Talabalar statistikasi{' — ' + sheet if sheet else ''}"
+            job = REPORTS.submit(key, build_report, fmt, aggregates_for(source, sheet or ""), title)
+            position = REPORTS.position(job)
+            status_msg = await OUTBOX.send_message(
+                context.bot, chat_id,
+                f"⏳ Hisobot navbatda ({position}-o'rin)..." if position else "⏳ Hisobot tayyorlanmoqda...",
+            )
+            try:
+                data = await REPORTS.result(job)
+            finally:
+                try:
+                    await OUTBOX.delete_message(context.bot, chat_id, status_msg.message_id)
+                except Exception:
+                    pass
+
+        await context.bot.send_chat_action(chat_id=chat_id, action=ChatAction.UPLOAD_DOCUMENT)
+        sent = await OUTBOX.send_document(context.bot, chat_id, data, filename=filename, caption=caption)
+        if getattr(sent, "document", None):
+            REPORTS.set_file_id(key, sent.document.file_id)
+
+    except ReportBusy as e:
+        logger.warning(f"Report queue full: {e}")
+        METRICS.inc("handler_errors", handler="report")
+        await OUTBOX.send_message(context.bot, chat_id, "⏳ *Hisobotlar navbati band, birozdan so'ng urinib ko'ring.*", parse_mode="Markdown")
+    except ImportError as e:
+        logger.error(f"Report import error: {e}")
+        METRICS.inc("handler_errors", handler="report")
+        await OUTBOX.send_message(context.bot, chat_id, "❌ *Hisobot kutubxonasi mavjud emas.*", parse_mode="Markdown")
+    except Exception as e:
+        logger.error(f"Report handler error: {e}")
+        METRICS.inc("handler_errors", handler="report")
+        try:
+            await OUTBOX.send_message(context.bot, chat_id, "❌ *Hisobot yaratishda xatolik yuz berdi.*", parse_mode="Markdown")
+        except Exception as send_error:
+            logger.error(f"Error sending error message: {send_error}")
+
+# ---------------- Oldindan isitish (rejali yangilash va /reload) ----------------
+# Yangilash va isitish bir vaqtda bitta — rejali ish va /reload bir-birini kutadi
+_RELOAD_LOCK = asyncio.Lock()
+
+# Oxirgi isitilgan snapshot versiyasi va davomiyligi (/health, /metrics)
+PREWARM = {"version": 0, "runs": 0, "last_ms": 0.0}
+
+def _prewarm_data(snap):
+    """Digest, qidiruv/fuzzy indekslari, agregatlar va /stat matnlari (executor oqimida, event loop'dan tashqarida)."""
+    snap.rows.digest
+    index_for(snap)
+    fuzzy_for(snap)
+    _stat_text(snap)
+    if isinstance(snap.rows, MultiStore):
+        for name, part in snap.rows.parts:
+            _stat_text(part, name)
+
+
+async def prewarm(snap) -> bool:
+    """Snapshot versiyasi uchun kesh'larni isitadi; bu versiya allaqachon isitilgan bo'lsa False.
+
+    Indeks va agregatlar odatda ``sheets`` tomonidan versiya e'lon qilinishidan
+    oldin quriladi — bu yerda umumiy (bir nechta varaqli) ko'rinish, /stat
+    matni va /grafik rasmi tayyorlanadi.
+    """
+    if PREWARM["version"] == snap.version:
+        return False
+    t0 = time.perf_counter()
+    await asyncio.get_running_loop().run_in_executor(None, _prewarm_data, snap)
+    chart = _direction_chart(snap)
+    if chart is not None:
+        key, labels, data = chart
+        try:
+            await CHARTS.png(key, render_direction_chart, labels, data)
+        except ImportError as e:
+            logger.warning(f"Prewarm: chart skipped ({e})")
+    PREWARM.update(version=snap.version, runs=PREWARM["runs"] + 1, last_ms=round((time.perf_counter() - t0) * 1000, 1))
+    logger.info(f"Prewarmed snapshot v{snap.version} in {PREWARM['last_ms']:.0f} ms")
+    return True
+
+async def refresh_and_prewarm():
+    """Jadvalni majburan yangilab, yangi versiya kesh'larini isitadi: (snapshot, xatolar, isitildimi)."""
+    async with _RELOAD_LOCK:
+        snap, errors = await arefresh_snapshot()
+        return snap, errors, await prewarm(snap)
+
+async def refresh_job(context: ContextTypes.DEFAULT_TYPE):
+    """Application.job_queue uchun rejali yangilash."""
+    try:
+        with METRICS.span("refresh_job"):
+            await refresh_and_prewarm()
+    except Exception as e:
+        logger.error(f"Refresh job error: {e}")
+        METRICS.inc("handler_errors", handler="refresh_job")
+
+@METRICS.timed("handler", handler="reload")
+async def reload(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    chat_id = update.effective_chat.id
+    user = getattr(update, "effective_user", None)
+    if user is None or user.id not in ADMIN_IDS:
+        await OUTBOX.send_message(context.bot, chat_id, "⛔ Bu buyruq faqat administratorlar uchun.")
+        return
+
+    try:
+        status_msg = await OUTBOX.send_message(context.bot, chat_id, "⏳ Jadval yangilanmoqda...")
+        t0 = time.perf_counter()
+        snap, errors, warmed = await refresh_and_prewarm()
+        text = (
+            f"✅ Jadval v{snap.version}: {len(snap.rows)} qator, {time.perf_counter() - t0:.1f} s."
+            + ("" if warmed else " Yangi versiya yo'q — kesh'lar tayyor.")
+        )
+        for name, error in errors.items():
+            text += f"\n⚠️ {name}: {error}"
+        await OUTBOX.edit_message_text(context.bot, chat_id, status_msg.message_id, text)
+
+    except Exception as e:
+        logger.error(f"Reload handler error: {e}")
+        METRICS.inc("handler_errors", handler="reload")
+        try:
+            await OUTBOX.send_message(context.bot, chat_id, "❌ *Jadvalni yangilashda xatolik yuz berdi.*", parse_mode="Markdown")
+        except Exception as send_error:
+            logger.error(f"Error sending error message: {send_error}")
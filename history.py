@@ -0,0 +1,181 @@
+import time
+import sqlite3
+import logging
+import threading
+from datetime import date
+from typing import Dict, List, Tuple
+
+from config import HISTORY_DB_PATH
+from aggregates import Aggregates
+
+logger = logging.getLogger(__name__)
+
+# Kalit turlari: varaq bo'yicha jami, yo'nalish (W ustuni), guruh
+TOTAL, DIRECTION, GROUP = "total", "dir", "group"
+
+
+def today() -> int:
+    """Kun raqami (``date.toordinal``) — tarixdagi vaqt birligi."""
+    return date.today().toordinal()
+
+
+class HistoryStore:
+    """Agregatlar tarixi: SQLite, faqat qo'shiladi.
+
+    Har bir (varaq, tur, nom) kaliti ``keys`` jadvalida bir marta saqlanadi;
+    ``points`` ga esa faqat qiymati o'zgargan kalitlar yoziladi (kun, jami,
+    faol). Kunning oxirgi qiymati o'sha kun nuqtasini almashtiradi, o'tgan
+    kunlar o'zgarmaydi. Nuqta bo'lmagan kun — "o'zgarmagan" degani, shuning
+    uchun ``series`` har bir kun uchun undan oldingi oxirgi qiymatni oladi.
+    Yo'qolgan kalit (masalan, yo'nalish o'chirilgan) 0 qiymat bilan yoziladi.
+    """
+
+    def __init__(self, path: str = HISTORY_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS keys ("
+            " id INTEGER PRIMARY KEY, sheet TEXT NOT NULL, kind TEXT NOT NULL, name TEXT NOT NULL,"
+            " UNIQUE (sheet, kind, name))"
+        )
+        # (key_id, day) bo'yicha klasterlangan — bitta kalit tarixi ketma-ket o'qiladi
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS points ("
+            " key_id INTEGER NOT NULL, day INTEGER NOT NULL, total INTEGER NOT NULL, active INTEGER NOT NULL,"
+            " PRIMARY KEY (key_id, day)) WITHOUT ROWID"
+        )
+        self._keys: Dict[Tuple[str, str, str], int] = {}
+        self._last: Dict[int, Tuple[int, int]] = {}  # key_id -> oxirgi (jami, faol)
+        self._load()
+        self.recorded = 0
+
+    def _load(self):
+        for key_id, sheet, kind, name in self._conn.execute("SELECT id, sheet, kind, name FROM keys"):
+            self._keys[(sheet, kind, name)] = key_id
+        for key_id, total, active in self._conn.execute(
+            "SELECT p.key_id, p.total, p.active FROM points p"
+            " JOIN (SELECT key_id, MAX(day) AS day FROM points GROUP BY key_id) m"
+            " ON p.key_id = m.key_id AND p.day = m.day"
+        ):
+            self._last[key_id] = (total, active)
+
+    def _key_id(self, sheet: str, kind: str, name: str) -> int:
+        key = (sheet, kind, name)
+        key_id = self._keys.get(key)
+        if key_id is None:
+            cur = self._conn.execute("INSERT INTO keys (sheet, kind, name) VALUES (?, ?, ?)", key)
+            key_id = self._keys[key] = cur.lastrowid
+        return key_id
+
+    def record(self, agg: Aggregates, sheet: str = "", day: int = None) -> int:
+        """Varaq agregatlarini ``day`` (standart — bugun) uchun yozadi; yozilgan nuqtalar soni."""
+        day = today() if day is None else day
+        values = {(TOTAL, ""): (agg.total, agg.active)}
+        for kind, table in ((DIRECTION, agg.per_dir), (GROUP, agg.per_group)):
+            for name, (tot, act) in table.items():
+                values[(kind, name)] = (tot, act)
+        with self._lock:
+            points = []
+            seen = set()
+            self._conn.execute("BEGIN")
+            try:
+                for (kind, name), value in values.items():
+                    key_id = self._key_id(sheet, kind, name)
+                    seen.add(key_id)
+                    if self._last.get(key_id) != value:
+                        points.append((key_id, day) + value)
+                for (s, _, _), key_id in self._keys.items():
+                    # bu varaqda endi yo'q kalitlar
+                    if s == sheet and key_id not in seen and self._last.get(key_id, (0, 0)) != (0, 0):
+                        points.append((key_id, day, 0, 0))
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO points (key_id, day, total, active) VALUES (?, ?, ?, ?)", points,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            for key_id, _, total, active in points:
+                self._last[key_id] = (total, active)
+            self.recorded += len(points)
+        return len(points)
+
+    def series(self, kind: str, days: List[int], sheet: str = None) -> Dict[str, List[Tuple[int, int]]]:
+        """``days`` (o'sish tartibida) kunlari holatiga (jami, faol) qiymatlar: nom -> ro'yxat.
+
+        ``sheet`` berilmasa barcha varaqlar yig'indisi.
+        """
+        if not days:
+            return {}
+        first, last = days[0], days[-1]
+        with self._lock:
+            key_names = {
+                key_id: name for (s, k, name), key_id in self._keys.items()
+                if k == kind and (sheet is None or s == sheet)
+            }
+            if not key_names:
+                return {}
+            marks = ",".join("?" * len(key_names))
+            ids = list(key_names)
+            # oyna boshidagi holat (undan oldingi oxirgi nuqta) + oynadagi nuqtalar
+            rows = self._conn.execute(
+                f"SELECT p.key_id, p.day, p.total, p.active FROM points p"
+                f" JOIN (SELECT key_id, MAX(day) AS day FROM points"
+                f"       WHERE day < ? AND key_id IN ({marks}) GROUP BY key_id) m"
+                f" ON p.key_id = m.key_id AND p.day = m.day"
+                f" UNION ALL"
+                f" SELECT key_id, day, total, active FROM points"
+                f" WHERE day BETWEEN ? AND ? AND key_id IN ({marks})"
+                f" ORDER BY 1, 2",
+                [first, *ids, first, last, *ids],
+            ).fetchall()
+
+        out: Dict[str, List[List[int]]] = {}
+        i, n = 0, len(rows)
+        while i < n:
+            key_id = rows[i][0]
+            acc = out.setdefault(key_names[key_id], [[0, 0] for _ in days])
+            value = (0, 0)
+            for pos, day in enumerate(days):
+                while i < n and rows[i][0] == key_id and rows[i][1] <= day:
+                    value = rows[i][2:]
+                    i += 1
+                acc[pos][0] += value[0]
+                acc[pos][1] += value[1]
+            while i < n and rows[i][0] == key_id:
+                i += 1
+        return {name: [tuple(v) for v in values] for name, values in out.items()}
+
+    def stats(self) -> dict:
+        with self._lock:
+            points, first, last = self._conn.execute("SELECT COUNT(*), MIN(day), MAX(day) FROM points").fetchone()
+        return {
+            "keys": len(self._keys),
+            "points": points,
+            "days": (last - first + 1) if points else 0,
+            "recorded": self.recorded,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_HISTORY = None
+_HISTORY_LOCK = threading.Lock()
+
+
+def history():
+    """Umumiy tarix ombori (HISTORY_DB_PATH bo'sh bo'lsa None) — birinchi murojaatda ochiladi."""
+    global _HISTORY
+    if not HISTORY_DB_PATH:
+        return None
+    with _HISTORY_LOCK:
+        if _HISTORY is None:
+            t0 = time.perf_counter()
+            _HISTORY = HistoryStore()
+            logger.info(f"History store {HISTORY_DB_PATH} opened in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        return _HISTORY
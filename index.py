@@ -0,0 +1,281 @@
+import copy
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, List
+
+from records import Student, StudentStore
+from versioned import VersionedCache
+
+NGRAM = 3
+_SEP = "\x00"
+_NO_KEYS = ("", "", "", "")
+
+
+def _blob(parts: List[str]):
+    """Qismlarni bitta satrga yig'adi va har birining boshlanish pozitsiyasini qaytaradi."""
+    starts = []
+    pos = 0
+    for p in parts:
+        starts.append(pos)
+        pos += len(p) + 1
+    return _SEP.join(parts), starts
+
+
+def _discard(postings: array, pos: int):
+    """Saralangan posting'dan ``pos`` ni o'chiradi (``remove()`` butun massivni Python darajasida solishtiradi)."""
+    del postings[bisect_left(postings, pos)]
+
+
+def grams(text: str):
+    return {text[j:j + NGRAM] for j in range(len(text) - NGRAM + 1)}
+
+
+def _keys(rec: Student):
+    """Qidiriladigan maydonlar (kichik harflarda): uid, fio, hemis, jshshir."""
+    return rec.hemisuid.lower(), rec.fio.lower(), rec.hemis.lower(), rec.jshshir.lower()
+
+
+def _scan_blob(blob: str, starts: List[int], q: str, limit: int = None) -> List[int]:
+    """blob ichida q ni C tezligida qidiradi, mos kelgan qism raqamlarini qaytaradi (``limit`` tagacha)."""
+    res = []
+    i = blob.find(q)
+    while i != -1 and len(res) != limit:
+        p = bisect_right(starts, i) - 1
+        res.append(p)
+        nxt = starts[p + 1] if p + 1 < len(starts) else len(blob)
+        i = blob.find(q, nxt)
+    return res
+
+
+def normalize_query(query: str) -> str:
+    """Qidiruv semantikasi bo'yicha teng so'rovlar uchun bir xil kalit."""
+    return (query or "").strip().lower()
+
+
+def scan_rows(store: StudentStore, query: str) -> List[int]:
+    """Eski chiziqli qidiruv (etalon). Mos kelgan yozuvlar o'rnini qaytaradi."""
+    q = (query or "").strip().lower()
+    if not q:
+        return []
+    res = []
+    for rec in store:
+        fio, hemis, jsh, hemisuid = rec.fio, rec.hemis, rec.jshshir, rec.hemisuid
+        if not (fio or hemis or jsh or hemisuid):
+            continue
+        if q in fio.lower() or q in hemis.lower() or q in jsh.lower() or q in hemisuid.lower():
+            res.append(rec.row)
+    return res
+
+
+class SearchIndex:
+    """Bitta snapshot uchun bir marta quriladigan qidiruv indeksi.
+
+    - HEMIS UID / HEMIS ID / JSHSHIR bo'yicha aniq moslik uchun hash-map'lar;
+    - FIO uchun trigram indeks: 3+ belgili so'rovda faqat eng kam uchraydigan
+      trigram nomzodlari tekshiriladi;
+    - ID ustunlari va qisqa so'rovlar bitta satrga yig'ilgan blob ustida
+      ``str.find`` bilan qidiriladi.
+
+    ``search`` natijasi ``scan_rows`` bilan bir xil (substring semantikasi, qator tartibi).
+    """
+
+    def __init__(self, store: StudentStore, version: int = 0):
+        self.version = version
+        self.row_ids: List[int] = []
+        self.by_uid: Dict[str, List[int]] = {}
+        self.by_hemis: Dict[str, List[int]] = {}
+        self.by_jsh: Dict[str, List[int]] = {}
+
+        fio_parts = []
+        id_parts = []
+        gram_map = {}
+        for rec in store:
+            i = rec.row
+            hemisuid, fio, hemis, jsh = _keys(rec)
+            if not (fio or hemis or jsh or hemisuid):
+                continue
+
+            pos = len(self.row_ids)
+            self.row_ids.append(i)
+            fio_parts.append(fio)
+            id_parts.append(f"{hemisuid}{_SEP}{hemis}{_SEP}{jsh}")
+
+            for key, table in ((hemisuid, self.by_uid), (hemis, self.by_hemis), (jsh, self.by_jsh)):
+                if key:
+                    table.setdefault(key, []).append(i)
+
+            for g in grams(fio):
+                gram_map.setdefault(g, []).append(pos)
+
+        self._fio = fio_parts
+        self._ids = id_parts
+        self._grams = {g: array("I", p) for g, p in gram_map.items()}
+        self._build_blobs()
+
+    def _build_blobs(self):
+        self._fio_blob, self._fio_starts = _blob(self._fio)
+        self._id_blob, self._id_starts = _blob(self._ids)
+
+    def updated(self, old: StudentStore, new: StudentStore, changed: List[int], version: int):
+        """Faqat ``changed`` o'rinlarini qayta indekslab yangi indeks qaytaradi.
+
+        Eski indeks o'zgarmaydi (parallel qidiruvlar uni ishlatishi mumkin):
+        tegilgan posting'lar nusxa olinib yangilanadi. Oxiriga qo'shilgan
+        qatorlar indeksga qo'shiladi, kesilganlari olib tashlanadi; o'rtadagi
+        yozuv bo'sh/bo'sh emas holatini almashtirgan bo'lsa None — bunday
+        holda indeksni noldan qurish kerak.
+        """
+        common = min(len(old), len(new))
+        idx = copy.copy(self)
+        idx.version = version
+        if len(old) != len(new):
+            idx.row_ids = list(self.row_ids)
+        idx._fio = list(self._fio)
+        idx._ids = list(self._ids)
+        idx._grams = dict(self._grams)
+        idx.by_uid, idx.by_hemis, idx.by_jsh = dict(self.by_uid), dict(self.by_hemis), dict(self.by_jsh)
+        touched_grams = set()
+        touched_keys = set()
+
+        def postings(g):
+            if g not in touched_grams:
+                touched_grams.add(g)
+                idx._grams[g] = array("I", idx._grams.get(g, ()))
+            return idx._grams[g]
+
+        def rows_for(table, key):
+            tk = (id(table), key)
+            if tk not in touched_keys:
+                touched_keys.add(tk)
+                table[key] = list(table.get(key, ()))
+            return table[key]
+
+        for row in changed:
+            o_uid, o_fio, o_hemis, o_jsh = _keys(old[row]) if row < len(old) else _NO_KEYS
+            n_uid, n_fio, n_hemis, n_jsh = _keys(new[row]) if row < len(new) else _NO_KEYS
+            o_has = bool(o_fio or o_hemis or o_jsh or o_uid)
+            n_has = bool(n_fio or n_hemis or n_jsh or n_uid)
+            if o_has != n_has and row < common:
+                return None
+            if not (o_has or n_has):
+                continue
+            if o_has:
+                pos = bisect_left(self.row_ids, row)
+            else:
+                # qo'shilgan qator: o'rni oxirida, bo'sh kalitlardan yangilanadi
+                pos = len(idx.row_ids)
+                idx.row_ids.append(row)
+                idx._fio.append("")
+                idx._ids.append("")
+
+            for table, o_key, n_key in ((idx.by_uid, o_uid, n_uid), (idx.by_hemis, o_hemis, n_hemis),
+                                        (idx.by_jsh, o_jsh, n_jsh)):
+                if o_key == n_key:
+                    continue
+                if o_key:
+                    lst = rows_for(table, o_key)
+                    lst.remove(row)
+                    if not lst:
+                        del table[o_key]
+                if n_key:
+                    lst = rows_for(table, n_key)
+                    lst.insert(bisect_left(lst, row), row)
+
+            o_grams, n_grams = grams(o_fio), grams(n_fio)
+            for g in o_grams - n_grams:
+                p = postings(g)
+                _discard(p, pos)
+                if not p:
+                    del idx._grams[g]
+                    touched_grams.discard(g)
+            for g in n_grams - o_grams:
+                p = postings(g)
+                p.insert(bisect_left(p, pos), pos)
+
+            idx._fio[pos] = n_fio
+            idx._ids[pos] = f"{n_uid}{_SEP}{n_hemis}{_SEP}{n_jsh}"
+
+        if len(new) < len(old):
+            # kesilgan qatorlar o'rinlari oxirida — kalitlari yuqorida olib tashlandi
+            keep = bisect_left(idx.row_ids, len(new))
+            idx.row_ids, idx._fio, idx._ids = idx.row_ids[:keep], idx._fio[:keep], idx._ids[:keep]
+        idx._build_blobs()
+        return idx
+
+    def __len__(self):
+        return len(self.row_ids)
+
+    def lookup(self, key: str) -> List[int]:
+        """Aniq ID (HEMIS UID, HEMIS ID yoki JSHSHIR) bo'yicha yozuvlar o'rni."""
+        k = (key or "").strip().lower()
+        if not k:
+            return []
+        hits = set()
+        for table in (self.by_uid, self.by_hemis, self.by_jsh):
+            hits.update(table.get(k, ()))
+        return sorted(hits)
+
+    def _fio_hits(self, q: str):
+        if len(q) < NGRAM:
+            return _scan_blob(self._fio_blob, self._fio_starts, q)
+        postings = []
+        for g in grams(q):
+            p = self._grams.get(g)
+            if p is None:
+                return []
+            postings.append(p)
+        fio = self._fio
+        return [p for p in min(postings, key=len) if q in fio[p]]
+
+    def search(self, query: str) -> List[int]:
+        """Substring qidiruv; mos yozuvlar o'rnini (store bo'yicha) o'sish tartibida qaytaradi."""
+        q = normalize_query(query)
+        if not q or _SEP in q:
+            return []
+        hits = set(_scan_blob(self._id_blob, self._id_starts, q))
+        hits.update(self._fio_hits(q))
+        row_ids = self.row_ids
+        return [row_ids[p] for p in sorted(hits)]
+
+
+class CombinedIndex:
+    """Bir nechta varaq indekslari ustidan qidiruv (``MultiStore`` row id'lari bilan).
+
+    Har bir varaq o'z indeksiga ega (alohida quriladi va yangilanadi);
+    natijalar varaq offseti qo'shilib, varaqlar tartibida birlashtiriladi.
+    """
+
+    def __init__(self, parts, version: int = 0):
+        self.version = version
+        self.parts = parts  # [(offset, SearchIndex)]
+
+    def _merge(self, method: str, query: str) -> List[int]:
+        res = []
+        for offset, idx in self.parts:
+            rows = getattr(idx, method)(query)
+            if rows:
+                res.extend(offset + i for i in rows) if offset else res.extend(rows)
+        return res
+
+    def search(self, query: str) -> List[int]:
+        return self._merge("search", query)
+
+    def lookup(self, key: str) -> List[int]:
+        return self._merge("lookup", key)
+
+
+# O'zgargan yozuvlar shu ulushdan oshsa indeks noldan quriladi
+REBUILD_RATIO = 0.1
+
+_CACHE = VersionedCache(
+    SearchIndex,
+    update=lambda idx, old, new, changed, version: idx.updated(old, new, changed, version),
+    combine=lambda store, parts, version: CombinedIndex(
+        [(off, idx) for off, (_, idx) in zip(store.offsets, parts)], version),
+    rebuild_ratio=REBUILD_RATIO,
+)
+
+
+def index_for(snapshot, key: str = ""):
+    """Snapshot versiyasiga mos qidiruv indeksi (``key`` — varaq nomi)."""
+    return _CACHE.get(snapshot, key)
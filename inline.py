@@ -0,0 +1,82 @@
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from telegram import InlineQueryResultArticle, InputTextMessageContent
+
+from config import INLINE_PAGE_SIZE, INLINE_CARD_CACHE
+from formatters import format_card, _status_icon
+from records import Student
+
+
+class InlineResults:
+    """Inline rejim (``@bot <ism>``) uchun tayyor natija obyektlari keshi.
+
+    Har bir yozuv uchun ``format_card`` bilan chizilgan karta va
+    ``InlineQueryResultArticle`` snapshot versiyasi bo'yicha bir marta
+    quriladi; versiya o'zgarsa kesh tozalanadi. Hajm ``max_entries`` bilan
+    cheklangan (LRU).
+    """
+
+    def __init__(self, max_entries: int = INLINE_CARD_CACHE, page_size: int = INLINE_PAGE_SIZE):
+        self.max_entries = max_entries
+        # Telegram bitta javobda 50 tadan ortiq natija qabul qilmaydi
+        self.page_size = max(1, min(page_size, 50))
+        self._lock = threading.Lock()
+        self._version = None
+        self._articles = OrderedDict()  # row -> InlineQueryResultArticle
+        self.hits = 0
+        self.misses = 0
+
+    def _build(self, row: int, rec: Student, version: int, sheet: str) -> InlineQueryResultArticle:
+        description = " · ".join(p for p in (sheet, rec.guruh, rec.yunalish) if p)
+        return InlineQueryResultArticle(
+            id=f"{version}:{row}",
+            title=f"{_status_icon(rec.active)} {rec.fio or rec.hemis or rec.jshshir}",
+            description=f"{description}\n{rec.status}" if description else rec.status,
+            input_message_content=InputTextMessageContent(format_card(rec, sheet), parse_mode="Markdown"),
+        )
+
+    def article(self, row: int, rec: Student, version: int, sheet: str = "") -> InlineQueryResultArticle:
+        """``row`` — store'dagi o'rin (bir nechta varaqda umumiy row id)."""
+        with self._lock:
+            if version != self._version:
+                self._articles.clear()
+                self._version = version
+            art = self._articles.get(row)
+            if art is not None:
+                self._articles.move_to_end(row)
+                self.hits += 1
+                return art
+        art = self._build(row, rec, version, sheet)
+        with self._lock:
+            self.misses += 1
+            if version == self._version:
+                self._articles[row] = art
+                while len(self._articles) > self.max_entries:
+                    self._articles.popitem(last=False)
+        return art
+
+    def page(self, store, version: int, row_ids: List[int], offset: str) -> Tuple[list, str]:
+        """``offset`` dan boshlab bitta sahifa natija va keyingi offset ("" — oxiri)."""
+        try:
+            start = max(0, int(offset or 0))
+        except ValueError:
+            start = 0
+        end = start + self.page_size
+        sheet_of = getattr(store, "sheet_of", None)
+        results = [
+            self.article(i, store[i], version, sheet_of(i) if sheet_of else "")
+            for i in row_ids[start:end]
+        ]
+        next_offset = str(end) if end < len(row_ids) else ""
+        return results, next_offset
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "version": self._version,
+                "entries": len(self._articles),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -1,9 +1,7 @@
 import os
 import logging
-import asyncio
-from flask import Flask, request
-from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackQueryHandler
+from flask import Flask, request, abort
+from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackQueryHandler, InlineQueryHandler
 
 # Logging setup BIRINCHI
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -11,39 +9,94 @@ logger = logging.getLogger(__name__)
 
 # Import handlers
 try:
-    from handlers import start, search, stat, grafik, inline_pagination_handler
+    from handlers import start, search, stat, trend, grafik, follow, unfollow, inline_pagination_handler, inline_query, bulk_lookup, start_follow_notifier, report, reload, refresh_job, PREWARM, CHAT_CACHE, INLINE_RESULTS, OUTBOX, RENDERED, QUERY_CACHE, REPORTS
     logger.info("Handlers successfully imported")
 except Exception as e:
     logger.error(f"Handler import error: {e}")
     raise
 
+from config import REFRESH_INTERVAL
+from pipeline import UpdatePipeline
+from metrics import METRICS, UpdateProfiler
+from sheets import SNAPSHOT, warm_start
+from history import history
+from follow import follows
+
 # Bot token
 TOKEN = os.getenv("BOT_TOKEN")
 WEBHOOK_URL = os.getenv("WEBHOOK_URL")
 
+# Webhook pipeline sozlamalari
+WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", 8))
+WEBHOOK_QUEUE_SIZE = int(os.getenv("WEBHOOK_QUEUE_SIZE", 256))
+
+# /debug/profile uchun maxfiy token (bo'lmasa endpoint o'chiq); faqat webhook rejimida
+DEBUG_TOKEN = os.getenv("DEBUG_TOKEN")
+
 if not TOKEN:
     raise ValueError("BOT_TOKEN not found!")
 
 # Flask app
 app = Flask(__name__)
 
+async def _post_init(bot_app: Application):
+    """Polling rejimi: fon vazifalari application loop'ida ishga tushadi."""
+    start_follow_notifier(bot_app.bot)
+
 # Bot application
-application = Application.builder().token(TOKEN).build()
+application = Application.builder().token(TOKEN).post_init(_post_init).build()
 
 # Add handlers with error handling
 try:
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("stat", stat))
+    application.add_handler(CommandHandler("trend", trend))
     application.add_handler(CommandHandler("grafik", grafik))
+    application.add_handler(CommandHandler("report", report))
+    application.add_handler(CommandHandler("follow", follow))
+    application.add_handler(CommandHandler("unfollow", unfollow))
+    application.add_handler(CommandHandler("reload", reload))
     application.add_handler(CallbackQueryHandler(inline_pagination_handler, pattern=r"^pg\|"))
+    application.add_handler(InlineQueryHandler(inline_query))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, search))
+    application.add_handler(MessageHandler(filters.Document.ALL, bulk_lookup))
     logger.info("All handlers added successfully")
 except Exception as e:
     logger.error(f"Error adding handlers: {e}")
     raise
 
+# Jadval muntazam yangilanadi, yangi versiya kesh'lari (indeks, /stat, /grafik) oldindan isitiladi;
+# birinchi ishga tushish diskdagi snapshot yuklangandan so'ng darhol
+if REFRESH_INTERVAL > 0:
+    if application.job_queue is None:
+        logger.warning("JobQueue mavjud emas (python-telegram-bot[job-queue]) — rejali yangilash o'chiq")
+    else:
+        application.job_queue.run_repeating(refresh_job, interval=REFRESH_INTERVAL, first=1.0, name="refresh")
+
+# Update'lar doimiy event loop'da, cheklangan parallellik bilan qayta ishlanadi
+PROFILER = UpdateProfiler()
+pipeline = UpdatePipeline(application, workers=WEBHOOK_WORKERS, queue_size=WEBHOOK_QUEUE_SIZE, profiler=PROFILER)
+
+# /metrics'da ko'rinadigan holat ko'rsatkichlari
+METRICS.collect("pipeline", pipeline.stats)
+METRICS.collect("sessions", CHAT_CACHE.stats)
+METRICS.collect("inline", INLINE_RESULTS.stats)
+METRICS.collect("render", RENDERED.stats)
+METRICS.collect("query_cache", QUERY_CACHE.stats)
+METRICS.collect("outbox", OUTBOX.stats)
+METRICS.collect("snapshot", SNAPSHOT.stats)
+if history() is not None:
+    METRICS.collect("history", history().stats)
+METRICS.collect("follow", follows().stats)
+METRICS.collect("reports", REPORTS.stats)
+METRICS.collect("prewarm", PREWARM.copy)
+
+# Diskdagi snapshot (bo'lsa) darhol xizmatga tayyor; jonli jadval fonda yuklanadi
+warm_start()
+
 async def setup_webhook():
     """Webhook sozlash"""
+    start_follow_notifier(application.bot)
     try:
         await application.bot.set_webhook(url=f"{WEBHOOK_URL}/webhook")
         logger.info(f"Webhook o'rnatildi: {WEBHOOK_URL}/webhook")
@@ -61,19 +114,12 @@ def webhook():
     try:
         # Ma'lumotlarni olish
         update_data = request.get_json()
-        logger.info(f"Webhook received update: {update_data}")
+        logger.debug(f"Webhook received update: {update_data}")
         
         if update_data:
-            # Update obyektini yaratish
-            update = Update.de_json(update_data, application.bot)
-            logger.info(f"Processing update: {update.update_id}")
-            
-            # Async update ni qayta ishlash
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(application.process_update(update))
-            loop.close()
-            logger.info(f"Update {update.update_id} processed successfully")
+            # Navbatga qo'yamiz va Telegram'ga darhol javob qaytaramiz
+            if not pipeline.submit(update_data):
+                return "Busy", 503, {"Retry-After": "1"}
         
         return "OK", 200
         
@@ -88,31 +134,68 @@ def detailed_health():
         "status": "running",
         "mode": "webhook",
         "bot": "active",
-        "webhook_url": f"{WEBHOOK_URL}/webhook" if WEBHOOK_URL else None
+        "webhook_url": f"{WEBHOOK_URL}/webhook" if WEBHOOK_URL else None,
+        "pipeline": pipeline.stats(),
+        "sessions": CHAT_CACHE.stats(),
+        "inline": INLINE_RESULTS.stats(),
+        "render": RENDERED.stats(),
+        "sheets": SNAPSHOT.stats(),
+        "query_cache": QUERY_CACHE.stats(),
+        "outbox": OUTBOX.stats(),
+        "history": history().stats() if history() is not None else None,
+        "follow": follows().stats(),
+        "reports": REPORTS.stats(),
+        "prewarm": PREWARM.copy(),
     }, 200
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus formatidagi metrikalar"""
+    return METRICS.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+@app.route('/debug/profile')
+def debug_profile():
+    """?updates=N — keyingi N ta update'ni profillash; parametrsiz — holat va oxirgi natija.
+
+    Faqat webhook rejimida: profiler ``UpdatePipeline`` ichida ishlaydi, polling
+    rejimida esa Flask server (va bu endpoint) ishga tushmaydi.
+    """
+    if not DEBUG_TOKEN or request.args.get("token") != DEBUG_TOKEN:
+        abort(404)
+    updates = request.args.get("updates", type=int)
+    if updates:
+        if not pipeline.running:
+            return {"error": "pipeline is not running (profiling is webhook-only)"}, 409
+
+        async def _start():
+            return PROFILER.start(updates)
+
+        started = pipeline.run(_start())
+        return {"started": started, **PROFILER.status()}, 202 if started else 409
+    if PROFILER.result and not PROFILER.active:
+        return PROFILER.result, 200, {"Content-Type": "text/plain; charset=utf-8"}
+    return PROFILER.status(), 200
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 10000))
     
-    # Application ni initialize qilish
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
-    try:
-        loop.run_until_complete(application.initialize())
-        logger.info("Application initialized successfully")
-        
-        # Webhook rejimi
-        if WEBHOOK_URL:
+    # Webhook rejimi
+    if WEBHOOK_URL:
+        try:
             logger.info("Webhook rejimida ishga tushmoqda...")
-            loop.run_until_complete(setup_webhook())
+            pipeline.start()
+            logger.info("Application initialized successfully")
+            pipeline.run(setup_webhook())
             logger.info(f"Flask server {port} portda ishga tushmoqda...")
-            app.run(host="0.0.0.0", port=port, debug=False)
-        else:
-            # Polling rejimi
+            app.run(host="0.0.0.0", port=port, debug=False, threaded=True)
+        except Exception as e:
+            logger.error(f"Main error: {e}", exc_info=True)
+        finally:
+            pipeline.stop()
+    else:
+        # Polling rejimi: run_polling o'zi loop yaratadi, initialize/start/shutdown qiladi
+        try:
             logger.info("WEBHOOK_URL topilmadi, polling rejimida ishga tushmoqda...")
-            loop.run_until_complete(application.run_polling())
-    except Exception as e:
-        logger.error(f"Main error: {e}", exc_info=True)
-    finally:
-        loop.close()
+            application.run_polling()
+        except Exception as e:
+            logger.error(f"Main error: {e}", exc_info=True)
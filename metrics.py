@@ -0,0 +1,197 @@
+import io
+import time
+import pstats
+import cProfile
+import asyncio
+import logging
+import threading
+import functools
+from bisect import bisect_left
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Kechikish gistogrammasi chegaralari (soniya)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _fmt_labels(labels: tuple, le: str = None) -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in labels]
+    if le is not None:
+        parts.append(f'le="{le}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Jarayon ichidagi metrikalar: vaqt oraliqlari (gistogramma) va hisoblagichlar.
+
+    ``span``/``timed`` — kod bo'lagining davomiyligi, ``inc`` — hisoblagich,
+    ``collect`` — boshqa obyektlarning ``stats()`` lug'atini gauge sifatida
+    qo'shadi. ``render`` Prometheus text formatini qaytaradi.
+    """
+
+    def __init__(self, namespace: str = "bandlik"):
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._hist = {}      # (nom, labels) -> _Histogram
+        self._counters = {}  # (nom, labels) -> son
+        self._collectors = []
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            h = self._hist.get(key)
+            if h is None:
+                h = self._hist[key] = _Histogram()
+            h.observe(seconds)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def span(self, name: str, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0, **labels)
+
+    def timed(self, name: str, **labels):
+        """Funksiya (sync yoki async) davomiyligini o'lchaydigan dekorator."""
+        def decorator(fn):
+            if asyncio.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    with self.span(name, **labels):
+                        return await fn(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def collect(self, prefix: str, stats):
+        """``stats()`` dagi raqamli qiymatlar ``<prefix>_<kalit>`` gauge'lari bo'ladi."""
+        self._collectors.append((prefix, stats))
+
+    def counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get((name, _labels(labels)), 0)
+
+    def render(self) -> str:
+        ns = self.namespace
+        out = []
+        with self._lock:
+            hist = sorted(self._hist.items())
+            counters = sorted(self._counters.items())
+
+        seen = set()
+        for (name, labels), h in hist:
+            metric = f"{ns}_{name}_seconds"
+            if metric not in seen:
+                seen.add(metric)
+                out.append(f"# TYPE {metric} histogram")
+            cum = 0
+            for le, n in zip(BUCKETS, h.counts):
+                cum += n
+                out.append(f"{metric}_bucket{_fmt_labels(labels, le)} {cum}")
+            out.append(f"{metric}_bucket{_fmt_labels(labels, '+Inf')} {h.count}")
+            out.append(f"{metric}_sum{_fmt_labels(labels)} {h.sum:.6f}")
+            out.append(f"{metric}_count{_fmt_labels(labels)} {h.count}")
+
+        for (name, labels), value in counters:
+            metric = f"{ns}_{name}_total"
+            if metric not in seen:
+                seen.add(metric)
+                out.append(f"# TYPE {metric} counter")
+            out.append(f"{metric}{_fmt_labels(labels)} {value}")
+
+        for prefix, stats in self._collectors:
+            try:
+                values = stats()
+            except Exception as e:
+                logger.error(f"Metrics collector {prefix} error: {e}")
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metric = f"{ns}_{prefix}_{key}"
+                out.append(f"# TYPE {metric} gauge")
+                out.append(f"{metric} {value}")
+        return "\n".join(out) + "\n"
+
+
+METRICS = Metrics()
+
+
+class UpdateProfiler:
+    """Keyingi N ta update'ni cProfile bilan o'lchab, natijani matn sifatida saqlaydi.
+
+    ``start`` va ``update_done`` update'lar qayta ishlanadigan oqimda (event
+    loop) chaqirilishi kerak — cProfile faqat shu oqimni kuzatadi.
+    """
+
+    def __init__(self, top: int = 40):
+        self.top = top
+        self._profile = None
+        self._remaining = 0
+        self._started = 0.0
+        self.result = ""
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+
+    def start(self, updates: int) -> bool:
+        if self._profile is not None:
+            return False
+        self._remaining = max(1, updates)
+        self._started = time.perf_counter()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        logger.info(f"Profiling next {self._remaining} updates")
+        return True
+
+    def update_done(self):
+        if self._profile is None:
+            return
+        self._remaining -= 1
+        if self._remaining > 0:
+            return
+        prof, self._profile = self._profile, None
+        prof.disable()
+        buf = io.StringIO()
+        buf.write(f"# {time.perf_counter() - self._started:.2f} s\n")
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(self.top)
+        self.result = buf.getvalue()
+        logger.info("Profiling finished")
+
+    def status(self) -> dict:
+        return {"active": self.active, "remaining": self._remaining, "has_result": bool(self.result)}
@@ -0,0 +1,275 @@
+import time
+import heapq
+import asyncio
+import logging
+from collections import deque
+from typing import Dict
+
+from metrics import METRICS
+from config import (
+    OUTBOX_GLOBAL_RATE, OUTBOX_CHAT_INTERVAL, OUTBOX_GROUP_INTERVAL, OUTBOX_WORKERS, OUTBOX_RETRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def retry_after(e: Exception):
+    """Telegram 429 (``RetryAfter``) bo'lsa kutish soniyalari, aks holda None."""
+    ra = getattr(e, "retry_after", None)
+    if ra is None:
+        return None
+    if hasattr(ra, "total_seconds"):
+        ra = ra.total_seconds()
+    return max(float(ra), 0.0)
+
+
+class _Op:
+    """Navbatdagi bitta chiqish amali (bir nechta chaqiruvchi kutishi mumkin)."""
+
+    __slots__ = ("bot", "method", "kwargs", "key", "delete_id", "futures", "attempts")
+
+    def __init__(self, bot, method: str, kwargs: dict, key=None, delete_id: int = None):
+        self.bot = bot
+        self.method = method
+        self.kwargs = kwargs
+        self.key = key
+        self.delete_id = delete_id  # "replace" amali: avval o'chiriladigan xabar
+        self.futures = [asyncio.get_running_loop().create_future()]
+        self.attempts = 0
+
+    def resolve(self, result=None, error: Exception = None):
+        for fut in self.futures:
+            if fut.done():
+                continue
+            if error is not None:
+                fut.set_exception(error)
+            else:
+                fut.set_result(result)
+
+
+class Outbox:
+    """Telegram'ga chiquvchi xabarlar uchun markaziy navbat.
+
+    - umumiy tezlik ``global_rate`` xabar/soniya (token bucket) va har bir chat
+      uchun xabarlar orasida kamida ``chat_interval`` (guruhlarda
+      ``group_interval``) soniya;
+    - 429 javobida amal ``retry_after`` soniyadan keyin qayta yuboriladi
+      (``max_retries`` martagacha); limit butun bot uchun bo'lishi mumkin,
+      shuning uchun shu vaqtgacha umumiy token bucket ham to'xtatiladi;
+    - hali yuborilmagan amallar birlashtiriladi: bir xabarning ketma-ket
+      tahrirlari — oxirgisi, bir "slot"dagi (masalan, natijalar sahifasi)
+      ketma-ket o'chirish+yuborish juftlari — bittasi; o'chiriladigan
+      xabarning navbatdagi tahrirlari bekor qilinadi.
+
+    Barcha metodlar event loop ichida chaqiriladi va natija (``Message``)
+    qaytguncha kutadi.
+    """
+
+    def __init__(self, global_rate: float = OUTBOX_GLOBAL_RATE, chat_interval: float = OUTBOX_CHAT_INTERVAL,
+                 group_interval: float = OUTBOX_GROUP_INTERVAL, workers: int = OUTBOX_WORKERS,
+                 max_retries: int = OUTBOX_RETRIES, clock=time.monotonic):
+        self.global_rate = global_rate
+        self.chat_interval = chat_interval
+        self.group_interval = group_interval
+        self.workers = workers
+        self.max_retries = max_retries
+        self._clock = clock
+        self._loop = None
+        self._tasks = []
+        self._wakeup = None
+        self._queues: Dict[int, deque] = {}  # chat_id -> kutayotgan amallar
+        self._ready = []                     # heap: (vaqt, seq, chat_id)
+        self._scheduled = set()              # heap'dagi yoki bajarilayotgan chatlar
+        self._next_at: Dict[int, float] = {}
+        self._seq = 0
+        # kichik "burst" — sirpanuvchi 1 soniyalik oynada ham limitdan oshmaslik uchun
+        self._burst = max(1.0, global_rate * 0.2)
+        self._tokens = self._burst
+        self._refilled = clock()
+        self._pause_until = 0.0  # 429 dan keyin barcha chatlar uchun
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+        self.coalesced = 0
+        self.max_depth = 0
+
+    # ---------------- ommaviy API ----------------
+    async def send_message(self, bot, chat_id: int, text: str, **kwargs):
+        return await self._submit(_Op(bot, "send_message", dict(chat_id=chat_id, text=text, **kwargs)))
+
+    async def send_photo(self, bot, chat_id: int, photo, **kwargs):
+        return await self._submit(_Op(bot, "send_photo", dict(chat_id=chat_id, photo=photo, **kwargs)))
+
+    async def send_document(self, bot, chat_id: int, document, **kwargs):
+        return await self._submit(_Op(bot, "send_document", dict(chat_id=chat_id, document=document, **kwargs)))
+
+    async def edit_message_text(self, bot, chat_id: int, message_id: int, text: str, **kwargs):
+        """Xabarni tahrirlash; bir xabarning navbatdagi tahrirlaridan faqat oxirgisi bajariladi."""
+        kw = dict(chat_id=chat_id, message_id=message_id, text=text, **kwargs)
+        return await self._submit(_Op(bot, "edit_message_text", kw, key=("edit", message_id)))
+
+    async def delete_message(self, bot, chat_id: int, message_id: int):
+        return await self._submit(_Op(bot, "delete_message", dict(chat_id=chat_id, message_id=message_id)))
+
+    async def replace_message(self, bot, chat_id: int, old_message_id, text: str, slot: str = "page", **kwargs):
+        """``old_message_id`` ni o'chirib, o'rniga yangi xabar yuboradi (bitta amal).
+
+        Shu chat va ``slot`` uchun hali yuborilmagan oldingi almashtirish
+        bo'lsa, ular bitta o'chirish+yuborishga birlashtiriladi.
+        """
+        kw = dict(chat_id=chat_id, text=text, **kwargs)
+        return await self._submit(_Op(bot, "send_message", kw, key=("replace", slot), delete_id=old_message_id))
+
+    def stats(self) -> dict:
+        depth = sum(len(q) for q in self._queues.values())
+        return {
+            "queue_depth": depth,
+            "max_queue_depth": self.max_depth,
+            "chats_waiting": len(self._queues),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "coalesced": self.coalesced,
+            "paused": max(0.0, self._pause_until - self._clock()),
+        }
+
+    # ---------------- navbat ----------------
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._tasks:
+            return
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _coalesce(self, q: deque, op: _Op) -> bool:
+        """Yangi amalni navbatdagilari bilan birlashtiradi; True — alohida qo'shish shart emas."""
+        if op.method == "delete_message":
+            mid = op.kwargs["message_id"]
+            for old in list(q):
+                if old.key == ("edit", mid):
+                    # o'chiriladigan xabarni tahrirlashdan ma'no yo'q
+                    q.remove(old)
+                    old.resolve(None)
+                    self.coalesced += 1
+            return False
+        if op.key is None:
+            return False
+        for old in q:
+            if old.key != op.key:
+                continue
+            if op.key[0] == "replace":
+                # eski xabar hali yuborilmagan — o'chirish kerak bo'lgani avvalgisining eskisi
+                op.delete_id = old.delete_id if old.delete_id is not None else op.delete_id
+            old.method, old.kwargs, old.delete_id = op.method, op.kwargs, op.delete_id
+            old.futures.extend(op.futures)
+            self.coalesced += 1
+            return True
+        return False
+
+    async def _submit(self, op: _Op):
+        self._ensure_started()
+        chat_id = op.kwargs["chat_id"]
+        q = self._queues.get(chat_id)
+        if q is None:
+            q = self._queues[chat_id] = deque()
+        if not self._coalesce(q, op):
+            q.append(op)
+        if chat_id not in self._scheduled:
+            self._schedule(chat_id)
+        depth = sum(len(x) for x in self._queues.values())
+        self.max_depth = max(self.max_depth, depth)
+        return await op.futures[-1]
+
+    def _schedule(self, chat_id: int):
+        self._seq += 1
+        at = max(self._clock(), self._next_at.get(chat_id, 0.0))
+        heapq.heappush(self._ready, (at, self._seq, chat_id))
+        self._scheduled.add(chat_id)
+        self._wakeup.set()
+
+    def _interval(self, chat_id: int) -> float:
+        # manfiy chat_id — guruh/kanal (Telegram: daqiqasiga ~20 xabar)
+        return self.group_interval if chat_id < 0 else self.chat_interval
+
+    async def _next_chat(self) -> int:
+        while True:
+            if self._ready:
+                at, _, chat_id = self._ready[0]
+                wait = at - self._clock()
+                if wait <= 0:
+                    heapq.heappop(self._ready)
+                    return chat_id
+            else:
+                wait = None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _take_token(self):
+        while True:
+            now = self._clock()
+            if now < self._pause_until:
+                await asyncio.sleep(self._pause_until - now)
+                continue
+            self._tokens = min(self._burst, self._tokens + (now - self._refilled) * self.global_rate)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.global_rate)
+
+    async def _execute(self, op: _Op):
+        if op.delete_id is not None:
+            try:
+                with METRICS.span("bot_api", method="delete_message"):
+                    await op.bot.delete_message(chat_id=op.kwargs["chat_id"], message_id=op.delete_id)
+            except Exception as e:
+                if retry_after(e) is not None:
+                    raise
+                logger.debug(f"Outbox delete failed: {e}")
+            op.delete_id = None  # qayta urinishda ikkinchi marta o'chirmaymiz
+        with METRICS.span("bot_api", method=op.method):
+            return await getattr(op.bot, op.method)(**op.kwargs)
+
+    async def _worker(self):
+        while True:
+            chat_id = await self._next_chat()
+            q = self._queues.get(chat_id)
+            if not q:
+                self._queues.pop(chat_id, None)
+                self._scheduled.discard(chat_id)
+                continue
+            op = q.popleft()
+            await self._take_token()
+            # o'chirish xabar limitiga kirmaydi
+            delay = 0.0 if op.method == "delete_message" else self._interval(chat_id)
+            try:
+                result = await self._execute(op)
+            except Exception as e:
+                wait = retry_after(e)
+                METRICS.inc("bot_api_errors", method=op.method, flood="yes" if wait is not None else "no")
+                if wait is not None and op.attempts < self.max_retries:
+                    op.attempts += 1
+                    self.retried += 1
+                    q.appendleft(op)
+                    delay = wait
+                    self._pause_until = max(self._pause_until, self._clock() + wait)
+                    logger.warning(f"Flood control for chat {chat_id}: retry in {wait:.1f}s")
+                else:
+                    self.failed += 1
+                    op.resolve(error=e)
+            else:
+                self.sent += 1
+                op.resolve(result)
+            self._next_at[chat_id] = self._clock() + delay
+            if q:
+                self._schedule(chat_id)
+            else:
+                self._queues.pop(chat_id, None)
+                self._scheduled.discard(chat_id)
+                if len(self._next_at) > 10000:
+                    now = self._clock()
+                    self._next_at = {c: t for c, t in self._next_at.items() if t > now}
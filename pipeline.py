@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import threading
+
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+
+class UpdatePipeline:
+    """Webhook update'lari uchun doimiy event loop va cheklangan navbat.
+
+    Flask oqimi update'ni navbatga qo'yadi va darhol javob qaytaradi;
+    ``workers`` ta korutina ularni parallel qayta ishlaydi. Navbat to'lsa
+    ``submit`` ``enqueue_timeout`` soniya kutadi, keyin False qaytaradi
+    (Telegram update'ni keyinroq qayta yuboradi).
+    """
+
+    def __init__(self, application, workers: int = 8, queue_size: int = 256, enqueue_timeout: float = 1.0,
+                 profiler=None):
+        self.application = application
+        self.profiler = profiler
+        self.workers = workers
+        self.queue_size = queue_size
+        self.enqueue_timeout = enqueue_timeout
+        self.loop = None
+        self._queue = None
+        self._tasks = []
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._start_lock:
+            if self.running:
+                return
+            self.loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self.loop.run_forever, name="update-pipeline", daemon=True)
+            self._thread.start()
+            self.run(self._startup())
+            logger.info(f"Update pipeline started: {self.workers} workers, queue {self.queue_size}")
+
+    def run(self, coro, timeout: float = None):
+        """Korutinani pipeline loop'ida bajarib, natijasini qaytaradi."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def _startup(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        await self.application.initialize()
+        # job_queue (rejali yangilash) shu bilan ishga tushadi; update'lar baribir process_update orqali
+        await self.application.start()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    def submit(self, update_data: dict) -> bool:
+        """Update'ni navbatga qo'yadi. Navbat to'lib qolsa False."""
+        if not self.running:
+            self.start()
+        try:
+            return self.run(self._enqueue(update_data), timeout=self.enqueue_timeout + 1)
+        except Exception as e:
+            logger.error(f"Enqueue error: {e}")
+            return False
+
+    async def _enqueue(self, update_data: dict) -> bool:
+        try:
+            await asyncio.wait_for(self._queue.put(update_data), timeout=self.enqueue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            logger.warning("Update queue is full, rejecting update")
+            return False
+
+    async def _worker(self, n: int):
+        while True:
+            update_data = await self._queue.get()
+            try:
+                update = Update.de_json(update_data, self.application.bot)
+                await self.application.process_update(update)
+                self.processed += 1
+                logger.debug(f"Update {update.update_id} processed by worker {n}")
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Update processing error: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+                if self.profiler is not None:
+                    self.profiler.update_done()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    def stop(self, timeout: float = 10.0):
+        if not self.running:
+            return
+
+        async def _shutdown():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("Update queue did not drain before shutdown")
+            for t in self._tasks:
+                t.cancel()
+            if self.application.running:
+                await self.application.stop()
+            await self.application.shutdown()
+
+        self.run(_shutdown())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
@@ -0,0 +1,70 @@
+import threading
+from array import array
+from collections import OrderedDict
+
+from config import QUERY_CACHE_SIZE
+from index import normalize_query
+
+
+class QueryCache:
+    """Barcha chatlar uchun umumiy qidiruv natijalari keshi.
+
+    Kalit — ``normalize_query(so'rov)``, qiymat — ``(row_ids, faollar soni)``;
+    ``row_ids`` ``array("I")`` bo'lib, Session uni nusxalamasdan ishlatadi
+    (o'zgartirilmasligi kerak). Yozuvlar ``version`` (``StudentStore.digest``)
+    bo'yicha avlodlarga ajratiladi: yangi versiya kelganda joriy avlod
+    "oldingi" bo'lib qoladi, undan oldingisi tashlanadi — eski va yangi
+    snapshot bilan navbatma-navbat kelgan so'rovlar keshni tozalab
+    yubormaydi. Har bir avlod hajmi ``max_entries`` (LRU).
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._gens = OrderedDict()  # versiya -> {so'rov -> (row_ids, active)}; eng yangisi oxirida
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _generation(self, version) -> OrderedDict:
+        # lock ostida chaqiriladi
+        entries = self._gens.get(version)
+        if entries is None:
+            entries = self._gens[version] = OrderedDict()
+            if len(self._gens) > 2:
+                self._gens.popitem(last=False)
+                self.invalidations += 1
+        return entries
+
+    def get(self, store, query: str, search):
+        """``(row_ids, active)``; keshda bo'lmasa ``search(query)`` bilan hisoblanadi."""
+        version = store.digest
+        key = normalize_query(query)
+        with self._lock:
+            entries = self._generation(version)
+            value = entries.get(key)
+            if value is not None:
+                entries.move_to_end(key)
+                self.hits += 1
+                return value
+        row_ids = array("I", search(query))
+        value = (row_ids, sum(1 for i in row_ids if store[i].active))
+        with self._lock:
+            self.misses += 1
+            entries = self._gens.get(version)
+            if entries is not None:
+                entries[key] = value
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": sum(len(e) for e in self._gens.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
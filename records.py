@@ -0,0 +1,211 @@
+import sys
+import hashlib
+from bisect import bisect_right
+from itertools import chain, compress
+from operator import attrgetter, is_not
+from typing import List
+
+from columns import (
+    HEMIS_UID, IDX_HEMIS, IDX_FIO, IDX_STAT, IDX_JSH,
+    IDX_LAVOZIM, IDX_TASHKILOT, IDX_SANASI, IDX_Guruhi, IDX_Yunalish,
+)
+from utils import safe_cell
+
+_intern = sys.intern
+
+# Saqlanadigan matn maydonlari (row va active hisoblanadi)
+FIELDS = (
+    "hemisuid", "hemis", "fio", "status", "jshshir",
+    "guruh", "yunalish", "lavozim", "tashkilot", "sanasi",
+)
+
+
+class Student:
+    """Bitta talaba yozuvi — faqat IDX_* ustunlari saqlanadi.
+
+    Takrorlanuvchi qiymatlar (guruh, yo'nalish, status, lavozim) intern qilinadi,
+    ``active`` esa bir marta hisoblanadi. ``row`` — yozuvning store'dagi o'rni.
+    """
+
+    __slots__ = (
+        "row", "hemisuid", "hemis", "fio", "status", "jshshir",
+        "guruh", "yunalish", "lavozim", "tashkilot", "sanasi", "active",
+    )
+
+    def __init__(self, row: int, r: List[str], required_status: str):
+        self.row = row
+        self.hemisuid = safe_cell(r, HEMIS_UID)
+        self.hemis = safe_cell(r, IDX_HEMIS)
+        self.fio = safe_cell(r, IDX_FIO)
+        self.jshshir = safe_cell(r, IDX_JSH)
+        self.guruh = _intern(safe_cell(r, IDX_Guruhi))
+        self.yunalish = _intern(safe_cell(r, IDX_Yunalish))
+        status = _intern(safe_cell(r, IDX_STAT))
+        self.status = status
+        self.active = required_status.lower() in status.lower()
+        if self.active:
+            self.lavozim = _intern(safe_cell(r, IDX_LAVOZIM))
+            self.tashkilot = safe_cell(r, IDX_TASHKILOT)
+            self.sanasi = safe_cell(r, IDX_SANASI)
+        else:
+            self.lavozim = self.tashkilot = self.sanasi = ""
+
+    def _key(self):
+        return _STUDENT_KEY(self)
+
+    def __eq__(self, other):
+        if not isinstance(other, Student):
+            return NotImplemented
+        return _STUDENT_KEY(self) == _STUDENT_KEY(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Student(row={self.row}, fio={self.fio!r}, hemis={self.hemis!r})"
+
+
+_STUDENT_KEY = attrgetter(*Student.__slots__)
+
+
+class StudentStore:
+    """Snapshot'dagi barcha talabalar. Sarlavha qatori tashlab yuboriladi."""
+
+    __slots__ = ("records", "required_status", "_digest")
+
+    def __init__(self, records: List[Student], required_status: str):
+        self.records = records
+        self.required_status = required_status
+        self._digest = None
+
+    @property
+    def digest(self) -> str:
+        """Tarkib barmoq izi — jarayonlar (worker'lar) orasida ham bir xil bo'ladi."""
+        if self._digest is None:
+            h = hashlib.blake2b(self.required_status.encode(), digest_size=16)
+            h.update("\x1e".join(
+                f"{r.hemisuid}\x1f{r.hemis}\x1f{r.fio}\x1f{r.status}\x1f{r.jshshir}\x1f{r.guruh}"
+                f"\x1f{r.yunalish}\x1f{r.lavozim}\x1f{r.tashkilot}\x1f{r.sanasi}"
+                for r in self.records
+            ).encode())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    @classmethod
+    def from_rows(cls, rows, required_status: str) -> "StudentStore":
+        """rows = get_all_values() — list of lists (birinchisi sarlavha)."""
+        records = [Student(i, r, required_status) for i, r in enumerate(rows[1:])]
+        return cls(records, required_status)
+
+    @classmethod
+    def from_columns(cls, columns, required_status: str) -> "StudentStore":
+        """``FIELDS`` tartibidagi ustunlardan (diskdagi snapshot) — safe_cell/parse'siz.
+
+        Takrorlanuvchi ustunlar bir marta intern qilinadi, ``active`` esa har bir
+        status uchun bir marta hisoblanadi.
+        """
+        columns = list(columns)
+        for k in (FIELDS.index("status"), FIELDS.index("guruh"), FIELDS.index("yunalish"), FIELDS.index("lavozim")):
+            interned = {v: _intern(v) for v in set(columns[k])}
+            columns[k] = [interned[v] for v in columns[k]]
+        req = required_status.lower()
+        active = {v: req in v.lower() for v in set(columns[FIELDS.index("status")])}
+
+        new = Student.__new__
+        records = []
+        append = records.append
+        for i, (uid, hemis, fio, status, jsh, guruh, yunalish, lavozim, tashkilot, sanasi) in enumerate(zip(*columns)):
+            rec = new(Student)
+            rec.row = i
+            rec.hemisuid, rec.hemis, rec.fio, rec.status, rec.jshshir = uid, hemis, fio, status, jsh
+            rec.guruh, rec.yunalish, rec.lavozim, rec.tashkilot, rec.sanasi = guruh, yunalish, lavozim, tashkilot, sanasi
+            rec.active = active[status]
+            append(rec)
+        return cls(records, required_status)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __getitem__(self, row: int) -> Student:
+        return self.records[row]
+
+    def __eq__(self, other):
+        if not isinstance(other, StudentStore):
+            return NotImplemented
+        return self.required_status == other.required_status and self.records == other.records
+
+    __hash__ = None
+
+
+class MultiStore:
+    """Bir nechta varaq store'larining umumiy ko'rinishi (yozuvlar nusxalanmaydi).
+
+    ``parts`` — ``[(varaq nomi, snapshot)]``. Umumiy row id = varaq offseti +
+    varaqdagi row; offsetlar varaqlar hajmiga bog'liq, shuning uchun row
+    id'lar faqat shu ``digest`` uchun ma'noli (sessiyalar digest o'zgarsa
+    qayta qidiradi).
+    """
+
+    __slots__ = ("parts", "names", "stores", "offsets", "required_status", "_len", "_digest")
+
+    def __init__(self, parts, required_status: str):
+        self.parts = list(parts)
+        self.names = [name for name, _ in self.parts]
+        self.stores = [snap.rows for _, snap in self.parts]
+        self.offsets = []
+        total = 0
+        for store in self.stores:
+            self.offsets.append(total)
+            total += len(store)
+        self._len = total
+        self.required_status = required_status
+        self._digest = None
+
+    @property
+    def digest(self) -> str:
+        if self._digest is None:
+            h = hashlib.blake2b(self.required_status.encode(), digest_size=16)
+            for name, store in zip(self.names, self.stores):
+                h.update(f"\x1d{name}\x1f{store.digest}".encode())
+            self._digest = h.hexdigest()
+        return self._digest
+
+    def locate(self, row: int):
+        """(varaq tartib raqami, varaqdagi row)."""
+        if row < 0:
+            row += self._len
+        # bo'sh varaqlar offseti keyingisiniki bilan teng — oxirgisi olinadi
+        k = bisect_right(self.offsets, row) - 1
+        if k < 0 or row >= self._len:
+            raise IndexError(row)
+        return k, row - self.offsets[k]
+
+    def sheet_of(self, row: int) -> str:
+        return self.names[self.locate(row)[0]]
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return chain.from_iterable(self.stores)
+
+    def __getitem__(self, row: int) -> Student:
+        k, local = self.locate(row)
+        return self.stores[k][local]
+
+
+def changed_positions(old: StudentStore, new: StudentStore) -> List[int]:
+    """Yangi store'da mazmuni o'zgargan o'rinlar.
+
+    Avval obyekt identifikatori solishtiriladi (sync o'zgarmagan qatorlarni
+    qayta ishlatadi), faqat qayta yaratilganlari mazmun bo'yicha tekshiriladi —
+    masalan diskdan yuklangan nusxadan keyingi birinchi jonli nusxada.
+    """
+    old_recs, new_recs = old.records, new.records
+    n = min(len(old_recs), len(new_recs))
+    # map qisqa ro'yxat oxirida to'xtaydi; taqqoslash C darajasida (is_not + compress)
+    changed = [i for i in compress(range(n), map(is_not, old_recs, new_recs)) if old_recs[i] != new_recs[i]]
+    changed.extend(range(n, max(len(old_recs), len(new_recs))))
+    return changed
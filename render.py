@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict
+
+from config import RENDER_CARD_CACHE, RENDER_PAGE_CACHE
+from formatters import format_card
+from records import Student
+
+
+class RenderCache:
+    """Tayyor Markdown matnlar keshi: kartalar va butun natija sahifalari.
+
+    - karta: ``(row, versiya)`` -> ``format_card`` natijasi (row — store'dagi,
+      bir nechta varaqda umumiy row id);
+    - sahifa: ``(normallashgan so'rov, sahifa, versiya)`` -> tayyor qiymat
+      (matn, tugmalar, ...).
+
+    ``version`` — store tarkibi (``StudentStore.digest``); keshlar versiya
+    bo'yicha avlodlarga ajratiladi va joriy hamda oldingi avlod saqlanadi
+    (eski nusxa bilan kelgan so'rov yangisining keshini tozalamaydi).
+    Hajmi har bir avlodda yozuvlar soni bo'yicha cheklangan (LRU).
+    """
+
+    def __init__(self, max_cards: int = RENDER_CARD_CACHE, max_pages: int = RENDER_PAGE_CACHE):
+        self.max_cards = max_cards
+        self.max_pages = max_pages
+        self._lock = threading.Lock()
+        self._gens = OrderedDict()  # versiya -> (kartalar: row -> matn, sahifalar: (so'rov, sahifa) -> qiymat)
+        self.card_hits = 0
+        self.card_misses = 0
+        self.page_hits = 0
+        self.page_misses = 0
+        self.invalidations = 0
+
+    def _generation(self, version) -> tuple:
+        # lock ostida chaqiriladi
+        gen = self._gens.get(version)
+        if gen is None:
+            gen = self._gens[version] = (OrderedDict(), OrderedDict())
+            if len(self._gens) > 2:
+                self._gens.popitem(last=False)
+                self.invalidations += 1
+        return gen
+
+    @staticmethod
+    def _put(cache: OrderedDict, key, value, limit: int):
+        cache[key] = value
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def card(self, row: int, rec: Student, version, sheet: str = "") -> str:
+        with self._lock:
+            cards = self._generation(version)[0]
+            text = cards.get(row)
+            if text is not None:
+                cards.move_to_end(row)
+                self.card_hits += 1
+                return text
+        text = format_card(rec, sheet)
+        with self._lock:
+            self.card_misses += 1
+            gen = self._gens.get(version)
+            if gen is not None:
+                self._put(gen[0], row, text, self.max_cards)
+        return text
+
+    def page(self, query: str, page: int, version, build):
+        """Sahifa keshda bo'lmasa ``build()`` bilan quriladi va saqlanadi."""
+        key = (query, page)
+        with self._lock:
+            pages = self._generation(version)[1]
+            value = pages.get(key)
+            if value is not None:
+                pages.move_to_end(key)
+                self.page_hits += 1
+                return value
+        value = build()
+        with self._lock:
+            self.page_misses += 1
+            gen = self._gens.get(version)
+            if gen is not None:
+                self._put(gen[1], key, value, self.max_pages)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cards": sum(len(c) for c, _ in self._gens.values()),
+                "pages": sum(len(p) for _, p in self._gens.values()),
+                "card_hits": self.card_hits,
+                "card_misses": self.card_misses,
+                "page_hits": self.page_hits,
+                "page_misses": self.page_misses,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,417 @@
+import io
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+from config import REPORT_WORKERS, REPORT_QUEUE_SIZE
+from aggregates import Aggregates, UNKNOWN
+from metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+# Repo bilan birga keladigan Times New Roman shriftlari (PDF'ga joylanadi)
+FONT_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_REGULAR = os.path.join(FONT_DIR, "timesnewromanpsmt.ttf")
+FONT_ITALIC = os.path.join(FONT_DIR, "timesnewromanps_italicmt.ttf")
+FONT_NAME = "Times New Roman"
+
+FORMATS = ("pdf", "xlsx")
+_ALIASES = {"pdf": "pdf", "xlsx": "xlsx", "excel": "xlsx", "xls": "xlsx"}
+
+# Shriftda yo'q belgilar (o'zbek apostroflari) -> bor belgilar
+_PDF_CHARS = str.maketrans({"ʻ": "‘", "ʼ": "’"})
+
+# PDF sahifasidagi jadval qatorlari soni (A4, portret)
+_PAGE_ROWS = 40
+
+
+def report_format(arg: str):
+    """``/report`` argumentidan format ("pdf" / "xlsx") yoki None."""
+    return _ALIASES.get((arg or "").strip().lower())
+
+
+def report_filename(fmt: str, sheet: str = "") -> str:
+    suffix = "".join(ch if ch.isalnum() else "_" for ch in sheet).strip("_") if sheet else ""
+    return f"hisobot{'_' + suffix if suffix else ''}_{datetime.now():%Y%m%d}.{fmt}"
+
+
+# ---------------- jadvallar ----------------
+def report_tables(agg: Aggregates) -> dict:
+    """Hisobot jadvallari: yo'nalishlar, yo'nalish ichida guruhlar va yo'nalish × status."""
+    cube = agg.cube
+    by_group = cube.crosstab("dir", "group")
+    by_status = cube.crosstab("dir", "status")
+    status_totals: Dict[str, int] = {}
+    for cells in by_status.values():
+        for status, (tot, _) in cells.items():
+            status_totals[status] = status_totals.get(status, 0) + tot
+    statuses = sorted(status_totals, key=lambda st: -status_totals[st])
+
+    groups = []
+    for direction in sorted(by_group, key=lambda d: (d or UNKNOWN).lower()):
+        for group, (tot, act) in sorted(by_group[direction].items(), key=lambda kv: (kv[0] or UNKNOWN).lower()):
+            groups.append((direction or UNKNOWN, group or UNKNOWN, tot, act, agg.pct(act, tot)))
+    status_rows = []
+    for direction in sorted(by_status, key=lambda d: (d or UNKNOWN).lower()):
+        cells = by_status[direction]
+        status_rows.append([direction or UNKNOWN] + [cells.get(st, [0, 0])[0] for st in statuses]
+                           + [sum(tot for tot, _ in cells.values())])
+    return {
+        "total": agg.total,
+        "active": agg.active,
+        "pct": agg.pct(agg.active, agg.total),
+        "dirs": agg.rows(agg.per_dir),
+        "groups": groups,
+        "statuses": [st or UNKNOWN for st in statuses],
+        "status_rows": status_rows,
+    }
+
+
+# ---------------- XLSX ----------------
+def build_xlsx(agg: Aggregates, title: str) -> bytes:
+    """Uch varaqli XLSX: yo'nalishlar (diagramma bilan), guruhlar va statuslar."""
+    from openpyxl import Workbook
+    from openpyxl.chart import BarChart, Reference
+    from openpyxl.styles import Alignment, Font, PatternFill
+
+    t = report_tables(agg)
+    font = Font(name=FONT_NAME, size=11)
+    bold = Font(name=FONT_NAME, size=11, bold=True)
+    head_fill = PatternFill("solid", fgColor="D9E1F2")
+
+    wb = Workbook()
+
+    def sheet(ws, header: List[str], rows, widths: List[int], pct_col: int = None):
+        ws.append([title])
+        ws.append([f"Sana: {datetime.now():%d.%m.%Y %H:%M}"])
+        ws.append([])
+        ws.append(header)
+        for row in rows:
+            ws.append(list(row))
+        ws["A1"].font = Font(name=FONT_NAME, size=14, bold=True)
+        ws["A2"].font = Font(name=FONT_NAME, size=11, italic=True)
+        for cell in ws[4]:
+            cell.font, cell.fill = bold, head_fill
+            cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        for r in ws.iter_rows(min_row=5):
+            for cell in r:
+                cell.font = font
+            if pct_col is not None:
+                r[pct_col].number_format = "0.00"
+        for i, w in enumerate(widths):
+            ws.column_dimensions[chr(ord("A") + i)].width = w
+        ws.freeze_panes = "A5"
+
+    ws = wb.active
+    ws.title = "Yo'nalishlar"
+    dir_rows = [(d, tot, act, pct) for d, tot, act, pct in t["dirs"]]
+    sheet(ws, ["Yo'nalish", "Jami", "Faol", "Faol, %"], dir_rows, [40, 12, 12, 12], pct_col=3)
+    last = ws.max_row
+    ws.append(["Jami", t["total"], t["active"], t["pct"]])
+    for cell in ws[ws.max_row]:
+        cell.font = bold
+    if dir_rows:
+        chart = BarChart()
+        chart.type = "bar"
+        chart.title = "Yo'nalishlar bo'yicha talabalar"
+        chart.y_axis.title = "Talabalar soni"
+        chart.add_data(Reference(ws, min_col=2, max_col=3, min_row=4, max_row=last), titles_from_data=True)
+        chart.set_categories(Reference(ws, min_col=1, min_row=5, max_row=last))
+        chart.height, chart.width = max(8, len(dir_rows) * 0.8), 18
+        ws.add_chart(chart, "F4")
+
+    sheet(wb.create_sheet("Guruhlar"), ["Yo'nalish", "Guruh", "Jami", "Faol", "Faol, %"], t["groups"],
+          [40, 16, 12, 12, 12], pct_col=4)
+    sheet(wb.create_sheet("Statuslar"), ["Yo'nalish"] + t["statuses"] + ["Jami"], t["status_rows"],
+          [40] + [16] * (len(t["statuses"]) + 1))
+
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+# ---------------- PDF ----------------
+_PDF = None
+
+
+def _pdf_backend():
+    """matplotlib PDF backend'i va shriftlar — birinchi PDF hisobotda yuklanadi."""
+    global _PDF
+    if _PDF is None:
+        from charts import _matplotlib
+        Figure, cm = _matplotlib()
+        import matplotlib
+        from matplotlib.backends.backend_pdf import PdfPages
+        from matplotlib.font_manager import FontProperties
+
+        # Type 3 qism-shrift sifatida joylanadi: italic faylning glyf jadvalini fontTools
+        # (Type 42 uchun kerak) o'qiy olmaydi
+        matplotlib.rcParams["pdf.fonttype"] = 3
+        fonts = (FontProperties(fname=FONT_REGULAR), FontProperties(fname=FONT_ITALIC))
+        _PDF = (Figure, cm, PdfPages, fonts)
+    return _PDF
+
+
+def _pdf_text(value) -> str:
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value).translate(_PDF_CHARS)
+
+
+def _pdf_table(fig, top: float, header: List[str], rows, font, widths: List[float]):
+    """Sahifaga jadval (``top`` — yuqori chegara, figura ulushida).
+
+    Qator — kataklar ketma-ketligi (birinchisi chapga, qolganlari o'ngga
+    tekislanadi) yoki satr: butun kenglikdagi bo'lim sarlavhasi.
+    matplotlib ``Table`` har bir katakka patch va o'lcham hisoblaydi va
+    yuzlab qatorli hisobotda bir necha barobar sekin — kataklar oddiy matn,
+    chiziqlar bitta ``hlines`` to'plami.
+    """
+    n = len(rows) + 1
+    ax = fig.add_axes([0.07, top - 0.018 * n, 0.86, 0.018 * n])
+    ax.axis("off")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(n, 0)
+    ax.axhspan(0, 1, color="#D9E1F2", lw=0)
+    ax.hlines(range(n + 1), 0, 1, lw=0.3, color="#808080")
+    edges = [0.0]
+    for w in widths:
+        edges.append(edges[-1] + w)
+    for r, row in enumerate([header] + list(rows)):
+        if isinstance(row, str):
+            ax.axhspan(r, r + 1, color="#F2F2F2", lw=0)
+            ax.text(0.01, r + 0.55, _pdf_text(row), va="center", fontproperties=font, fontsize=9)
+            continue
+        for c, value in enumerate(row):
+            if c == 0:
+                ax.text(edges[0] + 0.01, r + 0.55, _pdf_text(value), va="center", fontproperties=font, fontsize=8)
+            else:
+                ax.text(edges[c + 1] - 0.01, r + 0.55, _pdf_text(value), va="center", ha="right",
+                        fontproperties=font, fontsize=8)
+
+
+def _axis_font(ax, font):
+    """O'q yozuvlari ham hisobot shriftida (aks holda matplotlib standart shrifti joylanadi)."""
+    for label in ax.get_xticklabels() + ax.get_yticklabels():
+        label.set_fontproperties(font)
+        label.set_fontsize(8)
+
+
+def _chunks(rows: list, size: int):
+    """Sahifalarga bo'lish; bo'lim sarlavhasi sahifa oxirida qolib ketmaydi."""
+    start = 0
+    while start < len(rows):
+        end = min(start + size, len(rows))
+        if end < len(rows) and isinstance(rows[end - 1], str) and end - 1 > start:
+            end -= 1
+        yield rows[start:end]
+        start = end
+
+
+def build_pdf(agg: Aggregates, title: str) -> bytes:
+    """A4 PDF: umumiy ko'rsatkichlar va grafiklar, yo'nalishlar, statuslar va guruhlar jadvallari."""
+    Figure, cm, PdfPages, (regular, italic) = _pdf_backend()
+    t = report_tables(agg)
+    now = datetime.now()
+    buf = io.BytesIO()
+    pages = 0
+
+    def page(heading: str):
+        nonlocal pages
+        pages += 1
+        fig = Figure(figsize=(8.27, 11.69))
+        fig.text(0.07, 0.95, _pdf_text(heading), fontproperties=regular, fontsize=15)
+        fig.text(0.07, 0.03, _pdf_text(f"{title} — {now:%d.%m.%Y %H:%M}"), fontproperties=italic, fontsize=8)
+        fig.text(0.93, 0.03, str(pages), fontproperties=regular, fontsize=8, ha="right")
+        return fig
+
+    with PdfPages(buf, metadata={"Title": _pdf_text(title), "CreationDate": now}) as pdf:
+        # 1-sahifa: umumiy ko'rsatkichlar va yo'nalishlar grafigi
+        fig = page(title)
+        fig.text(0.07, 0.91, _pdf_text(
+            f"Jami talabalar: {t['total']} ta. Faol: {t['active']} ta ({t['pct']}%)."
+        ), fontproperties=regular, fontsize=11)
+        dirs = t["dirs"]
+        if dirs:
+            ax = fig.add_axes([0.32, 0.5, 0.6, 0.37])
+            labels = [_pdf_text(d) for d, *_ in dirs]
+            y = list(range(len(dirs)))
+            ax.barh(y, [tot for _, tot, _, _ in dirs], color="#B4C7E7", label="Jami")
+            ax.barh(y, [act for _, _, act, _ in dirs], color="#2E75B6", label="Faol")
+            ax.set_yticks(y)
+            ax.set_yticklabels(labels)
+            _axis_font(ax, regular)
+            ax.invert_yaxis()
+            ax.grid(axis="x", linestyle="--", alpha=0.5)
+            ax.legend(prop=regular)
+            ax.set_title(_pdf_text("Yo'nalishlar bo'yicha talabalar"), fontproperties=regular, fontsize=11)
+        _pdf_table(fig, 0.45, ["Yo'nalish", "Jami", "Faol", "Faol, %"],
+                   dirs[:_PAGE_ROWS // 2], regular, [0.55, 0.15, 0.15, 0.15])
+        pdf.savefig(fig)
+        for start in range(_PAGE_ROWS // 2, len(dirs), _PAGE_ROWS):
+            fig = page("Yo'nalishlar (davomi)")
+            _pdf_table(fig, 0.92, ["Yo'nalish", "Jami", "Faol", "Faol, %"], dirs[start:start + _PAGE_ROWS],
+                       regular, [0.55, 0.15, 0.15, 0.15])
+            pdf.savefig(fig)
+
+        # Statuslar: yig'ma ustunli grafik va jadval
+        statuses, status_rows = t["statuses"], t["status_rows"]
+        if status_rows:
+            fig = page("Yo'nalishlar × status")
+            ax = fig.add_axes([0.32, 0.55, 0.6, 0.35])
+            y = list(range(len(status_rows)))
+            left = [0] * len(status_rows)
+            for k, (status, color) in enumerate(zip(statuses, cm.tab10(range(len(statuses))))):
+                values = [row[1 + k] for row in status_rows]
+                ax.barh(y, values, left=left, color=color, label=_pdf_text(status))
+                left = [a + b for a, b in zip(left, values)]
+            ax.set_yticks(y)
+            ax.set_yticklabels([_pdf_text(row[0]) for row in status_rows])
+            _axis_font(ax, regular)
+            ax.invert_yaxis()
+            ax.legend(prop=regular, loc="upper center", bbox_to_anchor=(0.5, -0.06), ncol=min(len(statuses), 4))
+            width = 0.45 / max(len(statuses) + 1, 1)
+            _pdf_table(fig, 0.46, ["Yo'nalish"] + statuses + ["Jami"], status_rows[:_PAGE_ROWS // 2], regular,
+                       [0.55 - width] + [width] * (len(statuses) + 1))
+            pdf.savefig(fig)
+
+        # Guruhlar: yo'nalish sarlavhasi ostida, sahifalarga bo'lingan
+        rows, last = [], None
+        per_dir = {d: (tot, act, pct) for d, tot, act, pct in dirs}
+        for direction, group, tot, act, pct in t["groups"]:
+            if direction != last:
+                d_tot, d_act, d_pct = per_dir.get(direction, (0, 0, 0.0))
+                rows.append(f"{direction} — jami {d_tot}, faol {d_act} ({d_pct}%)")
+                last = direction
+            rows.append((group, tot, act, pct))
+        for k, chunk in enumerate(_chunks(rows, _PAGE_ROWS)):
+            fig = page("Guruhlar bo'yicha" if k == 0 else "Guruhlar bo'yicha (davomi)")
+            _pdf_table(fig, 0.92, ["Guruh", "Jami", "Faol", "Faol, %"], chunk, regular, [0.55, 0.15, 0.15, 0.15])
+            pdf.savefig(fig)
+    return buf.getvalue()
+
+
+def build_report(fmt: str, agg: Aggregates, title: str) -> bytes:
+    t0 = time.perf_counter()
+    data = build_pdf(agg, title) if fmt == "pdf" else build_xlsx(agg, title)
+    logger.info(f"Report {fmt} built in {(time.perf_counter() - t0) * 1000:.0f} ms, {len(data) // 1024} KiB")
+    return data
+
+
+# ---------------- ishlar navbati ----------------
+class ReportBusy(RuntimeError):
+    """Navbat to'lgan — yangi hisobot ishi qabul qilinmaydi."""
+
+
+class ReportJob:
+    __slots__ = ("key", "state", "created", "started", "finished", "future")
+
+    def __init__(self, key):
+        self.key = key
+        self.state = "queued"
+        self.created = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.future = None
+
+
+class ReportQueue:
+    """/report ishlari: cheklangan pool, holat, takroriy so'rovlarni birlashtirish va kesh.
+
+    - hisobot ``workers`` ta oqimda quriladi, navbatdagi ishlar ``max_pending``
+      dan oshsa ``ReportBusy``;
+    - kalit — ``(snapshot versiyasi, varaq, format)``: bir xil kalit uchun
+      parallel so'rovlar bitta ishni kutadi;
+    - tayyor fayl (va Telegram ``file_id``) shu versiya uchun keshlanadi,
+      yangi versiya paydo bo'lsa eskilari tozalanadi.
+
+    Barcha metodlar event loop ichida chaqiriladi.
+    """
+
+    def __init__(self, workers: int = REPORT_WORKERS, max_pending: int = REPORT_QUEUE_SIZE):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self._jobs: Dict[tuple, ReportJob] = {}  # navbatdagi va bajarilayotgan ishlar
+        self._files: Dict[tuple, bytes] = {}
+        self._file_ids: Dict[tuple, str] = {}
+        self.built = 0
+        self.failed = 0
+        self.deduplicated = 0
+
+    def _prune(self, version: int):
+        for table in (self._files, self._file_ids):
+            for key in [k for k in table if k[0] < version]:
+                del table[key]
+
+    def cached(self, key):
+        return self._files.get(key)
+
+    def file_id(self, key):
+        return self._file_ids.get(key)
+
+    def set_file_id(self, key, file_id: str):
+        if file_id:
+            self._file_ids[key] = file_id
+
+    def forget_file_id(self, key):
+        self._file_ids.pop(key, None)
+
+    def jobs(self) -> List[ReportJob]:
+        return sorted(self._jobs.values(), key=lambda j: j.created)
+
+    def position(self, job: ReportJob) -> int:
+        """Navbatdagi o'rni (0 — bajarilmoqda)."""
+        if job.state != "queued":
+            return 0
+        return 1 + sum(1 for j in self._jobs.values() if j.state == "queued" and j.created < job.created)
+
+    def submit(self, key, build, *args) -> ReportJob:
+        """Kalit uchun ish (bor bo'lsa o'sha); navbat to'lgan bo'lsa ``ReportBusy``."""
+        job = self._jobs.get(key)
+        if job is not None:
+            self.deduplicated += 1
+            METRICS.inc("cache", cache="report_job", result="shared")
+            return job
+        if len(self._jobs) >= self.max_pending:
+            raise ReportBusy(f"{len(self._jobs)} report jobs pending")
+        job = self._jobs[key] = ReportJob(key)
+
+        def run():
+            job.state, job.started = "running", time.monotonic()
+            with METRICS.span("report_build", format=key[-1]):
+                return build(*args)
+
+        job.future = asyncio.get_running_loop().run_in_executor(self._executor, run)
+        job.future.add_done_callback(lambda fut: self._finish(job, fut))
+        return job
+
+    def _finish(self, job: ReportJob, fut):
+        job.finished = time.monotonic()
+        self._jobs.pop(job.key, None)
+        if fut.cancelled() or fut.exception() is not None:
+            job.state = "failed"
+            self.failed += 1
+            return
+        job.state = "done"
+        self.built += 1
+        self._prune(job.key[0])
+        self._files[job.key] = fut.result()
+
+    async def result(self, job: ReportJob) -> bytes:
+        return await asyncio.shield(job.future)
+
+    def stats(self) -> dict:
+        jobs = list(self._jobs.values())  # /health Flask oqimidan ham o'qiladi
+        return {
+            "queued": sum(1 for j in jobs if j.state == "queued"),
+            "running": sum(1 for j in jobs if j.state == "running"),
+            "cached": len(self._files),
+            "built": self.built,
+            "failed": self.failed,
+            "deduplicated": self.deduplicated,
+        }
@@ -0,0 +1,289 @@
+import sys
+import time
+import logging
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+
+from config import SESSION_MAX_ENTRIES, SESSION_TTL, SESSION_MAX_BYTES, SESSION_BACKEND, SESSION_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    """Bitta chat'ning sahifalash holati.
+
+    Natijalar nusxa qilinmaydi: ``row_ids`` snapshot'dagi StudentStore o'rinlariga
+    ishora qiladi, ``snapshot`` esa qaysi store'ga tegishli ekanini bildiradi
+    (``StudentStore.digest`` — boshqa worker'da ham bir xil).
+    """
+
+    __slots__ = ("query", "snapshot", "row_ids", "active", "page", "page_msg_id", "touched")
+
+    def __init__(self, query: str, snapshot: str, row_ids, active: int, page: int = 1, page_msg_id: int = None):
+        self.query = query
+        self.snapshot = snapshot
+        self.row_ids = row_ids if isinstance(row_ids, array) else array("I", row_ids)
+        self.active = active
+        self.page = page
+        self.page_msg_id = page_msg_id
+        self.touched = 0.0
+
+    @property
+    def total(self) -> int:
+        return len(self.row_ids)
+
+    def nbytes(self) -> int:
+        """Taxminiy xotira hajmi (bayt)."""
+        return sys.getsizeof(self) + sys.getsizeof(self.row_ids) + sys.getsizeof(self.query)
+
+
+class SessionStore:
+    """Sahifalash sessiyalari uchun cheklangan LRU/TTL kesh (jarayon xotirasida).
+
+    Barcha backend'lar bir xil interfeysga ega: ``get``, ``put``, ``save``,
+    ``pop``, ``stats`` va ``len()``.
+
+    - ``max_entries`` dan ko'p chat saqlanmaydi (eng eski ishlatilgani chiqariladi);
+    - ``ttl`` soniyadan beri tegilmagan sessiya muddati o'tgan hisoblanadi;
+    - umumiy taxminiy hajm ``max_bytes`` dan oshsa ham LRU bo'yicha tozalanadi.
+    """
+
+    def __init__(self, max_entries: int = SESSION_MAX_ENTRIES, ttl: float = SESSION_TTL,
+                 max_bytes: int = SESSION_MAX_BYTES, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # chat_id -> Session
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, chat_id: int):
+        """Sessiyani qaytaradi; yo'q yoki muddati o'tgan bo'lsa None."""
+        now = self._clock()
+        with self._lock:
+            sess = self._data.get(chat_id)
+            if sess is None:
+                self.misses += 1
+                return None
+            if now - sess.touched >= self.ttl:
+                self._remove(chat_id)
+                self.expired += 1
+                self.misses += 1
+                return None
+            sess.touched = now
+            self._data.move_to_end(chat_id)
+            self.hits += 1
+            return sess
+
+    def put(self, chat_id: int, sess: Session):
+        sess.touched = self._clock()
+        with self._lock:
+            if chat_id in self._data:
+                self._remove(chat_id)
+            self._data[chat_id] = sess
+            self._bytes += sess.nbytes()
+            self._evict()
+
+    def save(self, chat_id: int, sess: Session):
+        """Sessiya o'zgargach (sahifa, xabar id) LRU tartibini yangilaydi."""
+        with self._lock:
+            if self._data.get(chat_id) is sess:
+                sess.touched = self._clock()
+                self._data.move_to_end(chat_id)
+                return
+        self.put(chat_id, sess)
+
+    def pop(self, chat_id: int):
+        with self._lock:
+            return self._remove(chat_id)
+
+    def _remove(self, chat_id: int):
+        sess = self._data.pop(chat_id, None)
+        if sess is not None:
+            self._bytes -= sess.nbytes()
+        return sess
+
+    def _evict(self):
+        now = self._clock()
+        while self._data:
+            chat_id, oldest = next(iter(self._data.items()))
+            if now - oldest.touched >= self.ttl:
+                self._remove(chat_id)
+                self.expired += 1
+            elif len(self._data) > self.max_entries or (self._bytes > self.max_bytes and len(self._data) > 1):
+                self._remove(chat_id)
+                self.evicted += 1
+            else:
+                break
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evicted": self.evicted,
+            }
+
+
+class SQLiteSessionStore:
+    """Sessiyalarni umumiy SQLite faylida (WAL rejimi) saqlaydi.
+
+    Bir nechta gunicorn worker'i bitta faylni bo'lishadi, shuning uchun ``pg|N``
+    callback qaysi worker'ga tushishidan qat'i nazar sessiya topiladi va
+    qayta ishga tushirishdan keyin ham saqlanib qoladi. Cheklovlar
+    ``SessionStore`` bilan bir xil; vaqt sifatida ``time.time`` ishlatiladi.
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH, max_entries: int = SESSION_MAX_ENTRIES,
+                 ttl: float = SESSION_TTL, max_bytes: int = SESSION_MAX_BYTES, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            " chat_id INTEGER PRIMARY KEY, query TEXT NOT NULL, snapshot TEXT NOT NULL,"
+            " row_ids BLOB NOT NULL, active INTEGER NOT NULL, page INTEGER NOT NULL,"
+            " page_msg_id INTEGER, touched REAL NOT NULL, nbytes INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_touched ON sessions(touched)")
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def get(self, chat_id: int):
+        now = self._clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT query, snapshot, row_ids, active, page, page_msg_id, touched FROM sessions WHERE chat_id = ?",
+                (chat_id,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            query, snapshot, blob, active, page, page_msg_id, touched = row
+            if now - touched >= self.ttl:
+                self._conn.execute("DELETE FROM sessions WHERE chat_id = ?", (chat_id,))
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE sessions SET touched = ? WHERE chat_id = ?", (now, chat_id))
+            self.hits += 1
+        return self._session(row, now)
+
+    @staticmethod
+    def _session(row, touched: float) -> Session:
+        query, snapshot, blob, active, page, page_msg_id, _ = row
+        row_ids = array("I")
+        row_ids.frombytes(blob)
+        sess = Session(query, snapshot, row_ids, active, page=page, page_msg_id=page_msg_id)
+        sess.touched = touched
+        return sess
+
+    def put(self, chat_id: int, sess: Session):
+        sess.touched = self._clock()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions"
+                " (chat_id, query, snapshot, row_ids, active, page, page_msg_id, touched, nbytes)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (chat_id, sess.query, sess.snapshot, sess.row_ids.tobytes(), sess.active,
+                 sess.page, sess.page_msg_id, sess.touched, sess.nbytes()),
+            )
+            self._evict(sess.touched)
+
+    def save(self, chat_id: int, sess: Session):
+        sess.touched = self._clock()
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE sessions SET page = ?, page_msg_id = ?, touched = ? WHERE chat_id = ? AND snapshot = ?",
+                (sess.page, sess.page_msg_id, sess.touched, chat_id, sess.snapshot),
+            )
+            if cur.rowcount:
+                return
+        self.put(chat_id, sess)
+
+    def pop(self, chat_id: int):
+        """Sessiyani o'chiradi va (muddati o'tmagan bo'lsa) qaytaradi; hit/miss hisoblanmaydi."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT query, snapshot, row_ids, active, page, page_msg_id, touched FROM sessions WHERE chat_id = ?",
+                (chat_id,),
+            ).fetchone()
+            if row is not None:
+                self._conn.execute("DELETE FROM sessions WHERE chat_id = ?", (chat_id,))
+        if row is None or self._clock() - row[-1] >= self.ttl:
+            return None
+        return self._session(row, row[-1])
+
+    def _evict(self, now: float):
+        cur = self._conn.execute("DELETE FROM sessions WHERE touched <= ?", (now - self.ttl,))
+        self.expired += max(cur.rowcount, 0)
+        cur = self._conn.execute(
+            "DELETE FROM sessions WHERE chat_id IN"
+            " (SELECT chat_id FROM sessions ORDER BY touched DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self.evicted += max(cur.rowcount, 0)
+        total, count = self._conn.execute("SELECT COALESCE(SUM(nbytes), 0), COUNT(*) FROM sessions").fetchone()
+        while total > self.max_bytes and count > 1:
+            chat_id, nbytes = self._conn.execute(
+                "SELECT chat_id, nbytes FROM sessions ORDER BY touched ASC LIMIT 1"
+            ).fetchone()
+            self._conn.execute("DELETE FROM sessions WHERE chat_id = ?", (chat_id,))
+            self.evicted += 1
+            total -= nbytes
+            count -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, nbytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM sessions"
+            ).fetchone()
+        return {
+            "backend": "sqlite",
+            "entries": entries,
+            "bytes": nbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evicted": self.evicted,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def make_session_store(backend: str = SESSION_BACKEND):
+    """Konfiguratsiyaga ko'ra sessiya backend'ini yaratadi ("memory" yoki "sqlite")."""
+    if backend == "sqlite":
+        logger.info(f"Using SQLite session store: {SESSION_DB_PATH}")
+        return SQLiteSessionStore()
+    if backend != "memory":
+        logger.warning(f"Unknown SESSION_BACKEND {backend!r}, falling back to memory")
+    return SessionStore()
@@ -1,8 +1,32 @@
 import os
-import gspread
-from google.oauth2.service_account import Credentials
+import re
+import time
+import random
+import asyncio
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 from dotenv import load_dotenv
 
+from config import (
+    SHEET_CACHE_TTL, REQUIRED_STATUS, SHEET_TIMEOUT, SHEET_RETRIES, SHEET_BACKOFF,
+    SHEET_WORKERS, BREAKER_THRESHOLD, BREAKER_RESET, SHEET_SYNC, SNAPSHOT_PATH, WORKSHEETS,
+)
+from metrics import METRICS
+from aggregates import aggregates_for
+from fuzzy import fuzzy_for
+from index import index_for
+from history import history
+from follow import follows
+from records import MultiStore
+from snapfile import load_store, save_store
+from sync import ColumnSync, FullSync
+
+logger = logging.getLogger(__name__)
+
 # .env faylini yuklaymiz
 load_dotenv()
 
@@ -12,18 +36,545 @@ SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
 # Render’da maxfiy fayl doimiy yo‘li
 creds_path = "/etc/secrets/GOOGLE_APPLICATION_CREDENTIALS"
 
-creds = Credentials.from_service_account_file(creds_path, scopes=SCOPES)
-GC = gspread.authorize(creds)
-
 # .env fayldan olingan Sheet nomlari
 SHEET_ID = os.environ.get("SHEET_ID")
 WORKSHEET_TITLE = os.environ.get("WORKSHEET_TITLE")
 
-if not SHEET_ID or not WORKSHEET_TITLE:
-    raise ValueError(".env faylida SHEET_ID yoki WORKSHEET_TITLE topilmadi!")
+# WORKSHEETS elementi: "Varaq" (SHEET_ID ichida) yoki "<spreadsheet id>:Varaq"
+_SPREADSHEET_ID = re.compile(r"[A-Za-z0-9_-]{25,}")
+
+
+def _sheet_specs():
+    """[(nom, spreadsheet id, varaq nomi)] — WORKSHEETS yoki yagona WORKSHEET_TITLE."""
+    specs = []
+    for entry in (WORKSHEETS or [WORKSHEET_TITLE]):
+        entry = (entry or "").strip()
+        sheet_id, sep, title = entry.partition(":")
+        if not sep or not _SPREADSHEET_ID.fullmatch(sheet_id):
+            sheet_id, title = SHEET_ID, entry
+        if sheet_id and title:
+            specs.append((title, sheet_id, title))
+    return specs
+
+
+SHEETS = _sheet_specs()
+
+if not SHEETS:
+    raise ValueError(".env faylida SHEET_ID yoki WORKSHEET_TITLE (WORKSHEETS) topilmadi!")
+if len({name for name, _, _ in SHEETS}) != len(SHEETS):
+    raise ValueError("WORKSHEETS ichida bir xil nomli varaqlar bor!")
+
+# Worksheet'lar birinchi so'rovda (sheets oqimida) ochiladi — import tarmoqqa chiqmaydi.
+# Har bir varaqning o'z qulfi: sekin ochilayotgan varaq boshqalarini kutdirmaydi.
+_GC = None
+_GC_LOCK = threading.Lock()
+_WS = {}
+_WS_LOCKS = {name: threading.Lock() for name, _, _ in SHEETS}
+
+
+def _client():
+    global _GC
+    with _GC_LOCK:
+        if _GC is None:
+            import gspread
+            from google.oauth2.service_account import Credentials
+
+            creds = Credentials.from_service_account_file(creds_path, scopes=SCOPES)
+            gc = gspread.authorize(creds)
+            # HTTP so'rov osilib qolmasligi uchun (gspread >= 5.x)
+            if hasattr(gc, "set_timeout"):
+                gc.set_timeout(SHEET_TIMEOUT)
+            _GC = gc
+        return _GC
+
+
+def worksheet(name: str = None):
+    """Varaqni kerak bo'lganda bir marta ochadi (xato bo'lsa keyingi chaqiruvda qayta urinadi).
+
+    ``name`` — SHEETS'dagi nom, berilmasa birinchi varaq.
+    """
+    name = name or SHEETS[0][0]
+    ws = _WS.get(name)
+    if ws is None:
+        with _WS_LOCKS[name]:
+            ws = _WS.get(name)
+            if ws is None:
+                sheet_id, title = next((sid, t) for n, sid, t in SHEETS if n == name)
+                logger.info(f"Opening Google worksheet {title}")
+                ws = _WS[name] = _client().open_by_key(sheet_id).worksheet(title)
+    return ws
+
+# Qayta urinishga arziydigan HTTP status kodlar
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Sheets bilan ishlash uchun alohida, cheklangan oqimlar puli
+# (har bir varaq uchun kamida bitta — varaqlar parallel yuklanadi)
+SHEETS_EXECUTOR = ThreadPoolExecutor(max_workers=max(SHEET_WORKERS, len(SHEETS)), thread_name_prefix="sheets")
+
+
+def is_retryable(e: Exception) -> bool:
+    """429/5xx javoblar va tarmoq xatolari vaqtinchalik hisoblanadi."""
+    status = getattr(getattr(e, "response", None), "status_code", None)
+    if status is not None:
+        return status in RETRY_STATUSES
+    return isinstance(e, (ConnectionError, TimeoutError, OSError))
+
+
+def with_retry(fetch, retries: int = SHEET_RETRIES, backoff: float = SHEET_BACKOFF,
+               max_backoff: float = 30.0, sleep=time.sleep):
+    """fetch'ni vaqtinchalik xatolarda jitter'li eksponensial kutish bilan qayta chaqiradi."""
+    def wrapped():
+        attempt = 0
+        while True:
+            try:
+                return fetch()
+            except Exception as e:
+                if attempt >= retries or not is_retryable(e):
+                    raise
+                delay = random.uniform(0, min(max_backoff, backoff * (2 ** attempt)))
+                logger.warning(f"Sheets fetch failed ({e}), retry {attempt + 1}/{retries} in {delay:.2f}s")
+                sleep(delay)
+                attempt += 1
+    return wrapped
+
+
+class CircuitBreaker:
+    """Ketma-ket ``threshold`` ta xatodan keyin ``reset_timeout`` soniya davomida
+    Sheets'ga murojaat qilinmaydi (open). So'ng bitta sinov so'roviga ruxsat
+    beriladi (half-open): muvaffaqiyatli bo'lsa yana closed holatga qaytadi.
+    """
+
+    def __init__(self, threshold: int = BREAKER_THRESHOLD, reset_timeout: float = BREAKER_RESET, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self.failures = 0
+        self.opened_at = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self._clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.state != "open"
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold or self.opened_at is not None:
+            self.opened_at = self._clock()
+
+
+# version — ma'lumot o'zgargandagina oshadi, indekslar shunga qarab qayta quriladi.
+# rows — ``parse`` natijasi (odatda StudentStore).
+Snapshot = namedtuple("Snapshot", ["version", "rows", "fetched_at"])
+
+
+class SheetSnapshot:
+    """Jadvalning TTL bilan keshlangan nusxasi.
+
+    - TTL ichida so'rovlar tarmoqqa chiqmaydi;
+    - bir vaqtda kelgan yangilash so'rovlari bitta fetch'ni bo'lishadi (single-flight);
+    - TTL o'tgan bo'lsa eski nusxa darhol qaytariladi, yangilash esa fonda ketadi
+      (stale-while-revalidate);
+    - Sheets ishlamay qolsa (circuit breaker ochiq) oxirgi yaxshi nusxa beriladi;
+    - ``fetch`` istalgan chaqiriluvchi obyekt (masalan ``worksheet().get_all_values``),
+      ``parse`` esa xom qatorlarni saqlanadigan ko'rinishga o'tkazadi;
+    - ``prepare`` yangi versiya e'lon qilinishidan oldin chaqiriladi (indeks,
+      agregatlar): so'rovlar yangi nusxani faqat tayyor holda ko'radi,
+      ``on_change`` esa e'lon qilingandan keyin.
+    """
+
+    def __init__(self, fetch, ttl: float = SHEET_CACHE_TTL, clock=time.monotonic, parse=None,
+                 executor=None, timeout: float = SHEET_TIMEOUT, breaker: CircuitBreaker = None,
+                 on_change=None, prepare=None):
+        self._fetch = fetch
+        self._parse = parse
+        self._on_change = on_change
+        self._prepare = prepare
+        self.ttl = ttl
+        self.timeout = timeout
+        self._clock = clock
+        self._executor = executor or SHEETS_EXECUTOR
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self._lock = threading.Lock()
+        self._inflight = None  # threading.Event — ketayotgan fetch
+        self._snap = None
+        self.last_error = None
+
+    @property
+    def version(self) -> int:
+        snap = self._snap
+        return snap.version if snap else 0
+
+    @property
+    def current(self):
+        """Joriy nusxa (tarmoqqa chiqmasdan); hali yuklanmagan bo'lsa None."""
+        return self._snap
+
+    def is_fresh(self) -> bool:
+        snap = self._snap
+        return snap is not None and (self._clock() - snap.fetched_at) < self.ttl
+
+    def seed(self, rows) -> bool:
+        """Hali nusxa bo'lmasa ``rows`` (masalan, diskdagi snapshot) eskirgan nusxa sifatida qo'yiladi.
+
+        Birinchi so'rov uni darhol oladi va jonli jadval fonda yangilanadi.
+        """
+        with self._lock:
+            if self._snap is not None:
+                return False
+            self._snap = Snapshot(1, rows, self._clock() - self.ttl)
+            return True
+
+    def get(self) -> Snapshot:
+        """Joriy nusxani qaytaradi, kerak bo'lsa yangilaydi (bloklovchi)."""
+        snap = self._snap
+        if snap is None:
+            return self._load()
+        if (self._clock() - snap.fetched_at) >= self.ttl:
+            self._refresh_in_background()
+        return snap
+
+    async def aget(self) -> Snapshot:
+        """``get`` ning async varianti: tarmoq so'rovi event loop'ni to'xtatmaydi.
+
+        Nusxa bo'lmasa fetch ``timeout`` soniyagacha kutiladi, aks holda
+        ``asyncio.TimeoutError`` ko'tariladi (fetch fonda davom etadi).
+        """
+        snap = self._snap
+        if snap is not None:
+            if (self._clock() - snap.fetched_at) >= self.ttl:
+                METRICS.inc("cache", cache="snapshot", result="stale")
+                self._refresh_in_background()
+            else:
+                METRICS.inc("cache", cache="snapshot", result="hit")
+            return snap
+        METRICS.inc("cache", cache="snapshot", result="miss")
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            asyncio.shield(loop.run_in_executor(self._executor, self._load)), self.timeout
+        )
+
+    def refresh(self) -> Snapshot:
+        """Majburiy yangilash. Parallel chaqiruvlar bitta fetch natijasini kutadi."""
+        return self._single_flight(missing_only=False)
+
+    def _load(self) -> Snapshot:
+        """Birinchi yuklash: navbatda turgan paytda nusxa paydo bo'lsa qayta fetch qilinmaydi."""
+        return self._single_flight(missing_only=True)
+
+    def _single_flight(self, missing_only: bool) -> Snapshot:
+        with self._lock:
+            if missing_only and self._snap is not None:
+                return self._snap
+            event = self._inflight
+            leader = event is None
+            if leader:
+                event = self._inflight = threading.Event()
+
+        if not leader:
+            event.wait()
+            if self._snap is None:
+                raise RuntimeError(f"Jadvalni yuklab bo'lmadi: {self.last_error}")
+            return self._snap
+        return self._lead(event)
+
+    def _lead(self, event: threading.Event) -> Snapshot:
+        """Yagona fetch: natijani e'lon qiladi va ``event`` orqali kutayotganlarni uyg'otadi."""
+        try:
+            if not self.breaker.allow():
+                raise RuntimeError(f"Sheets circuit breaker is open (last error: {self.last_error})")
+            try:
+                with METRICS.span("sheets_fetch"):
+                    rows = self._fetch()
+            except Exception:
+                METRICS.inc("sheets_errors")
+                self.breaker.record_failure()
+                raise
+            self.breaker.record_success()
+            if self._parse is not None:
+                with METRICS.span("sheets_parse"):
+                    rows = self._parse(rows)
+            now = self._clock()
+            old = self._snap
+            changed = old is None or not (old.rows is rows or old.rows == rows)
+            if changed:
+                snap = Snapshot(old.version + 1 if old else 1, rows, now)
+                if self._prepare is not None:
+                    # refresh single-flight — versiyani boshqa oqim o'zgartirmaydi
+                    try:
+                        with METRICS.span("snapshot_prepare"):
+                            self._prepare(snap)
+                    except Exception as e:
+                        logger.error(f"Snapshot prepare error: {e}")
+            with self._lock:
+                if changed and self._snap is not old:
+                    # prepare paytida seed() nusxa qo'ygan — versiya undan keyingisi bo'ladi
+                    snap = snap._replace(version=self._snap.version + 1)
+                # eski nusxa yangisiga bitta havola almashinuvi bilan o'zgaradi
+                self._snap = snap if changed else old._replace(fetched_at=now)
+                self.last_error = None
+                snap = self._snap
+            if changed and self._on_change is not None:
+                try:
+                    self._on_change(snap)
+                except Exception as e:
+                    logger.error(f"Snapshot on_change error: {e}")
+            return snap
+        except Exception as e:
+            self.last_error = e
+            logger.error(f"Sheet refresh error: {e}")
+            if self._snap is None:
+                raise
+            return self._snap
+        finally:
+            with self._lock:
+                self._inflight = None
+            event.set()
+
+    def _refresh_in_background(self):
+        if self._inflight is not None or not self.breaker.allow():
+            return
+        # yetakchilik shu yerda olinadi: navbatda turgan ikkinchi fon yangilash bo'lmaydi
+        with self._lock:
+            if self._inflight is not None:
+                return
+            event = self._inflight = threading.Event()
+        try:
+            self._executor.submit(self._lead, event)
+        except RuntimeError as e:  # executor to'xtatilgan
+            logger.error(f"Background refresh not scheduled: {e}")
+            with self._lock:
+                self._inflight = None
+            event.set()
+
+
+class SheetGroup:
+    """Bir nechta varaqning umumiy snapshot'i.
+
+    Har bir varaq o'z ``SheetSnapshot``'iga ega (TTL, single-flight, circuit
+    breaker) va alohida oqimda, parallel yuklanadi. ``get``/``aget`` tayyor
+    varaqlarni bitta ``Snapshot`` qilib beradi (``rows`` — ``MultiStore``);
+    uning versiyasi biror varaq versiyasi o'zgarganda oshadi. Hali yuklanmagan
+    varaq boshqalarni ``timeout`` dan ortiq kutdirmaydi — fonda yuklanib,
+    keyingi so'rovlarga qo'shiladi. Bitta varaq bo'lsa uning snapshot'i
+    o'zgarishsiz qaytariladi.
+    """
+
+    def __init__(self, snapshots: dict, timeout: float = SHEET_TIMEOUT, required_status: str = REQUIRED_STATUS):
+        self.snapshots = dict(snapshots)  # nom -> SheetSnapshot
+        self.timeout = timeout
+        self.required_status = required_status
+        self._lock = threading.Lock()
+        self._key = None
+        self._combined = None
+        self._version = 0
+
+    @property
+    def single(self):
+        return next(iter(self.snapshots.values())) if len(self.snapshots) == 1 else None
+
+    @property
+    def version(self) -> int:
+        single = self.single
+        return single.version if single is not None else self._version
+
+    def _combine(self, parts) -> Snapshot:
+        if not parts:
+            errors = "; ".join(f"{n}: {s.last_error}" for n, s in self.snapshots.items() if s.last_error)
+            raise RuntimeError(f"Hech bir varaqni yuklab bo'lmadi: {errors}")
+        key = tuple((name, snap.version) for name, snap in parts)
+        with self._lock:
+            if key != self._key:
+                self._version += 1
+                self._key = key
+                fetched_at = min(snap.fetched_at for _, snap in parts)
+                self._combined = Snapshot(self._version, MultiStore(parts, self.required_status), fetched_at)
+            return self._combined
+
+    def get(self) -> Snapshot:
+        """Bloklovchi variant: yuklanmagan varaqlar parallel olinadi."""
+        single = self.single
+        if single is not None:
+            return single.get()
+        for snap in self.snapshots.values():
+            if snap.current is None:
+                snap._refresh_in_background()
+        parts = []
+        for name, snap in self.snapshots.items():
+            try:
+                parts.append((name, snap.get()))
+            except Exception as e:
+                logger.error(f"Sheet {name} unavailable: {e}")
+        return self._combine(parts)
+
+    async def aget(self) -> Snapshot:
+        single = self.single
+        if single is not None:
+            return await single.aget()
+        parts = {}
+        missing = {}
+        for name, snap in self.snapshots.items():
+            if snap.current is not None:
+                parts[name] = await snap.aget()  # tayyor nusxa — kutilmaydi
+            else:
+                missing[name] = snap
+        if missing:
+            if parts:
+                # qolganlari tayyor — yetishmayotganlari fonda yuklanadi
+                for snap in missing.values():
+                    snap._refresh_in_background()
+            else:
+                tasks = {asyncio.ensure_future(snap.aget()): name for name, snap in missing.items()}
+                done, pending = await asyncio.wait(tasks, timeout=self.timeout)
+                for task in pending:
+                    logger.warning(f"Sheet {tasks[task]} not loaded in {self.timeout:.0f}s, continuing in background")
+                    task.cancel()  # fetch fonda davom etadi (aget ichida shield)
+                for task in done:
+                    if task.exception() is None:
+                        parts[tasks[task]] = task.result()
+                    else:
+                        logger.error(f"Sheet {tasks[task]} unavailable: {task.exception()}")
+        return self._combine([(name, parts[name]) for name in self.snapshots if name in parts])
+
+    def stats(self) -> dict:
+        snaps = self.snapshots.values()
+        return {
+            "sheets": len(self.snapshots),
+            "loaded": sum(1 for s in snaps if s.current is not None),
+            "version": self.version,
+            "breakers_open": sum(1 for s in snaps if s.breaker.state != "closed"),
+        }
+
+
+def _snapshot_path(name: str) -> str:
+    """Varaqning disk snapshot fayli: bitta varaq — SNAPSHOT_PATH, bir nechta — nomi qo'shiladi."""
+    if not SNAPSHOT_PATH or len(SHEETS) == 1:
+        return SNAPSHOT_PATH
+    return f"{SNAPSHOT_PATH}.{re.sub(r'[^0-9A-Za-z_-]+', '_', name)}"
+
+
+def _save_to_disk(snap: Snapshot, path: str):
+    """Yangi versiyani keyingi ishga tushirish uchun diskka yozadi (sheets oqimida)."""
+    if not path:
+        return
+    t0 = time.perf_counter()
+    save_store(snap.rows, path)
+    logger.info(f"Snapshot v{snap.version} saved to {path} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+
+def _record_history(snap: Snapshot, name: str):
+    """Yangi versiya agregatlarini tarixga yozadi (/trend uchun; sheets oqimida).
+
+    Agregatlar handler'lar ishlatadigan kesh orqali olinadi — /stat uchun ham tayyor bo'ladi.
+    """
+    store = history()
+    if store is None:
+        return
+    agg = aggregates_for(snap, name if len(SHEETS) > 1 else "")
+    written = store.record(agg, name)
+    logger.info(f"History: {written} points recorded for {name} v{snap.version}")
+
+
+def _track_follows(snap: Snapshot, name: str, sync: ColumnSync = None):
+    """/follow obunachilari uchun o'zgarishlarni navbatga qo'yadi (yuborish — handlers'da).
+
+    ``sync`` bo'lsa uning oxirgi parse'dagi o'zgargan o'rinlari ishlatiladi.
+    """
+    delta = (sync.last_base, sync.last_positions) if sync is not None else None
+    follows().observe(name, snap.rows, delta)
+
+
+def _prepare(snap: Snapshot, name: str):
+    """Yangi versiya e'lon qilinishidan oldin digest, qidiruv/fuzzy indekslari va agregatlarni quradi (sheets oqimida).
+
+    Eski nusxa bilan ketayotgan so'rovlar eski indeksni ishlatishda davom etadi.
+    """
+    key = name if len(SHEETS) > 1 else ""
+    snap.rows.digest  # qidiruv/render kesh'lari kaliti — birinchi murojaatda hisoblanadi
+    index_for(snap, key)
+    fuzzy_for(snap, key)
+    aggregates_for(snap, key)
+
+
+def _on_change(snap: Snapshot, name: str, path: str, sync: ColumnSync = None):
+    hooks = (
+        partial(_save_to_disk, path=path),
+        partial(_record_history, name=name),
+        partial(_track_follows, name=name, sync=sync),
+    )
+    for hook in hooks:
+        try:
+            hook(snap)
+        except Exception as e:
+            logger.error(f"Snapshot {name} hook error: {e}")
+
+
+def _make_snapshot(name: str) -> SheetSnapshot:
+    ws = partial(worksheet, name)
+    path = _snapshot_path(name)
+    # columns — faqat kerakli ustunlar; ikkala rejimda ham o'zgarmagan qatorlar qayta parse qilinmaydi
+    sync = FullSync(ws, REQUIRED_STATUS) if SHEET_SYNC == "full" else ColumnSync(ws, REQUIRED_STATUS)
+    on_change = partial(_on_change, name=name, path=path, sync=sync)
+    return SheetSnapshot(with_retry(sync.fetch), parse=sync.parse, on_change=on_change,
+                         prepare=partial(_prepare, name=name))
+
+
+# Har bir varaq o'z snapshot'i, indeksi va agregatlari bilan; SNAPSHOT — ularning umumiy ko'rinishi
+SNAPSHOTS = {name: _make_snapshot(name) for name, _, _ in SHEETS}
+SNAPSHOT = SheetGroup(SNAPSHOTS)
+
+
+def warm_start() -> int:
+    """Ishga tushganda: diskdagi snapshot'lar (bo'lsa) darhol yuklanadi, jonli varaqlar fonda, parallel olinadi.
+
+    Diskdan yuklangan varaqlar sonini qaytaradi.
+    """
+    loaded = 0
+    for name, snapshot in SNAPSHOTS.items():
+        path = _snapshot_path(name)
+        if path:
+            t0 = time.perf_counter()
+            try:
+                store = load_store(path, REQUIRED_STATUS)
+            except Exception as e:
+                logger.error(f"Snapshot file load error ({path}): {e}")
+                store = None
+            if store is not None and snapshot.seed(store):
+                loaded += 1
+                # o'chiq paytdagi o'zgarishlar birinchi jonli nusxada aniqlanadi
+                follows().observe(name, store)
+                logger.info(f"Loaded {len(store)} rows from {path} in {(time.perf_counter() - t0) * 1000:.0f} ms")
+        snapshot._refresh_in_background()
+    return loaded
+
+
+def load_snapshot() -> Snapshot:
+    return SNAPSHOT.get()
+
+
+async def aload_snapshot() -> Snapshot:
+    return await SNAPSHOT.aget()
+
 
-# Worksheetni ochish
-WS = GC.open_by_key(SHEET_ID).worksheet(WORKSHEET_TITLE)
+async def arefresh_snapshot():
+    """Barcha varaqlarni TTL'ni kutmasdan, parallel yangilaydi (rejali yangilash va /reload).
 
-def load_rows():
-    return WS.get_all_values()
+    ``(snapshot, {varaq: xato})`` qaytaradi; yangilanmagan varaq oxirgi yaxshi
+    nusxasi bilan qoladi.
+    """
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *(loop.run_in_executor(SHEETS_EXECUTOR, snap.refresh) for snap in SNAPSHOTS.values()),
+        return_exceptions=True,
+    )
+    errors = {name: str(snap.last_error) for name, snap in SNAPSHOTS.items() if snap.last_error is not None}
+    return await SNAPSHOT.aget(), errors
@@ -0,0 +1,72 @@
+import os
+import zlib
+import struct
+import hashlib
+import logging
+
+from records import FIELDS, StudentStore
+
+logger = logging.getLogger(__name__)
+
+# Fayl: sarlavha (magic, qatorlar soni, payload xeshi) + zlib(payload).
+# payload = required_status \x1d ustun_1 \x1d ... ustun_N — har bir ustun FIELDS
+# tartibida, qiymatlari \x1e bilan ajratilgan. Pickle yo'q.
+MAGIC = b"BNDSNAP2"
+_HEADER = struct.Struct("<8sI16s")
+_SEP, _COL = "\x1e", "\x1d"
+_CLEAN = str.maketrans({_SEP: " ", _COL: " "})
+
+
+def _column(store: StudentStore, field: str) -> str:
+    values = [getattr(rec, field) for rec in store]
+    text = _SEP.join(values)
+    if text.count(_SEP) != max(len(values) - 1, 0) or _COL in text:
+        # ajratgich belgisi qiymat ichida uchradi (juda kam) — tozalab qayta yig'amiz
+        text = _SEP.join(v.translate(_CLEAN) for v in values)
+    return text
+
+
+def save_store(store: StudentStore, path: str):
+    """StudentStore'ni diskka atomar (vaqtinchalik fayl + rename) yozadi."""
+    text = _COL.join([store.required_status] + [_column(store, f) for f in FIELDS])
+    # 1-daraja: siqish deyarli bir xil, lekin bir necha barobar tez
+    payload = zlib.compress(text.encode(), 1)
+    digest = hashlib.blake2b(payload, digest_size=16).digest()
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(store), digest))
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_store(path: str, required_status: str):
+    """Diskdagi snapshot; fayl yo'q, buzilgan yoki boshqa REQUIRED_STATUS bilan yozilgan bo'lsa None."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if len(data) < _HEADER.size:
+        logger.warning(f"Snapshot file {path} is truncated")
+        return None
+    magic, count, digest = _HEADER.unpack_from(data)
+    payload = memoryview(data)[_HEADER.size:]
+    if magic != MAGIC or hashlib.blake2b(payload, digest_size=16).digest() != digest:
+        logger.warning(f"Snapshot file {path} is invalid, ignoring")
+        return None
+
+    status, *texts = zlib.decompress(payload).decode().split(_COL)
+    if status != required_status:
+        # faol/nofaol va ish joyi maydonlari boshqa status bo'yicha hisoblangan
+        logger.info(f"Snapshot file {path} was written for another REQUIRED_STATUS, ignoring")
+        return None
+    if len(texts) != len(FIELDS):
+        logger.warning(f"Snapshot file {path}: expected {len(FIELDS)} columns, got {len(texts)}")
+        return None
+    columns = [t.split(_SEP) if count else [] for t in texts]
+    if any(len(c) != count for c in columns):
+        logger.warning(f"Snapshot file {path}: column length mismatch, ignoring")
+        return None
+    return StudentStore.from_columns(columns, required_status)
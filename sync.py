@@ -0,0 +1,118 @@
+import re
+import logging
+from itertools import zip_longest
+from typing import List
+
+from records import Student, StudentStore
+
+logger = logging.getLogger(__name__)
+
+# Handlerlar o'qiydigan ustunlar: A, C, D, E, F, O, W, AD, AE, AI
+SYNC_RANGES = ["A:A", "C:F", "O:O", "W:W", "AD:AE", "AI:AI"]
+
+
+def col_index(letters: str) -> int:
+    """'A' -> 0, 'AD' -> 29."""
+    n = 0
+    for ch in letters.upper():
+        n = n * 26 + (ord(ch) - 64)
+    return n - 1
+
+
+def range_columns(a1: str) -> List[int]:
+    """'C:F' -> [2, 3, 4, 5]."""
+    m = re.fullmatch(r"([A-Za-z]+):([A-Za-z]+)", a1.strip())
+    if not m:
+        raise ValueError(f"Faqat butun ustun diapazonlari qo'llanadi: {a1!r}")
+    first, last = col_index(m.group(1)), col_index(m.group(2))
+    return list(range(first, last + 1))
+
+
+class ColumnSync:
+    """Jadvalni faqat kerakli ustunlar bo'yicha (``batch_get``) sinxronlaydi.
+
+    ``fetch`` tarmoqdan ustunlarni oladi va ularni qator kortejlariga yig'adi,
+    ``parse`` esa har bir qator xeshini oldingi sinxronlash bilan solishtiradi:
+    o'zgarmagan qatorlar uchun eski ``Student`` obyekti qayta ishlatiladi, hech
+    narsa o'zgarmagan bo'lsa esa eski ``StudentStore`` o'zi qaytariladi. Shu
+    tufayli indeks va agregatlar faqat o'zgargan o'rinlarni qayta ishlaydi.
+    """
+
+    def __init__(self, ws, required_status: str, ranges=SYNC_RANGES):
+        # ws — Worksheet yoki uni qaytaruvchi funksiya (worksheet birinchi fetch'da ochiladi)
+        self.ws = ws
+        self.required_status = required_status
+        self.ranges = list(ranges)
+        self.columns = [c for r in self.ranges for c in range_columns(r)]
+        self.width = max(self.columns) + 1
+        self._hashes = []
+        self._store = None
+        self.last_changed = 0
+        # oxirgi parse: qayta yaratilgan o'rinlar va ular qaysi store'ga nisbatan
+        self.last_positions = []
+        self.last_base = None
+
+    def fetch(self):
+        """Kerakli ustunlarni bitta so'rovda oladi; natija — qator kortejlari (sarlavha bilan)."""
+        ws = self.ws() if callable(self.ws) else self.ws
+        ranges = ws.batch_get(self.ranges, major_dimension="COLUMNS")
+        cols = []
+        for a1, vr in zip(self.ranges, ranges):
+            vr = list(vr)
+            for j in range(len(range_columns(a1))):
+                cols.append(vr[j] if j < len(vr) else [])
+        return list(zip_longest(*cols, fillvalue=""))
+
+    def _row(self, t) -> list:
+        r = [""] * self.width
+        for idx, v in zip(self.columns, t):
+            r[idx] = v
+        return r
+
+    def parse(self, rows) -> StudentStore:
+        data = rows[1:]
+        old_store, old_hashes = self._store, self._hashes
+        old_n = len(old_hashes)
+        hashes = [hash(t) for t in data]
+
+        if old_store is not None and hashes == old_hashes:
+            self.last_changed = 0
+            self.last_positions, self.last_base = [], old_store
+            return old_store
+
+        records = []
+        positions = []
+        for i, t in enumerate(data):
+            if i < old_n and old_hashes[i] == hashes[i]:
+                records.append(old_store.records[i])
+            else:
+                records.append(Student(i, self._row(t), self.required_status))
+                positions.append(i)
+        changed = len(positions)
+        positions.extend(range(len(data), old_n))  # o'chirilgan oxirgi qatorlar
+        self.last_changed = changed
+        self.last_positions, self.last_base = positions, old_store
+        logger.info(f"Column sync: {len(data)} rows, {changed} re-parsed")
+
+        store = StudentStore(records, self.required_status)
+        self._store, self._hashes = store, hashes
+        return store
+
+
+class FullSync(ColumnSync):
+    """``SHEET_SYNC=full``: butun jadval (``get_all_values``), parse esa ``ColumnSync`` kabi.
+
+    Qatorlar kortejga aylantiriladi — xesh butun qator bo'yicha olinadi va
+    o'zgarmagan qatorlar uchun eski ``Student`` obyekti qayta ishlatiladi.
+    """
+
+    def __init__(self, ws, required_status: str):
+        super().__init__(ws, required_status)
+        self.ranges = self.columns = []
+
+    def fetch(self):
+        ws = self.ws() if callable(self.ws) else self.ws
+        return [tuple(r) for r in ws.get_all_values()]
+
+    def _row(self, t) -> list:
+        return list(t)
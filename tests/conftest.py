@@ -0,0 +1,14 @@
+"""Testlar tarmoqsiz ishlaydi: config uchun soxta qiymatlar, fayl saqlash o'chiq."""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+for key, value in (("BOT_TOKEN", "test"), ("SHEET_ID", "test"), ("WORKSHEET_TITLE", "test"),
+                   ("REQUIRED_STATUS", "Faol")):
+    os.environ.setdefault(key, value)
+for key in ("SNAPSHOT_PATH", "HISTORY_DB_PATH", "FOLLOW_DB_PATH"):
+    os.environ[key] = ""
+os.environ["SESSION_BACKEND"] = "memory"
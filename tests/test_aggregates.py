@@ -0,0 +1,47 @@
+from aggregates import Aggregates, StatCube, update_aggregates
+from benchmarks.common import ACTIVE_STATUS, make_store
+from records import StudentStore
+
+N = 2000
+STATUSES = {ACTIVE_STATUS: 0.45, "Ishsiz": 0.45, "Akademik ta'til": 0.05, "Chetlashtirilgan": 0.05}
+
+
+def _counts(store, key):
+    table = {}
+    for rec in store:
+        t = table.setdefault(key(rec), [0, 0])
+        t[0] += 1
+        t[1] += rec.active
+    return table
+
+
+def _flat(crosstab):
+    return {(r, c): v for r, cols in crosstab.items() for c, v in cols.items()}
+
+
+def test_cube_matches_python_counts():
+    store = make_store(N, statuses=STATUSES)
+    cube = StatCube.from_records(store, ACTIVE_STATUS)
+    assert cube.total == N
+    assert cube.active == sum(rec.active for rec in store)
+    assert cube.table("dir") == _counts(store, lambda r: r.yunalish)
+    assert cube.table("group") == _counts(store, lambda r: r.guruh)
+    assert _flat(cube.crosstab("dir", "group")) == _counts(store, lambda r: (r.yunalish, r.guruh))
+    assert _flat(cube.crosstab("dir", "status")) == _counts(store, lambda r: (r.yunalish, r.status))
+
+
+def test_incremental_update_matches_full():
+    store = make_store(N, statuses=STATUSES)
+    fresh = make_store(N, seed=2, statuses=STATUSES)
+    records = list(store.records)
+    for i in range(0, N, 20):
+        records[i] = fresh.records[i]
+    new = StudentStore(records, store.required_status)
+
+    agg = update_aggregates(Aggregates.from_store(store, 1), store, new, 2)
+    full = Aggregates.from_store(new, 2)
+    assert agg.version == 2
+    assert (agg.total, agg.active) == (full.total, full.active)
+    assert agg.per_dir == full.per_dir
+    assert agg.per_group == full.per_group
+    assert _flat(agg.cube.crosstab("dir", "status")) == _flat(full.cube.crosstab("dir", "status"))
@@ -0,0 +1,75 @@
+import os
+
+from benchmarks.common import ACTIVE_STATUS, make_rows
+from columns import IDX_STAT
+from follow import ID, FollowStore, watched
+from records import StudentStore
+
+N = 200
+
+
+def _stores():
+    rows = make_rows(N)
+    old = StudentStore.from_rows(rows, ACTIVE_STATUS)
+    edited = [list(r) for r in rows]
+    edited[1][IDX_STAT] = "Akademik ta'tilda" if old.records[0].active else ACTIVE_STATUS
+    return old, StudentStore.from_rows(edited, ACTIVE_STATUS)
+
+
+def test_follow_is_seen_by_other_worker(tmp_path):
+    path = os.path.join(tmp_path, "follows.sqlite3")
+    a, b = FollowStore(path), FollowStore(path)
+    old, new = _stores()
+    hemis = old.records[0].hemis
+
+    a.follow(1, ID, hemis, "Talaba")
+    assert b.following(1) == [(ID, hemis.lower(), "Talaba")]
+    assert a.unfollow(1) == 1
+    assert b.following(1) == []
+    a.close()
+    b.close()
+
+
+def test_single_worker_pushes(tmp_path):
+    path = os.path.join(tmp_path, "follows.sqlite3")
+    a, b = FollowStore(path), FollowStore(path)
+    old, new = _stores()
+    a.follow(1, ID, old.records[0].hemis, "Talaba")
+    for store in (a, b):
+        store.observe("", old)
+        store.observe("", new)
+
+    # ijara birinchi navbatga qo'ygan workerda; ikkinchisi xabar yubormaydi
+    assert list(a.drain()) == [1]
+    assert b.drain() == {}
+
+    # ijara muddati tugasa boshqa worker egallaydi
+    a._conn.execute("UPDATE leases SET expires = 0")
+    b.observe("", old)
+    assert list(b.drain()) == [1]
+    a.close()
+    b.close()
+
+
+def test_observe_coalesces_pending_changes():
+    rows = make_rows(N)
+    stores = []
+    for status in (None, "Ishsiz", "Akademik ta'tilda"):
+        edited = [list(r) for r in rows]
+        if status is not None:
+            edited[1][IDX_STAT] = status
+        stores.append(StudentStore.from_rows(edited, ACTIVE_STATUS))
+    store = FollowStore("")
+    store.follow(1, ID, stores[0].records[0].hemis, "Talaba")
+    for s in stores:
+        store.observe("", s)
+
+    # ikki o'zgarish bitta xabar: eng eski holat -> eng yangi holat
+    (change,) = store.drain()[1]
+    assert change.old == watched(stores[0].records[0])
+    assert change.new == watched(stores[2].records[0])
+
+    # boshlang'ich holatga qaytgan o'zgarish navbatdan olib tashlanadi
+    store.observe("", stores[1])
+    store.observe("", stores[2])
+    assert store.drain() == {}
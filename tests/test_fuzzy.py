@@ -0,0 +1,148 @@
+import copy
+import time
+from collections import namedtuple
+
+import pytest
+
+import fuzzy
+from benchmarks.common import make_store
+from columns import IDX_FIO
+from config import FUZZY_BUDGET, FUZZY_LIMIT
+from fuzzy import FuzzyIndex, fuzzy_for
+from records import Student, StudentStore, changed_positions
+
+N = 5000
+
+# Oltin natijalar: (so'rov, kutilgan FIO qismi) — ``make_rows`` ismlariga mos
+GOLDEN = [
+    ("КАРИМОВ АЗИЗ", "KARIMOV AZIZ"),                # kirill
+    ("Жўраева Малика", "JO'RAYEVA MALIKA"),          # kirill + ў
+    ("joʻrayeva malika", "JO'RAYEVA MALIKA"),        # boshqa apostrof
+    ("jorayeva", "JO'RAYEVA"),                       # apostrofsiz
+    ("g'ayrat o‘g‘li", "G'AYRAT O'G'LI"),            # aralash apostroflar
+    ("toshmatov jasr", "TOSHMATOV JASUR"),           # xato (harf tushib qolgan)
+    ("rahimova dilnoza", "RAHIMOVA DILNOZA"),        # lotin, kichik harf
+    ("Qodirva Kamola", "QODIROVA KAMOLA"),           # xato
+]
+
+Snap = namedtuple("Snap", "version rows")
+
+
+@pytest.fixture(scope="module")
+def store():
+    return make_store(N)
+
+
+@pytest.fixture(scope="module")
+def index(store):
+    return FuzzyIndex(store, version=1)
+
+
+@pytest.mark.parametrize("query,expected", GOLDEN)
+def test_golden(store, index, query, expected):
+    rows = index.find(query)
+    top = [store[r].fio for r in rows[:5]]
+    assert top, query
+    assert all(expected in fio for fio in top), top
+
+
+def _edited(store, step: int, seed: int = 2):
+    fresh = make_store(len(store), seed=seed)
+    records = list(store.records)
+    for i in range(0, len(store), step):
+        records[i] = fresh.records[i]
+    return StudentStore(records, store.required_status)
+
+
+def _assert_same(a: FuzzyIndex, b: FuzzyIndex):
+    assert a.row_ids == b.row_ids
+    assert a._keys == b._keys
+    assert list(a._sizes) == list(b._sizes)
+    assert a._blob == b._blob and a._starts == b._starts
+    assert {g: list(p) for g, p in a._grams.items()} == {g: list(p) for g, p in b._grams.items()}
+
+
+def test_updated_matches_rebuild(store, index):
+    new = _edited(store, 50)
+    snapshot = {g: list(p) for g, p in index._grams.items()}
+    idx = index.updated(store, new, changed_positions(store, new), version=2)
+    assert idx is not None and idx.version == 2
+    _assert_same(idx, FuzzyIndex(new, version=2))
+    for query, expected in GOLDEN:
+        assert idx.find(query) == FuzzyIndex(new).find(query)
+    # eski indeks o'zgarmaydi
+    assert {g: list(p) for g, p in index._grams.items()} == snapshot
+
+
+def test_updated_needs_rebuild_when_fio_appears(store, index):
+    records = list(store.records)
+    r = [""] * (IDX_FIO + 1)
+    records[7] = Student(7, r, store.required_status)
+    new = StudentStore(records, store.required_status)
+    assert index.updated(store, new, [7], version=2) is None
+
+
+def test_fuzzy_for_updates_incrementally(store, monkeypatch):
+    cache = copy.copy(fuzzy._CACHE)
+    cache.clear()
+    monkeypatch.setattr(fuzzy, "_CACHE", cache)
+    built = []
+    real_init = FuzzyIndex.__init__
+
+    def counting_init(self, *args, **kwargs):
+        built.append(1)
+        real_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(FuzzyIndex, "__init__", counting_init)
+    first = fuzzy_for(Snap(1, store), "t")
+    new = _edited(store, 100)
+    second = fuzzy_for(Snap(2, new), "t")
+    assert len(built) == 1  # ikkinchi versiya inkremental
+    assert second.version == 2
+    assert fuzzy_for(Snap(2, new), "t") is second
+    assert fuzzy_for(Snap(1, store), "t") is first  # oldingi versiya saqlanadi
+    assert second.find("toshmatov jasr") == FuzzyIndex(new).find("toshmatov jasr")
+
+
+@pytest.fixture(scope="module")
+def large():
+    store = make_store(100_000)
+    return store, FuzzyIndex(store, version=1)
+
+
+@pytest.mark.parametrize("query,expected", [
+    ("xolmatva gulnora farhd qizi", "XOLMATOVA GULNORA FARHOD QIZI"),
+    ("qodirva kamola baxtiyr qizi", "QODIROVA KAMOLA BAXTIYOR QIZI"),
+    ("toshmatov jasr", "TOSHMATOV JASUR"),
+    ("a", None),
+    ("ov", None),
+])
+def test_latency_budget_at_100k_rows(large, query, expected):
+    store, idx = large
+    times = []
+    for _ in range(3):
+        t0 = time.perf_counter()
+        rows = idx.find(query)
+        times.append(time.perf_counter() - t0)
+    # byudjet sanash va saralashni qamraydi; normalizatsiya va shovqin uchun zaxira
+    assert min(times) < FUZZY_BUDGET * 1.5, times
+    assert 0 < len(rows) <= FUZZY_LIMIT
+    if expected:
+        assert store[rows[0]].fio.startswith(expected)
+
+
+def _grown(store, extra: int):
+    fresh = make_store(len(store) + extra, seed=4)
+    tail = list(fresh.records[len(store):])
+    tail[0] = Student(len(store), [""] * 36, store.required_status)
+    return StudentStore(list(store.records) + tail, store.required_status)
+
+
+def test_updated_handles_appended_and_truncated_rows(store, index):
+    new = _grown(store, 4)
+    grown = index.updated(store, new, changed_positions(store, new), version=2)
+    assert grown is not None
+    _assert_same(grown, FuzzyIndex(new, version=2))
+    shrunk = grown.updated(new, store, changed_positions(new, store), version=3)
+    assert shrunk is not None
+    _assert_same(shrunk, FuzzyIndex(store, version=3))
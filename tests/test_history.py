@@ -0,0 +1,55 @@
+import os
+
+from aggregates import Aggregates
+from benchmarks.common import ACTIVE_STATUS, make_rows
+from columns import IDX_STAT
+from history import DIRECTION, GROUP, TOTAL, HistoryStore
+from records import StudentStore
+
+N = 500
+DAY = 740000
+
+
+def _aggs():
+    rows = make_rows(N)
+    old = StudentStore.from_rows(rows, ACTIVE_STATUS)
+    edited = [list(r) for r in rows]
+    rec = old.records[0]
+    edited[1][IDX_STAT] = "Ishsiz" if rec.active else ACTIVE_STATUS
+    new = StudentStore.from_rows(edited, ACTIVE_STATUS)
+    return Aggregates.from_store(old, 1), Aggregates.from_store(new, 2), rec
+
+
+def test_only_changed_keys_are_written(tmp_path):
+    path = os.path.join(tmp_path, "history.sqlite3")
+    old, new, rec = _aggs()
+    store = HistoryStore(path)
+    first = store.record(old, day=DAY)
+    assert first == 1 + len(old.per_dir) + len(old.per_group)
+    assert store.record(old, day=DAY + 1) == 0
+    # bitta talaba holati: jami, uning yo'nalishi va guruhi
+    assert store.record(new, day=DAY + 2) == 3
+
+    # qayta ochilganda oxirgi qiymatlar SQLite'dan o'qiladi
+    store.close()
+    store = HistoryStore(path)
+    assert store.record(new, day=DAY + 3) == 0
+    store.close()
+
+
+def test_series_carries_values_forward():
+    old, new, rec = _aggs()
+    store = HistoryStore(":memory:")
+    store.record(old, day=DAY)
+    store.record(new, day=DAY + 3)
+    days = list(range(DAY - 1, DAY + 5))
+
+    total = store.series(TOTAL, days)[""]
+    before, after = (old.total, old.active), (new.total, new.active)
+    assert total == [(0, 0)] + [before] * 3 + [after] * 2
+    # oyna ichida nuqta bo'lmasa ham undan oldingi holat olinadi
+    assert store.series(TOTAL, days[2:])[""] == [before] * 2 + [after] * 2
+
+    groups = store.series(GROUP, [DAY + 4])
+    assert groups[rec.guruh] == [tuple(new.per_group[rec.guruh])]
+    assert store.series(DIRECTION, [DAY + 4])[rec.yunalish] == [tuple(new.per_dir[rec.yunalish])]
@@ -0,0 +1,79 @@
+import pytest
+
+from benchmarks.common import make_store
+from index import SearchIndex, scan_rows
+from records import Student, StudentStore, changed_positions
+
+N = 2000
+
+
+@pytest.fixture(scope="module")
+def store():
+    return make_store(N)
+
+
+def _queries(store):
+    return [
+        store[N // 2].jshshir,                 # to'liq JSHSHIR
+        store[N // 3].hemis[-5:],              # ID qismi
+        store[N // 4].fio.split()[0].lower(),  # familiya
+        "karimov aziz",                        # ism qismi
+        "zz",                                  # qisqa so'rov
+        "yo'q odam",                           # topilmaydi
+    ]
+
+
+def test_index_matches_scan(store):
+    idx = SearchIndex(store, version=1)
+    for q in _queries(store):
+        assert idx.search(q) == scan_rows(store, q), q
+
+
+def test_updated_index_matches_rebuild(store):
+    fresh = make_store(N, seed=2)
+    records = list(store.records)
+    for i in range(0, N, 50):
+        records[i] = fresh.records[i]
+    new = StudentStore(records, store.required_status)
+
+    old_idx = SearchIndex(store, version=1)
+    idx = old_idx.updated(store, new, changed_positions(store, new), version=2)
+    assert idx is not None and idx.version == 2
+    for q in _queries(new) + _queries(store):
+        assert idx.search(q) == scan_rows(new, q), q
+    # eski indeks o'zgarmaydi
+    for q in _queries(store):
+        assert old_idx.search(q) == scan_rows(store, q), q
+
+
+def _assert_same(a: SearchIndex, b: SearchIndex):
+    assert a.row_ids == b.row_ids
+    assert (a._fio, a._ids) == (b._fio, b._ids)
+    assert (a.by_uid, a.by_hemis, a.by_jsh) == (b.by_uid, b.by_hemis, b.by_jsh)
+    assert {g: list(p) for g, p in a._grams.items()} == {g: list(p) for g, p in b._grams.items()}
+    assert (a._fio_blob, a._id_blob) == (b._fio_blob, b._id_blob)
+
+
+def _grown(store, extra: int):
+    """``store`` + oxirida ``extra`` ta yangi yozuv (bittasi bo'sh qator)."""
+    fresh = make_store(len(store) + extra, seed=4)
+    tail = list(fresh.records[len(store):])
+    tail[0] = Student(len(store), [""] * 36, store.required_status)
+    return StudentStore(list(store.records) + tail, store.required_status)
+
+
+@pytest.mark.parametrize("extra", [2, 5])
+def test_updated_handles_appended_rows(store, extra):
+    new = _grown(store, extra)
+    idx = SearchIndex(store, version=1).updated(store, new, changed_positions(store, new), version=2)
+    assert idx is not None
+    _assert_same(idx, SearchIndex(new, version=2))
+    last = new[len(new) - 1]
+    assert idx.lookup(last.hemis) == [last.row]
+
+
+def test_updated_handles_truncated_rows(store):
+    old = _grown(store, 5)
+    idx = SearchIndex(old, version=1).updated(old, store, changed_positions(old, store), version=2)
+    assert idx is not None
+    _assert_same(idx, SearchIndex(store, version=2))
@@ -0,0 +1,39 @@
+from benchmarks.common import make_store
+from inline import InlineResults
+
+N = 120
+
+
+def test_pages_and_offsets():
+    store = make_store(N)
+    cache = InlineResults(page_size=20)
+    row_ids = list(range(0, N, 2))  # 60 ta natija
+
+    results, offset = cache.page(store, 1, row_ids, "")
+    assert len(results) == 20 and offset == "20"
+    assert results[0].id == "1:0" and results[1].id == "1:2"
+    results, offset = cache.page(store, 1, row_ids, "40")
+    assert len(results) == 20 and offset == ""
+    # noto'g'ri offset — birinchi sahifa
+    assert cache.page(store, 1, row_ids, "abc")[0][0].id == "1:0"
+
+
+def test_page_size_capped_by_telegram_limit():
+    assert InlineResults(page_size=500).page_size == 50
+
+
+def test_articles_cached_per_version():
+    store = make_store(N)
+    cache = InlineResults(max_entries=10)
+    art = cache.article(3, store[3], 1)
+    assert store[3].fio in art.title
+    assert cache.article(3, store[3], 1) is art
+    assert cache.stats()["hits"] == 1
+
+    # yangi versiya — yangi id bilan qayta quriladi
+    fresh = cache.article(3, store[3], 2)
+    assert fresh is not art and fresh.id == "2:3"
+
+    for row in range(20):
+        cache.article(row, store[row], 2)
+    assert cache.stats()["entries"] == 10
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.common import FakeBot, FloodError
+from outbox import Outbox
+
+
+class BadRequest(Exception):
+    pass
+
+
+class ScriptedBot:
+    """Chaqiruvlarni (vaqt, metod, kwargs) sifatida yozadi; ``fail`` — metod -> navbatdagi xatolar."""
+
+    def __init__(self, fail=None):
+        self.calls = []
+        self.fail = {m: list(errs) for m, errs in (fail or {}).items()}
+        self._next_id = 100
+
+    async def _call(self, method, **kwargs):
+        self.calls.append((time.monotonic(), method, kwargs))
+        errors = self.fail.get(method)
+        if errors:
+            raise errors.pop(0)
+        self._next_id += 1
+        return SimpleNamespace(message_id=self._next_id)
+
+    async def send_message(self, **kwargs):
+        return await self._call("send_message", **kwargs)
+
+    async def edit_message_text(self, **kwargs):
+        return await self._call("edit_message_text", **kwargs)
+
+    async def delete_message(self, **kwargs):
+        return await self._call("delete_message", **kwargs)
+
+    def times(self, method):
+        return [t for t, m, _ in self.calls if m == method]
+
+
+def run(coro, timeout: float = 10.0):
+    return asyncio.run(asyncio.wait_for(coro, timeout))
+
+
+def _gaps(times):
+    return [b - a for a, b in zip(times, times[1:])]
+
+
+def test_flood_waits_retry_after():
+    bot = ScriptedBot(fail={"send_message": [FloodError(0.3)]})
+    outbox = Outbox(global_rate=1000, chat_interval=0.0, workers=1)
+
+    msg = run(outbox.send_message(bot, 1, "salom"))
+    assert msg.message_id == 101
+    first, second = bot.times("send_message")
+    assert second - first >= 0.3 * 0.95
+    assert outbox.retried == 1 and outbox.sent == 1 and outbox.failed == 0
+
+
+def test_flood_pauses_all_chats():
+    # 429 bot bo'yicha bo'lishi mumkin: retry_after tugaguncha boshqa chatlarga ham yuborilmaydi
+    bot = ScriptedBot(fail={"send_message": [FloodError(0.4)]})
+    outbox = Outbox(global_rate=1000, chat_interval=0.0, workers=4)
+
+    async def main():
+        await asyncio.gather(*(outbox.send_message(bot, chat_id, "x") for chat_id in range(1, 6)))
+
+    run(main())
+    first, *rest = bot.times("send_message")
+    assert len(rest) == 5
+    assert min(rest) - first >= 0.4 * 0.95
+    assert outbox.retried == 1 and outbox.sent == 5
+
+
+def test_per_chat_and_group_spacing():
+    bot = ScriptedBot()
+    outbox = Outbox(global_rate=1000, chat_interval=0.1, group_interval=0.25, workers=4)
+
+    async def main():
+        await asyncio.gather(*(outbox.send_message(bot, 7, f"m{i}") for i in range(4)),
+                             *(outbox.send_message(bot, -100, f"g{i}") for i in range(3)))
+
+    run(main())
+    by_chat = {}
+    for t, _, kw in bot.calls:
+        by_chat.setdefault(kw["chat_id"], []).append(t)
+    assert len(by_chat[7]) == 4 and len(by_chat[-100]) == 3
+    assert min(_gaps(by_chat[7])) >= 0.1 * 0.95
+    assert min(_gaps(by_chat[-100])) >= 0.25 * 0.95
+
+
+def test_global_rate_stays_under_telegram_limit():
+    # FakeBot sirpanuvchi 1 soniyalik oynada 30 dan ortiq xabarga 429 qaytaradi
+    bot = FakeBot(latency=0.0, chat_interval=0.0, global_rate=30.0)
+    outbox = Outbox(global_rate=25.0, chat_interval=0.0, workers=8)
+
+    async def main():
+        t0 = time.monotonic()
+        await asyncio.gather(*(outbox.send_message(bot, 1000 + c, "x") for c in range(40)))
+        return time.monotonic() - t0
+
+    elapsed = run(main())
+    assert bot.floods == 0
+    assert len(bot.calls) == 40
+    assert elapsed >= (40 - outbox._burst) / 25.0 * 0.95
+
+
+def test_queued_edits_are_merged():
+    bot = ScriptedBot()
+    outbox = Outbox(global_rate=1000, chat_interval=0.2, workers=2)
+
+    async def main():
+        await outbox.send_message(bot, 1, "boshi")
+        # chat oralig'i tugaguncha tahrirlar navbatda turadi
+        return await asyncio.gather(*(outbox.edit_message_text(bot, 1, 55, f"v{i}") for i in range(4)))
+
+    results = run(main())
+    edits = [kw for _, m, kw in bot.calls if m == "edit_message_text"]
+    assert [kw["text"] for kw in edits] == ["v3"]
+    assert all(r is results[0] for r in results)
+    assert outbox.coalesced == 3
+
+
+def test_queued_replacements_are_merged():
+    bot = ScriptedBot()
+    outbox = Outbox(global_rate=1000, chat_interval=0.2, workers=2)
+
+    async def main():
+        first = await outbox.send_message(bot, 1, "sahifa 0")
+        return await asyncio.gather(outbox.replace_message(bot, 1, first.message_id, "sahifa 1"),
+                                    outbox.replace_message(bot, 1, 999, "sahifa 2"))
+
+    a, b = run(main())
+    assert a is b
+    methods = [(m, kw.get("message_id"), kw.get("text")) for _, m, kw in bot.calls]
+    # eng eski xabar o'chiriladi va faqat oxirgi sahifa yuboriladi
+    assert methods == [("send_message", None, "sahifa 0"), ("delete_message", 101, None),
+                       ("send_message", None, "sahifa 2")]
+
+
+def test_delete_cancels_pending_edits():
+    bot = ScriptedBot()
+    outbox = Outbox(global_rate=1000, chat_interval=0.2, workers=2)
+
+    async def main():
+        await outbox.send_message(bot, 1, "boshi")
+        return await asyncio.gather(outbox.edit_message_text(bot, 1, 55, "yangi"),
+                                    outbox.delete_message(bot, 1, 55))
+
+    edited, _ = run(main())
+    assert edited is None
+    assert [m for _, m, _ in bot.calls] == ["send_message", "delete_message"]
+
+
+def test_exhausted_retries_keep_worker_alive():
+    bot = ScriptedBot(fail={"send_message": [FloodError(0.01)] * 3 + [BadRequest("chat not found")]})
+    outbox = Outbox(global_rate=1000, chat_interval=0.0, workers=1, max_retries=2)
+
+    async def main():
+        with pytest.raises(FloodError):
+            await outbox.send_message(bot, 1, "a")
+        with pytest.raises(BadRequest):  # 429 bo'lmagan xato qayta urinilmaydi
+            await outbox.send_message(bot, 1, "b")
+        # yagona worker tirik: keyingi xabarlar yuboriladi
+        return await asyncio.gather(outbox.send_message(bot, 1, "c"), outbox.send_message(bot, 2, "d"))
+
+    c, d = run(main())
+    assert c.message_id and d.message_id
+    assert len(bot.times("send_message")) == 3 + 1 + 2
+    assert outbox.failed == 2 and outbox.retried == 2 and outbox.sent == 2
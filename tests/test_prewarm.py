@@ -0,0 +1,24 @@
+import asyncio
+import time
+from collections import namedtuple
+
+import handlers
+from benchmarks.common import make_store
+
+Snapshot = namedtuple("Snapshot", ["version", "rows", "fetched_at"])
+
+
+def test_prewarm_skips_warm_version(monkeypatch):
+    monkeypatch.setattr(handlers, "PREWARM", {"version": 0, "runs": 0, "last_ms": 0.0})
+    warmed = []
+    real = handlers._prewarm_data
+    monkeypatch.setattr(handlers, "_prewarm_data", lambda snap: (warmed.append(snap.version), real(snap)))
+    store = make_store(500)
+    first, second = Snapshot(1, store, time.monotonic()), Snapshot(2, make_store(500, seed=2), time.monotonic())
+
+    async def main():
+        return [await handlers.prewarm(snap) for snap in (first, first, second, second)]
+
+    assert asyncio.run(main()) == [True, False, True, False]
+    assert warmed == [1, 2]
+    assert handlers.PREWARM["version"] == 2 and handlers.PREWARM["runs"] == 2
@@ -0,0 +1,55 @@
+from benchmarks.common import make_store
+from querycache import QueryCache
+
+
+class _Search:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self, query):
+        self.calls += 1
+        return self.result
+
+
+def test_hit_and_miss():
+    store = make_store(100)
+    cache, search = QueryCache(), _Search([1, 2, 3])
+    row_ids, active = cache.get(store, "Aziz", search)
+    assert list(row_ids) == [1, 2, 3]
+    assert active == sum(store[i].active for i in (1, 2, 3))
+    # normalize_query: katta-kichik harf va bo'shliqlar bir xil kalit
+    assert cache.get(store, "  aziz ", search)[0] is row_ids
+    assert search.calls == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["entries"] == 1
+
+
+def test_lru_limit():
+    store = make_store(100)
+    cache, search = QueryCache(max_entries=2), _Search([0])
+    for q in ("a", "b", "a", "c"):
+        cache.get(store, q, search)
+    cache.get(store, "a", search)
+    assert search.calls == 3  # "b" chiqarib yuborildi, "a" qoldi
+    cache.get(store, "b", search)
+    assert search.calls == 4
+
+
+def test_alternating_versions_keep_both_generations():
+    old, new, newest = make_store(100, seed=1), make_store(100, seed=2), make_store(100, seed=3)
+    cache, search = QueryCache(), _Search([0])
+    cache.get(old, "a", search)
+    cache.get(new, "a", search)
+    for _ in range(3):
+        cache.get(old, "a", search)
+        cache.get(new, "a", search)
+    assert search.calls == 2 and cache.stats()["invalidations"] == 0
+
+    # uchinchi versiya eng eski avlodni tashlaydi
+    cache.get(newest, "a", search)
+    assert cache.stats()["invalidations"] == 1
+    cache.get(new, "a", search)
+    assert search.calls == 3
+    cache.get(old, "a", search)
+    assert search.calls == 4
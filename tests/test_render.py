@@ -0,0 +1,42 @@
+from benchmarks.common import make_store
+from render import RenderCache
+
+
+def test_card_hit_and_miss():
+    store = make_store(20)
+    cache = RenderCache()
+    text = cache.card(3, store[3], "v1")
+    assert store[3].fio in text
+    assert cache.card(3, store[3], "v1") is text
+    stats = cache.stats()
+    assert stats["card_hits"] == 1 and stats["card_misses"] == 1 and stats["cards"] == 1
+
+
+def test_page_lru_limit():
+    cache = RenderCache(max_pages=2)
+    built = []
+
+    def build(key):
+        def run():
+            built.append(key)
+            return key
+        return run
+
+    for page in (0, 1, 0, 2, 0, 1):
+        assert cache.page("aziz", page, "v1", build(page)) == page
+    assert built == [0, 1, 2, 1]  # 1-sahifa 2-sidan keyin chiqarib yuborilgan
+
+
+def test_alternating_versions_keep_both_generations():
+    store = make_store(20)
+    cache = RenderCache()
+    for _ in range(3):
+        cache.card(0, store[0], "old")
+        cache.card(0, store[0], "new")
+    stats = cache.stats()
+    assert stats["card_misses"] == 2 and stats["card_hits"] == 4 and stats["invalidations"] == 0
+
+    cache.card(0, store[0], "newest")
+    assert cache.stats()["invalidations"] == 1
+    cache.card(0, store[0], "old")
+    assert cache.stats()["card_misses"] == 4
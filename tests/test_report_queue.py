@@ -0,0 +1,61 @@
+import asyncio
+import threading
+
+import pytest
+
+from report import ReportBusy, ReportQueue
+
+
+def test_same_key_shares_one_job():
+    queue = ReportQueue(workers=2, max_pending=4)
+    calls = []
+
+    def build(tag):
+        calls.append(tag)
+        return b"pdf"
+
+    async def main():
+        jobs = [queue.submit((1, "", "pdf"), build, i) for i in range(5)]
+        assert all(job is jobs[0] for job in jobs)
+        return await asyncio.gather(*(queue.result(job) for job in jobs))
+
+    assert asyncio.run(main()) == [b"pdf"] * 5
+    assert calls == [0]
+    assert queue.cached((1, "", "pdf")) == b"pdf"
+    stats = queue.stats()
+    assert stats["built"] == 1 and stats["deduplicated"] == 4 and stats["queued"] == stats["running"] == 0
+
+
+def test_full_queue_is_busy():
+    queue = ReportQueue(workers=1, max_pending=2)
+    release = threading.Event()
+
+    async def main():
+        jobs = [queue.submit((1, name, "pdf"), release.wait, 5) for name in ("a", "b")]
+        with pytest.raises(ReportBusy):
+            queue.submit((1, "c", "pdf"), release.wait, 5)
+        # navbatdagi kalit baribir birlashtiriladi
+        assert queue.submit((1, "b", "pdf"), release.wait, 5) is jobs[1]
+        while jobs[0].state != "running":
+            await asyncio.sleep(0.001)
+        assert queue.position(jobs[0]) == 0 and queue.position(jobs[1]) == 1
+        release.set()
+        await asyncio.gather(*(queue.result(job) for job in jobs))
+        # navbat bo'shagach yangi ish qabul qilinadi
+        job = queue.submit((1, "c", "pdf"), release.wait, 5)
+        await queue.result(job)
+
+    asyncio.run(main())
+    assert queue.stats()["built"] == 3
+
+
+def test_new_version_prunes_old_files():
+    queue = ReportQueue(workers=1, max_pending=2)
+
+    async def main():
+        for version in (1, 2):
+            await queue.result(queue.submit((version, "", "xlsx"), bytes, 3))
+
+    asyncio.run(main())
+    assert queue.cached((1, "", "xlsx")) is None
+    assert queue.cached((2, "", "xlsx")) == bytes(3)
@@ -0,0 +1,144 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.common import FakeWorksheet, make_rows
+from sheets import CircuitBreaker, SheetSnapshot, is_retryable, with_retry
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class APIError(Exception):
+    """gspread.exceptions.APIError kabi: ``response.status_code`` bilan."""
+
+    def __init__(self, status: int):
+        super().__init__(f"HTTP {status}")
+        self.response = SimpleNamespace(status_code=status)
+
+
+@pytest.fixture
+def executor():
+    pool = ThreadPoolExecutor(max_workers=2)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retries_transient_errors(status):
+    ws = FakeWorksheet(make_rows(3), errors=[APIError(status), APIError(status)])
+    sleeps = []
+    rows = with_retry(ws.get_all_values, retries=3, backoff=0.5, sleep=sleeps.append)()
+    assert rows == ws.rows
+    assert ws.calls == 3
+    assert len(sleeps) == 2
+    assert 0 <= sleeps[0] <= 0.5 and 0 <= sleeps[1] <= 1.0  # jitter'li eksponensial
+
+
+@pytest.mark.parametrize("error", [APIError(400), APIError(403), APIError(404), ValueError("parse")])
+def test_does_not_retry_permanent_errors(error):
+    ws = FakeWorksheet(make_rows(3), errors=[error])
+    sleeps = []
+    with pytest.raises(type(error)):
+        with_retry(ws.get_all_values, retries=3, sleep=sleeps.append)()
+    assert ws.calls == 1 and sleeps == []
+
+
+def test_gives_up_after_retries():
+    ws = FakeWorksheet(make_rows(3), errors=[APIError(503)] * 5)
+    with pytest.raises(APIError):
+        with_retry(ws.get_all_values, retries=2, sleep=lambda _: None)()
+    assert ws.calls == 3
+
+
+def test_network_errors_are_retryable():
+    assert is_retryable(ConnectionError())
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(KeyError("x"))
+
+
+def test_breaker_open_half_open_closed():
+    clock = Clock()
+    breaker = CircuitBreaker(threshold=3, reset_timeout=30, clock=clock)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now += 29
+    assert breaker.state == "open"
+    clock.now += 1
+    assert breaker.state == "half-open" and breaker.allow()
+    # sinov so'rovi muvaffaqiyatsiz — yana to'liq reset_timeout ochiq
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 30
+    assert breaker.state == "half-open"
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_last_good_snapshot_served_on_failures(executor):
+    clock = Clock()
+    ws = FakeWorksheet(make_rows(5))
+    breaker = CircuitBreaker(threshold=2, reset_timeout=120, clock=clock)
+    snap = SheetSnapshot(ws.get_all_values, ttl=60, clock=clock, executor=executor, breaker=breaker)
+    good = snap.get()
+
+    # fetch xatosi: oxirgi yaxshi nusxa qaytadi, xato yozib qo'yiladi
+    ws.errors = [APIError(503), APIError(503)]
+    assert snap.refresh() is good
+    assert isinstance(snap.last_error, APIError)
+    assert snap.refresh() is good
+    assert breaker.state == "open" and ws.calls == 3
+
+    # breaker ochiq: Sheets'ga murojaat yo'q, eskirgan nusxa beriladi
+    clock.now += 61
+    assert snap.refresh() is good
+    assert snap.get() is good
+    assert asyncio.run(snap.aget()) is good
+    time.sleep(0.05)
+    assert ws.calls == 3
+
+    # half-open: bitta sinov so'rovi o'tadi va yangi ma'lumot e'lon qilinadi
+    clock.now += 60
+    ws.rows = make_rows(5, seed=2)
+    fresh = snap.refresh()
+    assert fresh.version == 2 and fresh.rows == ws.rows
+    assert breaker.state == "closed" and snap.last_error is None
+    assert ws.calls == 4
+
+
+def test_first_load_failure_raises(executor):
+    ws = FakeWorksheet(make_rows(5), errors=[APIError(500)])
+    snap = SheetSnapshot(ws.get_all_values, ttl=60, clock=Clock(), executor=executor)
+    with pytest.raises(APIError):
+        snap.get()
+    assert snap.current is None
+    assert snap.get().version == 1
+
+
+def test_aget_times_out_and_fetch_completes_in_background(executor):
+    ws = FakeWorksheet(make_rows(5), delay=0.3)
+    snap = SheetSnapshot(ws.get_all_values, ttl=60, clock=Clock(), executor=executor, timeout=0.05)
+
+    async def main():
+        t0 = time.perf_counter()
+        with pytest.raises(asyncio.TimeoutError):
+            await snap.aget()
+        waited = time.perf_counter() - t0
+        await asyncio.sleep(0.5)
+        return waited, await snap.aget()
+
+    waited, loaded = asyncio.run(main())
+    assert waited < 0.25
+    assert loaded.version == 1 and ws.calls == 1
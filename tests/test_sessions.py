@@ -0,0 +1,99 @@
+import os
+
+from sessions import Session, SessionStore, SQLiteSessionStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _sess(n: int = 3) -> Session:
+    return Session("aziz", "d1", range(n), 1)
+
+
+def test_ttl_expires_untouched_sessions():
+    clock = Clock()
+    store = SessionStore(ttl=60, clock=clock)
+    store.put(1, _sess())
+    clock.now += 59
+    assert store.get(1) is not None  # tegilgani muddatni yangilaydi
+    clock.now += 59
+    assert store.get(1) is not None
+    clock.now += 60
+    assert store.get(1) is None
+    stats = store.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["expired"] == 1 and len(store) == 0
+
+
+def test_lru_evicts_least_recently_used():
+    clock = Clock()
+    store = SessionStore(max_entries=2, ttl=60, clock=clock)
+    store.put(1, _sess())
+    store.put(2, _sess())
+    store.get(1)
+    store.put(3, _sess())
+    assert store.get(2) is None
+    assert store.get(1) is not None and store.get(3) is not None
+    assert store.stats()["evicted"] == 1
+
+
+def test_byte_limit_evicts_oldest():
+    store = SessionStore(ttl=60, max_bytes=3 * _sess(1000).nbytes(), clock=Clock())
+    for chat_id in range(5):
+        store.put(chat_id, _sess(1000))
+    assert len(store) == 3 and store.stats()["bytes"] <= store.max_bytes
+    assert store.get(0) is None and store.get(4) is not None
+    # yagona katta sessiya limitdan oshsa ham saqlanadi
+    store.put(9, _sess(10000))
+    assert len(store) == 1 and store.get(9) is not None
+
+
+def test_sqlite_pop_does_not_count_lookups(tmp_path):
+    store = SQLiteSessionStore(os.path.join(tmp_path, "sessions.sqlite3"))
+    store.put(1, Session("aziz", "d1", [1, 2, 3], 2))
+    sess = store.pop(1)
+    assert sess.query == "aziz" and list(sess.row_ids) == [1, 2, 3]
+    assert store.pop(1) is None and len(store) == 0
+    stats = store.stats()
+    assert stats["hits"] == 0 and stats["misses"] == 0
+    store.close()
+
+
+def test_sqlite_sessions_are_shared_between_workers(tmp_path):
+    path = os.path.join(tmp_path, "sessions.sqlite3")
+    clock = Clock()
+    a, b = SQLiteSessionStore(path, ttl=60, clock=clock), SQLiteSessionStore(path, ttl=60, clock=clock)
+    sess = Session("aziz", "d1", [5, 7, 9], 2, page=1, page_msg_id=42)
+    a.put(1, sess)
+
+    got = b.get(1)
+    assert (got.query, got.snapshot, list(got.row_ids), got.active, got.page, got.page_msg_id) == \
+        ("aziz", "d1", [5, 7, 9], 2, 1, 42)
+    got.page, got.page_msg_id = 2, 43
+    b.save(1, got)
+    assert (a.get(1).page, a.get(1).page_msg_id) == (2, 43)
+
+    clock.now += 60
+    assert a.get(1) is None and a.stats()["expired"] == 1
+    a.close()
+    b.close()
+
+
+def test_sqlite_limits(tmp_path):
+    clock = Clock()
+    store = SQLiteSessionStore(os.path.join(tmp_path, "sessions.sqlite3"), max_entries=2, ttl=60, clock=clock)
+    for chat_id in (1, 2, 3):
+        clock.now += 1
+        store.put(chat_id, _sess())
+    assert store.get(1) is None and len(store) == 2
+
+    store.max_entries, store.max_bytes = 100, 2 * _sess(1000).nbytes()
+    for chat_id in (4, 5, 6):
+        clock.now += 1
+        store.put(chat_id, _sess(1000))
+    assert len(store) == 2 and store.get(4) is None and store.get(6) is not None
+    store.close()
@@ -0,0 +1,59 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import pytest
+
+from benchmarks.common import ACTIVE_STATUS, FakeWorksheet, make_rows
+from records import StudentStore
+from sheets import SheetGroup, SheetSnapshot
+
+parse = partial(StudentStore.from_rows, required_status=ACTIVE_STATUS)
+
+
+@pytest.fixture
+def executor():
+    pool = ThreadPoolExecutor(max_workers=4)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def _group(executor, delays, timeout: float):
+    sheets = {name: FakeWorksheet(make_rows(20, seed=i + 1), delay=delay) for i, (name, delay) in enumerate(delays)}
+    snaps = {name: SheetSnapshot(ws.get_all_values, ttl=60, parse=parse, executor=executor)
+             for name, ws in sheets.items()}
+    return SheetGroup(snaps, timeout=timeout, required_status=ACTIVE_STATUS), sheets
+
+
+def _wait_until(cond, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "kutish vaqti tugadi"
+        time.sleep(0.01)
+
+
+def test_slow_sheet_does_not_block_and_joins_later(executor):
+    group, sheets = _group(executor, [("tez", 0.0), ("sekin", 1.0)], timeout=0.2)
+
+    t0 = time.monotonic()
+    first = asyncio.run(group.aget())
+    assert time.monotonic() - t0 < 0.8
+    assert first.rows.names == ["tez"] and len(first.rows) == 20
+
+    # sekin varaq fonda yuklanib, keyingi so'rovga qo'shiladi (qayta fetch'siz)
+    _wait_until(lambda: group.snapshots["sekin"].current is not None)
+    second = asyncio.run(group.aget())
+    assert second.rows.names == ["tez", "sekin"] and len(second.rows) == 40
+    assert second.version == first.version + 1
+    assert asyncio.run(group.aget()) is second
+    assert sheets["sekin"].calls == 1 and sheets["tez"].calls == 1
+    assert group.stats()["loaded"] == 2
+
+
+def test_all_sheets_failing_raises(executor):
+    group, sheets = _group(executor, [("a", 0.0), ("b", 0.0)], timeout=1.0)
+    for ws in sheets.values():
+        ws.errors = [RuntimeError("503")] * 10
+    with pytest.raises(RuntimeError):
+        asyncio.run(group.aget())
@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from benchmarks.common import FakeWorksheet, make_rows
+from sheets import SheetSnapshot
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def executor():
+    pool = ThreadPoolExecutor(max_workers=4)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def _wait_until(cond, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "kutish vaqti tugadi"
+        time.sleep(0.01)
+
+
+def test_ttl_reuses_snapshot(executor):
+    ws = FakeWorksheet(make_rows(10))
+    clock = Clock()
+    snap = SheetSnapshot(ws.get_all_values, ttl=60, clock=clock, executor=executor)
+
+    first = snap.get()
+    assert ws.calls == 1 and first.version == 1
+    clock.now += 59
+    assert snap.get() is first
+    assert asyncio.run(snap.aget()) is first
+    assert snap.is_fresh()
+    assert ws.calls == 1
+
+
+def test_concurrent_get_and_aget_share_one_fetch(executor):
+    ws = FakeWorksheet(make_rows(10), delay=0.2)
+    snap = SheetSnapshot(ws.get_all_values, ttl=60, clock=Clock(), executor=executor)
+    callers = ThreadPoolExecutor(max_workers=8)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        blocking = [loop.run_in_executor(callers, snap.get) for _ in range(8)]
+        return await asyncio.gather(*blocking, *(snap.aget() for _ in range(8)))
+
+    try:
+        results = asyncio.run(main())
+    finally:
+        callers.shutdown(wait=True)
+    assert ws.calls == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_stale_while_revalidate():
+    # bitta oqim: navbatga qo'yilgan ortiqcha fon yangilashlar ketma-ket fetch bo'lib ko'rinadi
+    executor = ThreadPoolExecutor(max_workers=1)
+    ws = FakeWorksheet(make_rows(10))
+    clock = Clock()
+    snap = SheetSnapshot(ws.get_all_values, ttl=60, clock=clock, executor=executor)
+    old = snap.get()
+
+    release = threading.Event()
+    fetch = ws.get_all_values
+
+    def slow_fetch():
+        release.wait(5)
+        return fetch()
+
+    snap._fetch = slow_fetch
+    ws.rows = make_rows(10, seed=2)
+    clock.now += 61
+
+    t0 = time.perf_counter()
+    assert snap.get() is old
+    assert asyncio.run(snap.aget()) is old
+    for _ in range(20):
+        assert snap.get() is old
+    assert time.perf_counter() - t0 < 0.5  # fetch tugashini kutmaydi
+
+    release.set()
+    _wait_until(lambda: snap.version == 2)
+    executor.shutdown(wait=True)
+    assert ws.calls == 2  # boshlang'ich + bitta fon yangilash
+    assert snap.get().rows == ws.rows
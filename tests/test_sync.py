@@ -0,0 +1,64 @@
+import os
+
+from benchmarks.common import ACTIVE_STATUS, FakeWorksheet, make_rows, make_store
+from columns import IDX_FIO, IDX_STAT
+from records import StudentStore, changed_positions
+from snapfile import load_store, save_store
+from sync import ColumnSync, FullSync
+
+N = 1000
+
+
+def test_column_sync_matches_full_parse():
+    rows = make_rows(N)
+    ws = FakeWorksheet(rows)
+    sync = ColumnSync(ws, ACTIVE_STATUS)
+    first = sync.parse(sync.fetch())
+    assert first == StudentStore.from_rows(rows, ACTIVE_STATUS)
+
+    # o'zgarishsiz: yozuvlar qayta ishlatiladi
+    same = sync.parse(sync.fetch())
+    assert same == first and sync.last_changed == 0
+    assert all(a is b for a, b in zip(same.records, first.records))
+
+    edited = [list(r) for r in rows]
+    fresh = make_rows(N, seed=2)
+    for i in range(1, N + 1, 100):
+        edited[i][IDX_STAT] = fresh[i][IDX_STAT]
+        edited[i][IDX_FIO] = fresh[i][IDX_FIO]
+    ws.rows = edited
+    new = sync.parse(sync.fetch())
+    assert new == StudentStore.from_rows(edited, ACTIVE_STATUS)
+    assert 0 < sync.last_changed <= 10
+
+
+def test_full_sync_reuses_unchanged_rows():
+    rows = make_rows(N)
+    ws = FakeWorksheet(rows)
+    sync = FullSync(ws, ACTIVE_STATUS)
+    first = sync.parse(sync.fetch())
+    assert first == StudentStore.from_rows(rows, ACTIVE_STATUS)
+    assert sync.parse(sync.fetch()) is first
+
+    edited = [list(r) for r in rows]
+    edited[5][IDX_FIO] = "Yangi Ism"
+    ws.rows = edited
+    new = sync.parse(sync.fetch())
+    assert new == StudentStore.from_rows(edited, ACTIVE_STATUS)
+    assert sync.last_positions == [4] and changed_positions(first, new) == [4]
+
+
+def test_changed_positions_compares_content():
+    rows = make_rows(N)
+    old = StudentStore.from_rows(rows, ACTIVE_STATUS)
+    edited = [list(r) for r in rows]
+    edited[10][IDX_FIO] = "Yangi Ism"
+    # masalan diskdagi nusxa va birinchi jonli nusxa: obyektlar har xil, mazmun deyarli bir xil
+    assert changed_positions(old, StudentStore.from_rows(edited, ACTIVE_STATUS)) == [9]
+
+
+def test_snapshot_file_roundtrip(tmp_path):
+    store = make_store(N)
+    path = os.path.join(tmp_path, "snapshot.bin")
+    save_store(store, path)
+    assert load_store(path, ACTIVE_STATUS) == store
@@ -0,0 +1,57 @@
+from collections import namedtuple
+from types import SimpleNamespace
+
+from benchmarks.common import ACTIVE_STATUS, make_store
+from records import MultiStore, StudentStore
+from versioned import VersionedCache
+
+Snap = namedtuple("Snap", "version rows")
+
+
+def _cache(calls, ratio=0.1):
+    def build(store, version):
+        calls.append(("build", version))
+        return SimpleNamespace(version=version, store=store)
+
+    def update(value, old, new, changed, version):
+        calls.append(("update", version, len(changed)))
+        return SimpleNamespace(version=version, store=new)
+
+    def combine(store, parts, version):
+        return SimpleNamespace(version=version, parts=parts)
+
+    return VersionedCache(build, update, combine, rebuild_ratio=ratio)
+
+
+def _edited(store, count):
+    fresh = make_store(len(store), seed=2)
+    records = list(store.records)
+    records[:count] = fresh.records[:count]
+    return StudentStore(records, store.required_status)
+
+
+def test_current_previous_and_rebuild_ratio():
+    calls = []
+    cache = _cache(calls)
+    store = make_store(100)
+    v1 = cache.get(Snap(1, store))
+    assert cache.get(Snap(1, store)) is v1
+    small = _edited(store, 5)
+    v2 = cache.get(Snap(2, small))
+    assert calls == [("build", 1), ("update", 2, 5)]
+    # eski snapshot bilan kelgan so'rov qayta qurmaydi
+    assert cache.get(Snap(1, store)) is v1 and cache.get(Snap(2, small)) is v2
+    cache.get(Snap(3, _edited(small, 50)))
+    assert calls[-1] == ("build", 3)
+
+
+def test_sheets_are_cached_separately_and_combined():
+    calls = []
+    cache = _cache(calls)
+    a, b = Snap(1, make_store(10)), Snap(1, make_store(20, seed=3))
+    multi = MultiStore([("A", a), ("B", b)], ACTIVE_STATUS)
+    comb = cache.get(Snap(7, multi))
+    assert comb.version == 7 and [name for name, _ in comb.parts] == ["A", "B"]
+    assert cache.get(Snap(7, multi)) is comb
+    assert cache.get(a, "A") is comb.parts[0][1]
+    assert len(calls) == 2
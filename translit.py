@@ -0,0 +1,40 @@
+import re
+
+# Apostrof variantlari: ʻ ‘ ’ ʼ ` ´ va oddiy '
+_APOSTROPHES = "ʻ‘’ʼ`´'"
+
+_CYR = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "ғ": "g'", "д": "d", "е": "e", "ё": "yo",
+    "ж": "j", "з": "z", "и": "i", "й": "y", "к": "k", "қ": "q", "л": "l", "м": "m",
+    "н": "n", "о": "o", "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ў": "o'",
+    "ф": "f", "х": "x", "ҳ": "h", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "'",
+    "ы": "i", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+}
+_VOWELS = set("аеёиоуўэюяaeiou")
+_SPACES = re.compile(r"\s+")
+_DROP = str.maketrans("", "", _APOSTROPHES)
+
+
+def cyr_to_lat(text: str) -> str:
+    """O'zbek kirill yozuvini lotinga o'giradi (kichik harflarda)."""
+    out = []
+    prev = ""
+    for ch in text.lower():
+        lat = _CYR.get(ch)
+        if lat is None:
+            out.append(ch)
+        elif ch == "е" and (not prev or not prev.isalpha() or prev in _VOWELS):
+            # so'z boshida va unlidan keyin "ye": Ермат -> yermat
+            out.append("ye")
+        else:
+            out.append(lat)
+        prev = ch
+    return "".join(out)
+
+
+def normalize(text: str) -> str:
+    """Qidiruv kaliti: lotin yozuvi, kichik harf, apostroflarsiz, bitta bo'shliq."""
+    if not text:
+        return ""
+    key = cyr_to_lat(text.casefold()).translate(_DROP)
+    return _SPACES.sub(" ", key).strip()
@@ -17,8 +17,8 @@ def escape_md(text: str) -> str:
         return ""
     return str(text).replace("\\", "\\\\").replace("*", "\\*").replace("_", "\\_").replace("`", "\\`")
 
-async def split_and_send_text(chat_id, text, context, limit: int = 3900):
-    """Uzoq matnni Telegram limitiga mos bo'lib bo'lib yuboradi."""
+def split_text(text: str, limit: int = 3900) -> List[str]:
+    """Uzoq matnni Telegram limitiga mos qismlarga (qatorlar bo'yicha) bo'ladi."""
     parts = []
     if len(text) <= limit:
         parts = [text]
@@ -36,5 +36,13 @@ async def split_and_send_text(chat_id, text, context, limit: int = 3900):
         if cur:
             parts.append("".join(cur))
 
-    for p in parts:
-        await context.bot.send_message(chat_id=chat_id, text=p, parse_mode="Markdown")
+    return parts
+
+async def split_and_send_text(chat_id, text, context, limit: int = 3900, send=None):
+    """Uzoq matnni Telegram limitiga mos bo'lib bo'lib yuboradi.
+
+    ``send`` — yuborish funksiyasi (masalan, navbat orqali); berilmasa context.bot.send_message.
+    """
+    send = send or context.bot.send_message
+    for p in split_text(text, limit):
+        await send(chat_id=chat_id, text=p, parse_mode="Markdown")
@@ -0,0 +1,63 @@
+import threading
+
+from records import MultiStore, changed_positions
+
+
+class VersionedCache:
+    """Varaq bo'yicha snapshot versiyasiga mos qiymat (indeks, agregatlar).
+
+    - ``build(store, version)`` — noldan qurish;
+    - ``update(value, old, new, changed, version)`` — faqat ``changed``
+      o'rinlar bo'yicha yangilash (None qaytarsa noldan quriladi); o'zgarishlar
+      ``rebuild_ratio`` ulushidan ko'p bo'lsa chaqirilmaydi;
+    - ``combine(store, [(varaq, qiymat)], version)`` — ``MultiStore`` uchun.
+
+    Oldingi versiya qiymati ham saqlanadi: yangi versiya oldindan qurilgandan
+    keyin eski snapshot bilan kelgan so'rov uni qayta qurmaydi. Qiymatlarda
+    ``version`` atributi bo'lishi kerak.
+    """
+
+    def __init__(self, build, update=None, combine=None, rebuild_ratio: float = 1.0):
+        self._build = build
+        self._update = update
+        self._combine = combine
+        self.rebuild_ratio = rebuild_ratio
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._current = {}  # varaq -> (qiymat, StudentStore)
+        self._previous = {}  # varaq -> almashtirilgan qiymat
+        self._combined = None
+
+    def get(self, snapshot, key: str = ""):
+        store = snapshot.rows
+        if isinstance(store, MultiStore):
+            comb = self._combined
+            if comb is not None and comb.version == snapshot.version:
+                return comb
+            values = [(name, self.get(part, name)) for name, part in store.parts]
+            comb = self._combined = self._combine(store, values, snapshot.version)
+            return comb
+
+        cur = self._current.get(key)
+        if cur is not None and cur[0].version == snapshot.version:
+            return cur[0]
+        prev = self._previous.get(key)
+        if prev is not None and prev.version == snapshot.version:
+            return prev
+        with self._lock:
+            cur = self._current.get(key)
+            if cur is not None and cur[0].version == snapshot.version:
+                return cur[0]
+            value = None
+            if cur is not None and self._update is not None:
+                changed = changed_positions(cur[1], store)
+                if len(changed) <= self.rebuild_ratio * max(len(store), 1):
+                    value = self._update(cur[0], cur[1], store, changed, snapshot.version)
+            if value is None:
+                value = self._build(store, snapshot.version)
+            if cur is not None:
+                self._previous[key] = cur[0]
+            self._current[key] = (value, store)
+        return value